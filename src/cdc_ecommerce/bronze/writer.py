@@ -1,3 +1,4 @@
+"""Bronze storage handlers."""
 from __future__ import annotations
 
 from datetime import date, datetime, timezone
@@ -6,17 +7,51 @@ from pathlib import Path
 import pandas as pd
 
 from cdc_ecommerce.config import Settings
-from cdc_ecommerce.utils.io import write_parquet
+from cdc_ecommerce.quality.schema import PAYLOAD_COLUMN_PREFIX, validate_payloads
+from cdc_ecommerce.utils.io import read_parquet_files, write_parquet
+
+ENVELOPE_COLUMNS: tuple[str, ...] = ("event_id", "entity", "operation", "event_ts", "pk", "schema_version")
 
 
 def bronze_partition(settings: Settings, run_date: date) -> Path:
     return settings.bronze_root / f"event_date={run_date.isoformat()}"
 
 
-def write_bronze_batch(events_df: pd.DataFrame, settings: Settings, run_date: date) -> Path:
+def new_batch_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+
+def write_bronze_batch(events_df: pd.DataFrame, settings: Settings, run_date: date, batch_id: str | None = None) -> Path:
     partition = bronze_partition(settings, run_date)
     partition.mkdir(parents=True, exist_ok=True)
-    batch_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    batch_id = batch_id or new_batch_id()
+    if "payload" not in events_df.columns and not events_df.empty:
+        for (entity, schema_version), group in events_df.groupby(["entity", "schema_version"], sort=True):
+            path = partition / f"entity={entity}" / f"schema_version={schema_version}" / f"batch_{batch_id}.parquet"
+            write_parquet(group.dropna(axis=1, how="all").reset_index(drop=True), path)
+        return partition
     path = partition / f"batch_{batch_id}.parquet"
     write_parquet(events_df, path)
     return path
+
+
+def bronze_batch_files(settings: Settings, run_date: date, batch_id: str) -> list[Path]:
+    partition = bronze_partition(settings, run_date)
+    name = f"batch_{batch_id}.parquet"
+    return sorted([*partition.glob(name), *partition.glob(f"entity=*/schema_version=*/{name}")])
+
+
+def typed_bronze_events(events_df: pd.DataFrame) -> pd.DataFrame:
+    if events_df.empty:
+        return events_df
+    frames: list[pd.DataFrame] = []
+    for (entity, operation), group in events_df.groupby(["entity", "operation"], sort=False):
+        payloads = validate_payloads(entity, operation, group["payload"]).add_prefix(PAYLOAD_COLUMN_PREFIX)
+        frames.append(pd.concat([group[list(ENVELOPE_COLUMNS)], payloads], axis=1))
+    return pd.concat(frames).loc[events_df.index]
+
+
+def read_typed_bronze_partition(settings: Settings, run_date: date, entity: str | None = None) -> pd.DataFrame:
+    partition = bronze_partition(settings, run_date)
+    pattern = f"entity={entity}/schema_version=*/*.parquet" if entity else "entity=*/schema_version=*/*.parquet"
+    return read_parquet_files(sorted(partition.glob(pattern)))
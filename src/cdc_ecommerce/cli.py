@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import json
+from dataclasses import replace
 from pathlib import Path
 
 import typer
 
 from cdc_ecommerce.config import get_settings
 from cdc_ecommerce.pipeline import backfill as backfill_pipeline
-from cdc_ecommerce.pipeline import run_pipeline_for_date
+from cdc_ecommerce.pipeline import generate_range, run_pipeline_for_date
+from cdc_ecommerce.silver.storage import compact_silver
+from cdc_ecommerce.utils.metrics_store import export_run_metrics_json
 from cdc_ecommerce.utils.time import parse_date
 
 app = typer.Typer(help="CDC e-commerce Medallion pipeline")
@@ -17,9 +20,18 @@ app = typer.Typer(help="CDC e-commerce Medallion pipeline")
 def run_command(
     date: str = typer.Option(..., help="Run date in YYYY-MM-DD format"),
     project_root: Path = typer.Option(Path("."), help="Project root path"),
+    incremental_quality: bool = typer.Option(False, help="Check only rows changed by the run against the key index"),
+    full_quality_check: bool = typer.Option(False, help="Validate all silver rows in incremental mode"),
+    buckets: int = typer.Option(0, help="Hash buckets per silver entity (0 = one file per entity)"),
+    delta_log: bool = typer.Option(False, help="Append changed silver rows to delta files instead of rewriting"),
 ) -> None:
-    settings = get_settings(project_root.resolve())
-    result = run_pipeline_for_date(parse_date(date), settings)
+    settings = replace(
+        get_settings(project_root.resolve()),
+        quality_mode="incremental" if incremental_quality else "full",
+        silver_buckets=buckets,
+        silver_delta_log=delta_log,
+    )
+    result = run_pipeline_for_date(parse_date(date), settings, full_quality_check=full_quality_check)
     typer.echo(json.dumps(result, indent=2, default=str))
 
 
@@ -28,11 +40,70 @@ def backfill_command(
     start: str = typer.Option(..., help="Start date in YYYY-MM-DD format"),
     end: str = typer.Option(..., help="End date in YYYY-MM-DD format"),
     project_root: Path = typer.Option(Path("."), help="Project root path"),
+    resident: bool = typer.Option(False, help="Keep silver state in memory across days and flush at checkpoints"),
+    checkpoint_days: int = typer.Option(30, help="Days between silver flushes in resident mode"),
+    batch_days: int = typer.Option(1, help="Days of events merged, built into gold and checked per pass"),
+    incremental_quality: bool = typer.Option(False, help="Check only rows changed by each pass against the key index"),
+    full_check_every: int = typer.Option(0, help="Passes between full quality checks in incremental mode (0 = last pass only)"),
+    vectorized_generator: bool = typer.Option(False, help="Generate events with the array-based generator"),
+    scale: int = typer.Option(1, help="Multiplier on simulated users, products and orders per day"),
+    buckets: int = typer.Option(0, help="Hash buckets per silver entity (0 = one file per entity)"),
+    delta_log: bool = typer.Option(False, help="Append changed silver rows to delta files instead of rewriting"),
 ) -> None:
-    settings = get_settings(project_root.resolve())
+    settings = replace(
+        get_settings(project_root.resolve()),
+        silver_buckets=buckets,
+        silver_delta_log=delta_log,
+        backfill_resident_silver=resident,
+        backfill_checkpoint_days=checkpoint_days,
+        backfill_batch_days=batch_days,
+        quality_mode="incremental" if incremental_quality else "full",
+        quality_full_check_every=full_check_every,
+        generator_mode="vectorized" if vectorized_generator else "python",
+        generator_scale=scale,
+    )
     results = backfill_pipeline(parse_date(start), parse_date(end), settings)
     typer.echo(json.dumps(results, indent=2, default=str))
 
 
+@app.command("generate")
+def generate_command(
+    start: str = typer.Option(..., help="Start date in YYYY-MM-DD format"),
+    end: str = typer.Option(..., help="End date in YYYY-MM-DD format"),
+    project_root: Path = typer.Option(Path("."), help="Project root path"),
+    workers: int = typer.Option(1, help="Processes generating bronze partitions in parallel"),
+    vectorized_generator: bool = typer.Option(False, help="Generate events with the array-based generator"),
+    scale: int = typer.Option(1, help="Multiplier on simulated users, products and orders per day"),
+) -> None:
+    settings = replace(
+        get_settings(project_root.resolve()),
+        generator_mode="vectorized" if vectorized_generator else "python",
+        generator_scale=scale,
+    )
+    results = generate_range(parse_date(start), parse_date(end), settings, workers=workers)
+    typer.echo(json.dumps(results, indent=2, default=str))
+
+
+@app.command("compact")
+def compact_command(
+    force: bool = typer.Option(False, help="Fold every pending delta regardless of thresholds"),
+    project_root: Path = typer.Option(Path("."), help="Project root path"),
+    buckets: int = typer.Option(0, help="Hash buckets the silver tables were written with (0 = one file per entity)"),
+) -> None:
+    settings = replace(get_settings(project_root.resolve()), silver_buckets=buckets)
+    result = compact_silver(settings, force=force)
+    typer.echo(json.dumps(result, indent=2, default=str))
+
+
+@app.command("export-metrics")
+def export_metrics_command(
+    output: Path = typer.Option(..., help="Directory for the exported run_*.json files"),
+    project_root: Path = typer.Option(Path("."), help="Project root path"),
+) -> None:
+    settings = get_settings(project_root.resolve())
+    exported = export_run_metrics_json(settings.metrics_root, output.resolve())
+    typer.echo(json.dumps({"exported": exported, "output": str(output.resolve())}, indent=2))
+
+
 def main() -> None:
     app()
@@ -3,6 +3,14 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
+from typing import Literal
+
+MergeEngine = Literal["python", "columnar", "duckdb"]
+BronzeFormat = Literal["json", "typed"]
+GoldEngine = Literal["pandas", "duckdb"]
+GoldPartitioning = Literal["none", "date", "month"]
+QualityMode = Literal["full", "incremental"]
+GeneratorMode = Literal["python", "vectorized"]
 
 
 @dataclass(frozen=True)
@@ -16,6 +24,35 @@ class Settings:
     seed: int = 42
     schema_version: int = 1
     simulation_start_date: date = date(2021, 1, 1)
+    generator_mode: GeneratorMode = "python"
+    generator_scale: int = 1
+    silver_merge_engine: MergeEngine = "columnar"
+    duckdb_memory_limit: str | None = None
+    silver_buckets: int = 0
+    processed_ledger_retention_days: int | None = None
+    bronze_format: BronzeFormat = "json"
+    silver_merge_workers: int = 1
+    silver_merge_shards: int = 1
+    silver_sharded_entities: tuple[str, ...] = ("orders", "order_items")
+    silver_delta_log: bool = False
+    silver_compaction_max_deltas: int = 16
+    silver_compaction_max_delta_bytes: int = 64 * 1024 * 1024
+    backfill_resident_silver: bool = False
+    backfill_checkpoint_days: int = 30
+    backfill_batch_days: int = 1
+    gold_incremental: bool = True
+    gold_engine: GoldEngine = "pandas"
+    gold_workers: int = 4
+    gold_partitioning: GoldPartitioning = "none"
+    gold_top_k: int = 5
+    gold_rollups: bool = True
+    gold_distinct_sketches: bool = False
+    gold_sketch_error: float = 0.02
+    gold_write_root: Path | None = None
+    quality_sample_size: int = 5
+    quality_mode: QualityMode = "full"
+    quality_full_check_every: int = 0
+    post_merge_workers: int = 2
 
 
 def get_settings(project_root: Path | None = None) -> Settings:
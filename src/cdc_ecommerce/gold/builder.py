@@ -1,42 +1,244 @@
 from __future__ import annotations
 
-from pathlib import Path
+import heapq
+from functools import partial
+from operator import itemgetter
 
 import pandas as pd
 
 from cdc_ecommerce.config import Settings
-from cdc_ecommerce.utils.io import read_parquet_or_empty, write_parquet
-
-
-def build_gold(settings: Settings) -> dict[str, int]:
+from cdc_ecommerce.gold.dag import GoldNode, run_graph
+from cdc_ecommerce.gold.duckdb_builder import MART_COLUMNS, build_marts_duckdb
+from cdc_ecommerce.gold.incremental import DATE_KEYED_MARTS, changed_keys, previous_order_dates, previous_order_users
+from cdc_ecommerce.gold.retention import (
+    basic_retention,
+    first_orders,
+    first_orders_path,
+    load_first_orders,
+    update_first_orders,
+    write_first_orders,
+)
+from cdc_ecommerce.gold.rollups import (
+    LINE_FACT_COLUMNS,
+    ORDER_FACT_COLUMNS,
+    ROLLUP_TABLES,
+    UNKNOWN,
+    bucket_dates,
+    build_rollups,
+    rollup_buckets,
+    write_rollup_table,
+)
+from cdc_ecommerce.gold.sketches import SKETCH_TABLE, build_sketches, precision_for_error
+from cdc_ecommerce.gold.storage import gold_rebuild_marker, gold_table_exists, remove_gold_path, write_gold_table
+from cdc_ecommerce.silver.storage import load_silver_table
+
+MARTS: tuple[str, ...] = tuple(MART_COLUMNS)
+PAID_STATUSES: tuple[str, ...] = ("paid", "shipped", "refunded")
+SKETCHED_MARTS: tuple[str, ...] = ("daily_gmv", "orders_by_status", "refund_rate")
+_MART_DATES: dict[str, str] = {"basic_retention": "retention_dates"}
+
+
+def build_gold(
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None = None,
+    changed_events: pd.DataFrame | None = None,
+    previous_orders: pd.DataFrame | None = None,
+) -> dict[str, int]:
+    return run_gold(settings, silver_tables, changed_events, previous_orders)[0]
+
+
+def run_gold(
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None = None,
+    changed_events: pd.DataFrame | None = None,
+    previous_orders: pd.DataFrame | None = None,
+) -> tuple[dict[str, int], dict[str, float]]:
+    if settings.gold_top_k < 1:
+        raise ValueError(f"gold_top_k must be >= 1, got {settings.gold_top_k}")
     settings.gold_root.mkdir(parents=True, exist_ok=True)
 
-    users = read_parquet_or_empty(settings.silver_root / "users.parquet")
-    products = read_parquet_or_empty(settings.silver_root / "products.parquet")
-    orders = read_parquet_or_empty(settings.silver_root / "orders.parquet")
-    order_items = read_parquet_or_empty(settings.silver_root / "order_items.parquet")
-
-    daily_gmv = _daily_gmv(orders, order_items)
-    orders_by_status = _orders_by_status(orders)
-    refund_rate = _refund_rate(orders)
-    top_products = _top_products(orders, order_items, products)
-    retention = _basic_retention(orders)
-
-    outputs = {
-        "daily_gmv": daily_gmv,
-        "orders_by_status": orders_by_status,
-        "refund_rate": refund_rate,
-        "top_products": top_products,
-        "basic_retention": retention,
-    }
-
-    row_counts: dict[str, int] = {}
-    for name, df in outputs.items():
-        path = settings.gold_root / f"{name}.parquet"
-        write_parquet(df, path)
-        row_counts[name] = int(df.shape[0])
-
-    return row_counts
+    tables = [*MARTS]
+    if settings.gold_distinct_sketches:
+        precision_for_error(settings.gold_sketch_error)
+        tables.append(SKETCH_TABLE)
+    rollups = list(ROLLUP_TABLES) if settings.gold_rollups else []
+    incremental = (
+        changed_events is not None
+        and all(gold_table_exists(settings, name) for name in (*DATE_KEYED_MARTS, *tables))
+        and all((settings.gold_root / f"{name}.parquet").exists() for name in rollups)
+        and first_orders_path(settings).exists()
+        and not gold_rebuild_marker(settings).exists()
+    )
+    scope = changed_events if incremental else None
+    if settings.gold_engine == "duckdb":
+        nodes = _duckdb_nodes(settings, silver_tables, scope, previous_orders)
+    elif settings.gold_engine == "pandas":
+        nodes = _pandas_nodes(settings, silver_tables, scope, previous_orders)
+    else:
+        raise ValueError(f"Unknown gold engine: {settings.gold_engine}")
+    if settings.gold_distinct_sketches:
+        nodes += [
+            GoldNode(SKETCH_TABLE, ("distinct_keys",), partial(build_sketches, error=settings.gold_sketch_error)),
+            GoldNode("daily_gmv", ("daily_revenue", SKETCH_TABLE), _daily_gmv_from_sketches),
+            GoldNode("orders_by_status", (SKETCH_TABLE,), _orders_by_status_from_sketches),
+            GoldNode("refund_rate", ("orders_by_status",), _refund_rate_from_status_counts),
+        ]
+    nodes += [
+        GoldNode(f"write_{name}", (name, _MART_DATES.get(name, "touched_dates")), partial(write_gold_table, settings, name))
+        for name in tables
+    ]
+    nodes.append(GoldNode("write_user_first_orders", ("user_first_orders",), partial(write_first_orders, settings)))
+    if rollups:
+        nodes.append(GoldNode("rollups", ("rollup_order_facts", "rollup_line_facts", "rollup_buckets"), build_rollups))
+        nodes += [GoldNode(name, ("rollups",), itemgetter(name)) for name in rollups]
+        nodes += [
+            GoldNode(f"write_{name}", (name, "rollup_buckets"), partial(write_rollup_table, settings, name))
+            for name in rollups
+        ]
+
+    results, timings = run_graph(nodes, settings.gold_workers)
+    remove_gold_path(settings, gold_rebuild_marker(settings))
+    return {name: results[f"write_{name}"] for name in (*tables, *rollups)}, timings
+
+
+def _pandas_nodes(
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None,
+    changed_events: pd.DataFrame | None,
+    previous_orders: pd.DataFrame | None = None,
+) -> list[GoldNode]:
+    def silver(entity: str) -> pd.DataFrame:
+        return silver_tables[entity] if silver_tables is not None else load_silver_table(settings, entity)
+
+    def scope(orders: pd.DataFrame, order_items: pd.DataFrame) -> set[str] | None:
+        return None if changed_events is None else touched_dates(orders, order_items, changed_events, previous_orders)
+
+    def scoped_orders(orders: pd.DataFrame, dates: set[str] | None) -> pd.DataFrame:
+        return orders if dates is None else _orders_on_dates(orders, dates)
+
+    entities = ("users", "products", "orders", "order_items") if settings.gold_rollups else ("products", "orders", "order_items")
+    nodes = [
+        *(GoldNode(f"silver_{entity}", (), partial(silver, entity)) for entity in entities),
+        GoldNode("touched_dates", ("silver_orders", "silver_order_items"), scope),
+        GoldNode("scoped_orders", ("silver_orders", "touched_dates"), scoped_orders),
+        GoldNode("normalized_orders", ("scoped_orders",), _normalized_orders),
+        GoldNode("paid_orders", ("normalized_orders",), _paid_orders),
+        GoldNode("paid_order_lines", ("paid_orders", "silver_order_items"), _paid_order_lines),
+        GoldNode("top_products", ("paid_order_lines", "silver_products"), partial(_top_products, k=settings.gold_top_k)),
+    ]
+    if settings.gold_distinct_sketches:
+        nodes += [
+            GoldNode("daily_revenue", ("paid_order_lines",), _daily_revenue),
+            GoldNode("distinct_keys", ("normalized_orders", "paid_order_lines", "paid_orders"), _distinct_keys),
+        ]
+    else:
+        nodes += [
+            GoldNode("daily_gmv", ("paid_order_lines",), _daily_gmv),
+            GoldNode("orders_by_status", ("normalized_orders",), _orders_by_status),
+            GoldNode("refund_rate", ("normalized_orders",), _refund_rate),
+        ]
+    if settings.gold_rollups:
+        def buckets(dates: set[str] | None, orders: pd.DataFrame, order_items: pd.DataFrame) -> dict[str, set[str]] | None:
+            return None if changed_events is None else rollup_buckets(dates | _dimension_dates(orders, order_items, changed_events))
+
+        nodes += [
+            GoldNode("rollup_buckets", ("touched_dates", "silver_orders", "silver_order_items"), buckets),
+            GoldNode("rollup_order_facts", ("silver_orders", "silver_users", "rollup_buckets"), _rollup_order_facts),
+            GoldNode("rollup_line_facts", ("rollup_order_facts", "silver_order_items", "silver_products"), _rollup_line_facts),
+        ]
+    if changed_events is None:
+        nodes += [
+            GoldNode("user_first_orders", ("paid_orders",), lambda paid: (first_orders(paid), None)),
+            GoldNode("retention_dates", ("touched_dates",), lambda dates: dates),
+            GoldNode("basic_retention", ("paid_orders", "user_first_orders"), _basic_retention),
+        ]
+    else:
+        changed_orders = changed_keys(changed_events)["orders"]
+        previous_owners = previous_order_users(previous_orders, changed_orders)
+        nodes += [
+            GoldNode(
+                "affected_users",
+                ("silver_orders",),
+                lambda orders: _affected_users(orders, changed_orders) | previous_owners,
+            ),
+            GoldNode("affected_user_orders", ("silver_orders", "affected_users"), _paid_orders_of_users),
+            GoldNode(
+                "user_first_orders",
+                ("affected_users", "affected_user_orders"),
+                lambda users, paid: update_first_orders(load_first_orders(settings), users, paid),
+            ),
+            GoldNode("retention_dates", ("touched_dates", "user_first_orders", "affected_user_orders"), _retention_dates),
+            GoldNode("retention_orders", ("silver_orders", "retention_dates"), _paid_orders_on_dates),
+            GoldNode("basic_retention", ("retention_orders", "user_first_orders"), _basic_retention),
+        ]
+    return nodes
+
+
+def _duckdb_nodes(
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None,
+    changed_events: pd.DataFrame | None,
+    previous_orders: pd.DataFrame | None = None,
+) -> list[GoldNode]:
+    nodes = [
+        GoldNode("duckdb_marts", (), partial(build_marts_duckdb, settings, silver_tables, changed_events, previous_orders))
+    ]
+    nodes += [
+        GoldNode(name, ("duckdb_marts",), lambda built, name=name: built[1][name])
+        for name in ("touched_dates", "user_first_orders", "retention_dates", "rollup_buckets")
+    ]
+    names = [*MARTS]
+    if settings.gold_distinct_sketches:
+        names = [name for name in names if name not in SKETCHED_MARTS] + ["daily_revenue", "distinct_keys"]
+    if settings.gold_rollups:
+        names += ["rollup_order_facts", "rollup_line_facts"]
+    nodes += [GoldNode(name, ("duckdb_marts",), lambda built, name=name: built[0][name]) for name in names]
+    return nodes
+
+
+def touched_dates(
+    orders: pd.DataFrame,
+    order_items: pd.DataFrame,
+    changed_events: pd.DataFrame,
+    previous_orders: pd.DataFrame | None = None,
+) -> set[str]:
+    if orders.empty or changed_events.empty:
+        return set()
+
+    keys = changed_keys(changed_events)
+    order_keys = set(keys["orders"])
+    if not order_items.empty:
+        items = order_items[
+            order_items["order_item_id"].astype(str).isin(keys["order_items"])
+            | order_items["product_id"].astype(str).isin(keys["products"])
+        ]
+        order_keys.update(items["order_id"].dropna().astype(str))
+    dates = _order_dates(orders, orders["order_id"].astype(str).isin(order_keys))
+    return dates | previous_order_dates(previous_orders, keys["orders"])
+
+
+def _dimension_dates(orders: pd.DataFrame, order_items: pd.DataFrame, changed_events: pd.DataFrame) -> set[str]:
+    if orders.empty or changed_events.empty:
+        return set()
+
+    keys = changed_keys(changed_events)
+    mask = orders["user_id"].astype(str).isin(keys["regions"])
+    if not order_items.empty and keys["categories"]:
+        items = order_items[order_items["product_id"].astype(str).isin(keys["categories"])]
+        mask |= orders["order_id"].astype(str).isin(set(items["order_id"].dropna().astype(str)))
+    return _order_dates(orders, mask)
+
+
+def _order_dates(orders: pd.DataFrame, mask: pd.Series) -> set[str]:
+    order_ts = orders.loc[mask, "order_ts"]
+    return set(pd.to_datetime(order_ts, utc=True, errors="coerce").dropna().dt.date.astype(str))
+
+
+def _orders_on_dates(orders: pd.DataFrame, dates: set[str]) -> pd.DataFrame:
+    if orders.empty:
+        return orders
+    order_dates = pd.to_datetime(orders["order_ts"], utc=True, errors="coerce").dt.date.astype(str)
+    return orders[order_dates.isin(dates)]
 
 
 def _normalized_orders(orders: pd.DataFrame) -> pd.DataFrame:
@@ -46,25 +248,33 @@ def _normalized_orders(orders: pd.DataFrame) -> pd.DataFrame:
     frame["order_ts"] = pd.to_datetime(frame["order_ts"], utc=True, errors="coerce")
     frame = frame[frame["order_ts"].notna()]
     if "is_deleted" in frame.columns:
-        frame = frame[~frame["is_deleted"].fillna(False)]
+        frame = frame[~frame["is_deleted"].astype("boolean").fillna(False).astype(bool)]
     frame["date"] = frame["order_ts"].dt.date
     return frame
 
 
-def _daily_gmv(orders: pd.DataFrame, order_items: pd.DataFrame) -> pd.DataFrame:
-    if orders.empty or order_items.empty:
-        return pd.DataFrame(columns=["date", "gmv", "orders_count"])
+def _paid_orders(normalized_orders: pd.DataFrame) -> pd.DataFrame:
+    if normalized_orders.empty:
+        return normalized_orders
+    return normalized_orders[normalized_orders["status"].isin(PAID_STATUSES)]
 
-    valid_orders = _normalized_orders(orders)
-    valid_orders = valid_orders[valid_orders["status"].isin(["paid", "shipped", "refunded"])]
-    if valid_orders.empty:
-        return pd.DataFrame(columns=["date", "gmv", "orders_count"])
 
-    merged = valid_orders[["order_id", "date"]].merge(order_items[["order_id", "qty", "unit_price"]], on="order_id", how="inner")
-    merged["line_revenue"] = merged["qty"].astype(float) * merged["unit_price"].astype(float)
+def _paid_order_lines(paid_orders: pd.DataFrame, order_items: pd.DataFrame) -> pd.DataFrame:
+    if paid_orders.empty or order_items.empty:
+        return pd.DataFrame(columns=["order_id", "date", "product_id", "qty", "unit_price", "line_revenue"])
+    lines = paid_orders[["order_id", "date"]].merge(
+        order_items[["order_id", "product_id", "qty", "unit_price"]], on="order_id", how="inner"
+    )
+    lines["line_revenue"] = lines["qty"].astype(float) * lines["unit_price"].astype(float)
+    return lines
+
+
+def _daily_gmv(paid_order_lines: pd.DataFrame) -> pd.DataFrame:
+    if paid_order_lines.empty:
+        return pd.DataFrame(columns=["date", "gmv", "orders_count"])
 
     grouped = (
-        merged.groupby("date", as_index=False)
+        paid_order_lines.groupby("date", as_index=False)
         .agg(gmv=("line_revenue", "sum"), orders_count=("order_id", "nunique"))
         .sort_values("date")
         .reset_index(drop=True)
@@ -74,13 +284,12 @@ def _daily_gmv(orders: pd.DataFrame, order_items: pd.DataFrame) -> pd.DataFrame:
     return grouped
 
 
-def _orders_by_status(orders: pd.DataFrame) -> pd.DataFrame:
-    if orders.empty:
+def _orders_by_status(normalized_orders: pd.DataFrame) -> pd.DataFrame:
+    if normalized_orders.empty:
         return pd.DataFrame(columns=["date", "status", "count"])
 
-    frame = _normalized_orders(orders)
     grouped = (
-        frame.groupby(["date", "status"], as_index=False)
+        normalized_orders.groupby(["date", "status"], as_index=False)
         .agg(count=("order_id", "nunique"))
         .sort_values(["date", "status"])
         .reset_index(drop=True)
@@ -89,16 +298,13 @@ def _orders_by_status(orders: pd.DataFrame) -> pd.DataFrame:
     return grouped
 
 
-def _refund_rate(orders: pd.DataFrame) -> pd.DataFrame:
-    if orders.empty:
-        return pd.DataFrame(columns=["date", "refund_rate"]) 
-
-    frame = _normalized_orders(orders)
-    if frame.empty:
+def _refund_rate(normalized_orders: pd.DataFrame) -> pd.DataFrame:
+    if normalized_orders.empty:
         return pd.DataFrame(columns=["date", "refund_rate"])
 
+    frame = normalized_orders
     refunded = frame[frame["status"] == "refunded"].groupby("date")["order_id"].nunique().rename("refunded_orders")
-    paid_base = frame[frame["status"].isin(["paid", "shipped", "refunded"])].groupby("date")["order_id"].nunique().rename("paid_orders")
+    paid_base = frame[frame["status"].isin(PAID_STATUSES)].groupby("date")["order_id"].nunique().rename("paid_orders")
 
     result = pd.concat([refunded, paid_base], axis=1).fillna(0).reset_index()
     result["refund_rate"] = (result["refunded_orders"] / result["paid_orders"].replace(0, pd.NA)).fillna(0).round(6)
@@ -107,56 +313,168 @@ def _refund_rate(orders: pd.DataFrame) -> pd.DataFrame:
     return output
 
 
-def _top_products(orders: pd.DataFrame, order_items: pd.DataFrame, products: pd.DataFrame) -> pd.DataFrame:
-    if orders.empty or order_items.empty or products.empty:
-        return pd.DataFrame(columns=["date", "product_id", "product_name", "revenue"])
+def _top_products(paid_order_lines: pd.DataFrame, products: pd.DataFrame, k: int = 5) -> pd.DataFrame:
+    columns = ["date", "product_id", "product_name", "revenue"]
+    if paid_order_lines.empty or products.empty:
+        return pd.DataFrame(columns=columns)
 
-    valid_orders = _normalized_orders(orders)
-    valid_orders = valid_orders[valid_orders["status"].isin(["paid", "shipped", "refunded"])]
+    product_names = products[["product_id", "name"]].rename(columns={"name": "product_name"})
+    merged = paid_order_lines.merge(product_names, on="product_id", how="left")
+    merged = merged[merged["product_name"].notna()]
+    merged["revenue"] = merged["line_revenue"].round(2)
+
+    rows = []
+    for day, lines in merged.groupby("date", sort=True):
+        revenue = lines.groupby(["product_id", "product_name"])["revenue"].sum()
+        candidates = zip(-revenue.to_numpy(), revenue.index.get_level_values(0), revenue.index.get_level_values(1))
+        rows.extend((str(day), product, name, -negated) for negated, product, name in heapq.nsmallest(k, candidates))
+    result = pd.DataFrame(rows, columns=columns)
+    result["revenue"] = result["revenue"].astype(float).round(2)
+    return result
 
-    if valid_orders.empty:
-        return pd.DataFrame(columns=["date", "product_id", "product_name", "revenue"])
 
-    product_names = products[["product_id", "name"]].rename(columns={"name": "product_name"})
-    merged = (
-        valid_orders[["order_id", "date"]]
-        .merge(order_items[["order_id", "product_id", "qty", "unit_price"]], on="order_id", how="inner")
-        .merge(product_names, on="product_id", how="left")
+def _distinct_keys(
+    normalized_orders: pd.DataFrame,
+    paid_order_lines: pd.DataFrame,
+    paid_orders: pd.DataFrame,
+) -> pd.DataFrame:
+    frames = []
+    if not normalized_orders.empty:
+        statuses = normalized_orders[normalized_orders["status"].notna()]
+        frames.append(
+            pd.DataFrame(
+                {"date": statuses["date"], "metric": "orders_by_status", "dimension": statuses["status"], "key": statuses["order_id"]}
+            )
+        )
+    if not paid_order_lines.empty:
+        frames.append(
+            pd.DataFrame(
+                {"date": paid_order_lines["date"], "metric": "orders_count", "dimension": "all", "key": paid_order_lines["order_id"]}
+            )
+        )
+    if not paid_orders.empty:
+        frames.append(
+            pd.DataFrame({"date": paid_orders["date"], "metric": "active_users", "dimension": "all", "key": paid_orders["user_id"]})
+        )
+    if not frames:
+        return pd.DataFrame(columns=["date", "metric", "dimension", "key"])
+    return pd.concat(frames, ignore_index=True).dropna(subset=["key"]).astype(str)
+
+
+def _daily_revenue(paid_order_lines: pd.DataFrame) -> pd.DataFrame:
+    if paid_order_lines.empty:
+        return pd.DataFrame(columns=["date", "gmv"])
+    grouped = paid_order_lines.groupby("date", as_index=False).agg(gmv=("line_revenue", "sum")).sort_values("date")
+    grouped["gmv"] = grouped["gmv"].round(2)
+    grouped["date"] = grouped["date"].astype(str)
+    return grouped.reset_index(drop=True)
+
+
+def _sketch_estimates(sketches: pd.DataFrame, metric: str) -> pd.DataFrame:
+    if sketches.empty:
+        return pd.DataFrame(columns=["date", "dimension", "estimate"])
+    rows = sketches[sketches["metric"] == metric]
+    return pd.DataFrame({"date": rows["date"].astype(str), "dimension": rows["dimension"], "estimate": rows["estimate"]})
+
+
+def _daily_gmv_from_sketches(daily_revenue: pd.DataFrame, sketches: pd.DataFrame) -> pd.DataFrame:
+    if daily_revenue.empty:
+        return pd.DataFrame(columns=MART_COLUMNS["daily_gmv"])
+    counts = _sketch_estimates(sketches, "orders_count").set_index("date")["estimate"]
+    result = daily_revenue.assign(date=daily_revenue["date"].astype(str))
+    result["orders_count"] = result["date"].map(counts).fillna(0).astype(int)
+    return result[MART_COLUMNS["daily_gmv"]]
+
+
+def _orders_by_status_from_sketches(sketches: pd.DataFrame) -> pd.DataFrame:
+    estimates = _sketch_estimates(sketches, "orders_by_status").rename(columns={"dimension": "status", "estimate": "count"})
+    return estimates[MART_COLUMNS["orders_by_status"]].sort_values(["date", "status"]).reset_index(drop=True)
+
+
+def _refund_rate_from_status_counts(orders_by_status: pd.DataFrame) -> pd.DataFrame:
+    paid = orders_by_status[orders_by_status["status"].isin(PAID_STATUSES)]
+    if paid.empty:
+        return pd.DataFrame(columns=MART_COLUMNS["refund_rate"])
+    paid_base = paid.groupby("date")["count"].sum()
+    refunded = paid[paid["status"] == "refunded"].groupby("date")["count"].sum().reindex(paid_base.index, fill_value=0)
+    rate = (refunded / paid_base.replace(0, pd.NA)).fillna(0).astype(float).round(6)
+    return pd.DataFrame({"date": paid_base.index.astype(str), "refund_rate": rate.to_numpy()})
+
+
+def _rollup_order_facts(
+    orders: pd.DataFrame,
+    users: pd.DataFrame,
+    buckets: dict[str, set[str]] | None,
+) -> pd.DataFrame:
+    scoped = orders if buckets is None else _orders_on_dates(orders, bucket_dates(buckets))
+    normalized = _normalized_orders(scoped)
+    if normalized.empty:
+        return pd.DataFrame(columns=ORDER_FACT_COLUMNS)
+    facts = pd.DataFrame(
+        {
+            "date": normalized["date"].astype(str),
+            "order_id": normalized["order_id"].astype(str),
+            "status": normalized["status"],
+            "user_id": normalized["user_id"].astype(str),
+        }
     )
-    merged["revenue"] = (merged["qty"].astype(float) * merged["unit_price"].astype(float)).round(2)
-
-    grouped = (
-        merged.groupby(["date", "product_id", "product_name"], as_index=False)
-        .agg(revenue=("revenue", "sum"))
-        .sort_values(["date", "revenue"], ascending=[True, False])
+    if not users.empty and "region" in users.columns:
+        regions = pd.DataFrame({"user_id": users["user_id"].astype(str), "region": users["region"]})
+        facts = facts.merge(regions, on="user_id", how="left")
+    else:
+        facts["region"] = None
+    facts["region"] = facts["region"].fillna(UNKNOWN)
+    return facts[ORDER_FACT_COLUMNS].sort_values(["date", "order_id"], kind="stable").reset_index(drop=True)
+
+
+def _rollup_line_facts(order_facts: pd.DataFrame, order_items: pd.DataFrame, products: pd.DataFrame) -> pd.DataFrame:
+    paid = order_facts[order_facts["status"].isin(PAID_STATUSES)] if not order_facts.empty else order_facts
+    if paid.empty or order_items.empty:
+        return pd.DataFrame(columns=LINE_FACT_COLUMNS)
+    items = pd.DataFrame(
+        {
+            "order_id": order_items["order_id"].astype(str),
+            "product_id": order_items["product_id"].astype(str),
+            "line_revenue": order_items["qty"].astype(float) * order_items["unit_price"].astype(float),
+        }
     )
-    grouped["rank"] = grouped.groupby("date")["revenue"].rank(method="first", ascending=False)
-    result = grouped[grouped["rank"] <= 5].drop(columns=["rank"]).reset_index(drop=True)
-    result["revenue"] = result["revenue"].round(2)
-    result["date"] = result["date"].astype(str)
-    return result
+    lines = paid.merge(items, on="order_id", how="inner")
+    if not products.empty and "category" in products.columns:
+        categories = pd.DataFrame({"product_id": products["product_id"].astype(str), "category": products["category"]})
+        lines = lines.merge(categories, on="product_id", how="left")
+    else:
+        lines["category"] = None
+    lines["category"] = lines["category"].fillna(UNKNOWN)
+    return lines[LINE_FACT_COLUMNS].sort_values(["date", "order_id"], kind="stable").reset_index(drop=True)
 
 
-def _basic_retention(orders: pd.DataFrame) -> pd.DataFrame:
-    if orders.empty:
-        return pd.DataFrame(columns=["date", "active_users", "returning_users", "retention_rate"])
+def _affected_users(orders: pd.DataFrame, changed_orders: set[str]) -> set[str]:
+    if orders.empty or not changed_orders:
+        return set()
+    return set(orders.loc[orders["order_id"].astype(str).isin(changed_orders), "user_id"].dropna().astype(str))
 
-    frame = _normalized_orders(orders)
-    frame = frame[frame["status"].isin(["paid", "shipped", "refunded"])]
-    if frame.empty:
-        return pd.DataFrame(columns=["date", "active_users", "returning_users", "retention_rate"])
 
-    first_order = frame.groupby("user_id", as_index=False).agg(first_order_date=("date", "min"))
-    joined = frame[["date", "user_id"]].drop_duplicates().merge(first_order, on="user_id", how="left")
-    joined["is_returning"] = joined["first_order_date"] < joined["date"]
+def _paid_orders_of_users(orders: pd.DataFrame, users: set[str]) -> pd.DataFrame:
+    if orders.empty or not users:
+        return orders.iloc[0:0]
+    return _paid_orders(_normalized_orders(orders[orders["user_id"].astype(str).isin(users)]))
 
-    grouped = joined.groupby("date", as_index=False).agg(
-        active_users=("user_id", "nunique"),
-        returning_users=("is_returning", "sum"),
-    )
-    grouped["retention_rate"] = (
-        grouped["returning_users"] / grouped["active_users"].replace(0, pd.NA)
-    ).fillna(0).round(6)
-    output = grouped.sort_values("date").reset_index(drop=True)
-    output["date"] = output["date"].astype(str)
-    return output
+
+def _retention_dates(
+    dates: set[str],
+    first_order_state: tuple[pd.DataFrame, set[str] | None],
+    affected_user_orders: pd.DataFrame,
+) -> set[str]:
+    changed = first_order_state[1] or set()
+    if affected_user_orders.empty or not changed:
+        return set(dates)
+    moved = affected_user_orders[affected_user_orders["user_id"].astype(str).isin(changed)]
+    return set(dates) | set(moved["date"].astype(str))
+
+
+def _paid_orders_on_dates(orders: pd.DataFrame, dates: set[str]) -> pd.DataFrame:
+    return _paid_orders(_normalized_orders(_orders_on_dates(orders, dates)))
+
+
+def _basic_retention(paid_orders: pd.DataFrame, first_order_state: tuple[pd.DataFrame, set[str] | None]) -> pd.DataFrame:
+    return basic_retention(paid_orders, first_order_state[0])
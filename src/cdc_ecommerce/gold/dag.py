@@ -0,0 +1,43 @@
+"""Gold build graph."""
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class GoldNode:
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable[..., Any]
+
+
+def run_graph(nodes: list[GoldNode], workers: int = 1) -> tuple[dict[str, Any], dict[str, float]]:
+    names = [node.name for node in nodes]
+    if len(set(names)) != len(names):
+        raise ValueError("Gold graph node names must be unique")
+
+    results: dict[str, Any] = {}
+    timings: dict[str, float] = {}
+    pending = {node.name: node for node in nodes}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running: dict[Future, GoldNode] = {}
+        while pending or running:
+            for node in [node for node in pending.values() if all(name in results for name in node.inputs)]:
+                del pending[node.name]
+                running[pool.submit(_timed, node, [results[name] for name in node.inputs])] = node
+            if not running:
+                raise ValueError(f"Gold graph nodes have unresolved inputs: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                results[node.name], timings[node.name] = future.result()
+    return results, {name: timings[name] for name in names}
+
+
+def _timed(node: GoldNode, inputs: list[Any]) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = node.compute(*inputs)
+    return result, round(time.perf_counter() - started, 4)
@@ -0,0 +1,410 @@
+"""DuckDB gold engine."""
+from __future__ import annotations
+
+from typing import Any
+
+import duckdb
+import pandas as pd
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.gold.incremental import changed_keys, previous_order_dates, previous_order_users
+from cdc_ecommerce.gold.retention import FIRST_ORDER_COLUMNS, load_first_orders
+from cdc_ecommerce.gold.rollups import LINE_FACT_COLUMNS, ORDER_FACT_COLUMNS, bucket_dates, rollup_buckets
+from cdc_ecommerce.silver.storage import silver_relation_sql
+from cdc_ecommerce.utils.io import connect_duckdb
+
+MART_COLUMNS: dict[str, list[str]] = {
+    "daily_gmv": ["date", "gmv", "orders_count"],
+    "orders_by_status": ["date", "status", "count"],
+    "refund_rate": ["date", "refund_rate"],
+    "top_products": ["date", "product_id", "product_name", "revenue"],
+    "basic_retention": ["date", "active_users", "returning_users", "retention_rate"],
+}
+_PAID_STATUSES = "('paid', 'shipped', 'refunded')"
+
+_MART_SQL: dict[str, str] = {
+    "daily_gmv": """
+        SELECT p.date, round(coalesce(sum(i.qty * i.unit_price), 0), 2) AS gmv, count(DISTINCT p.order_id) AS orders_count
+        FROM paid_scoped p
+        JOIN items i ON i.order_id = p.order_id
+        GROUP BY p.date
+        ORDER BY p.date
+    """,
+    "orders_by_status": """
+        SELECT date, status, count(DISTINCT order_id) AS count
+        FROM orders_scoped
+        WHERE status IS NOT NULL
+        GROUP BY date, status
+        ORDER BY date, status
+    """,
+    "refund_rate": """
+        SELECT
+            date,
+            round(count(DISTINCT order_id) FILTER (WHERE status = 'refunded') / count(DISTINCT order_id), 6) AS refund_rate
+        FROM paid_scoped
+        GROUP BY date
+        ORDER BY date
+    """,
+    "top_products": """
+        WITH grouped AS (
+            SELECT p.date, i.product_id, n.product_name, coalesce(sum(round(i.qty * i.unit_price, 2)), 0) AS revenue
+            FROM paid_scoped p
+            JOIN items i ON i.order_id = p.order_id
+            JOIN product_names n ON n.product_id = i.product_id
+            WHERE n.product_name IS NOT NULL
+            GROUP BY p.date, i.product_id, n.product_name
+        ),
+        ranked AS (
+            SELECT *, row_number() OVER (PARTITION BY date ORDER BY revenue DESC, product_id, product_name) AS rank
+            FROM grouped
+        )
+        SELECT date, product_id, product_name, round(revenue, 2) AS revenue
+        FROM ranked
+        WHERE rank <= $top_k
+        ORDER BY date, rank
+    """,
+    "basic_retention": """
+        WITH active AS (
+            SELECT DISTINCT date, user_id FROM paid_retention
+        ),
+        grouped AS (
+            SELECT
+                a.date,
+                count(DISTINCT a.user_id) AS active_users,
+                count(*) FILTER (WHERE f.first_order_date < a.date) AS returning_users
+            FROM active a
+            LEFT JOIN first_orders f ON f.user_id = a.user_id
+            GROUP BY a.date
+        )
+        SELECT
+            date,
+            active_users,
+            returning_users,
+            round(CASE WHEN active_users = 0 THEN 0 ELSE returning_users / active_users END, 6) AS retention_rate
+        FROM grouped
+        ORDER BY date
+    """,
+}
+_DAILY_REVENUE_SQL = """
+    SELECT p.date, round(coalesce(sum(i.qty * i.unit_price), 0), 2) AS gmv
+    FROM paid_scoped p
+    JOIN items i ON i.order_id = p.order_id
+    GROUP BY p.date
+    ORDER BY p.date
+"""
+_SKETCHED_MARTS: tuple[str, ...] = ("daily_gmv", "orders_by_status", "refund_rate")
+_MART_INPUTS: dict[str, tuple[str, ...]] = {
+    "daily_gmv": ("order_items",),
+    "orders_by_status": (),
+    "refund_rate": (),
+    "top_products": ("order_items", "products"),
+    "basic_retention": (),
+}
+
+
+def build_marts_duckdb(
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None,
+    changed_events: pd.DataFrame | None,
+    previous_orders: pd.DataFrame | None = None,
+) -> tuple[dict[str, pd.DataFrame], dict[str, Any]]:
+    conn = connect_duckdb(settings.duckdb_memory_limit, settings.data_root / ".duckdb_tmp")
+    try:
+        available = _register_silver(conn, settings, silver_tables)
+        dates: set[str] | None = None
+        if "orders" not in available:
+            empty = None if changed_events is None else set()
+            outputs = {name: pd.DataFrame(columns=columns) for name, columns in MART_COLUMNS.items()}
+            outputs["distinct_keys"] = pd.DataFrame(columns=["date", "metric", "dimension", "key"])
+            outputs["daily_revenue"] = pd.DataFrame(columns=["date", "gmv"])
+            outputs["rollup_order_facts"] = pd.DataFrame(columns=ORDER_FACT_COLUMNS)
+            outputs["rollup_line_facts"] = pd.DataFrame(columns=LINE_FACT_COLUMNS)
+            return outputs, {
+                "touched_dates": empty,
+                "user_first_orders": (pd.DataFrame(columns=FIRST_ORDER_COLUMNS), empty),
+                "retention_dates": empty,
+                "rollup_buckets": rollup_buckets(empty),
+            }
+
+        _create_order_views(conn, available)
+        date_filter = ""
+        if changed_events is not None:
+            dates = _touched_dates(conn, changed_events, "order_items" in available, previous_orders)
+            conn.register("touched_dates", pd.DataFrame({"date": pd.Series(sorted(dates), dtype="string")}))
+            date_filter = "AND date IN (SELECT date FROM touched_dates)"
+        conn.execute(f"CREATE TEMP VIEW orders_scoped AS SELECT * FROM orders_all WHERE NOT is_deleted {date_filter}")
+        conn.execute(f"CREATE TEMP VIEW paid_scoped AS SELECT * FROM orders_scoped WHERE status IN {_PAID_STATUSES}")
+        conn.execute(f"CREATE TEMP VIEW paid_all AS SELECT * FROM orders_all WHERE NOT is_deleted AND status IN {_PAID_STATUSES}")
+        first_order_state, retention_dates = _first_orders(conn, settings, changed_events, dates, previous_orders)
+
+        outputs: dict[str, pd.DataFrame] = {}
+        for name, query in _MART_SQL.items():
+            if settings.gold_distinct_sketches and name in _SKETCHED_MARTS:
+                continue
+            if not set(_MART_INPUTS[name]) <= available:
+                outputs[name] = pd.DataFrame(columns=MART_COLUMNS[name])
+                continue
+            parameters = {"top_k": settings.gold_top_k} if "$top_k" in query else None
+            outputs[name] = conn.execute(query, parameters).df()
+        if settings.gold_distinct_sketches:
+            outputs["distinct_keys"] = conn.execute(_distinct_keys_sql("order_items" in available)).df()
+            if "order_items" in available:
+                outputs["daily_revenue"] = conn.execute(_DAILY_REVENUE_SQL).df()
+            else:
+                outputs["daily_revenue"] = pd.DataFrame(columns=["date", "gmv"])
+        buckets = None
+        if settings.gold_rollups:
+            buckets = _rollup_buckets(conn, changed_events, dates, "order_items" in available)
+            outputs.update(_rollup_facts(conn, buckets, available))
+        return outputs, {
+            "touched_dates": dates,
+            "user_first_orders": first_order_state,
+            "retention_dates": retention_dates,
+            "rollup_buckets": buckets,
+        }
+    finally:
+        conn.close()
+
+
+def _distinct_keys_sql(has_items: bool) -> str:
+    parts = [
+        "SELECT date, 'orders_by_status' AS metric, status AS dimension, order_id AS key FROM orders_scoped WHERE status IS NOT NULL",
+        "SELECT date, 'active_users', 'all', user_id FROM paid_scoped WHERE user_id IS NOT NULL",
+    ]
+    if has_items:
+        parts.insert(1, "SELECT p.date, 'orders_count', 'all', p.order_id FROM paid_scoped p JOIN items i ON i.order_id = p.order_id")
+    return " UNION ALL ".join(parts)
+
+
+def _rollup_buckets(
+    conn: duckdb.DuckDBPyConnection,
+    changed_events: pd.DataFrame | None,
+    dates: set[str] | None,
+    has_items: bool,
+) -> dict[str, set[str]] | None:
+    if changed_events is None or dates is None:
+        return None
+    if changed_events.empty:
+        return rollup_buckets(set(dates))
+    item_dates = ""
+    if has_items:
+        item_dates = """
+            UNION
+            SELECT o.date FROM orders_all o
+            JOIN silver_order_items i ON CAST(i.order_id AS VARCHAR) = o.order_id
+            WHERE CAST(i.product_id AS VARCHAR) IN (SELECT key FROM changed_categories)
+        """
+    rows = conn.execute(
+        f"SELECT date FROM orders_all WHERE user_id IN (SELECT key FROM changed_regions) {item_dates}"
+    ).fetchall()
+    return rollup_buckets(set(dates) | {row[0] for row in rows})
+
+
+def _rollup_facts(
+    conn: duckdb.DuckDBPyConnection,
+    buckets: dict[str, set[str]] | None,
+    available: set[str],
+) -> dict[str, pd.DataFrame]:
+    date_filter = ""
+    if buckets is not None:
+        conn.register("bucket_dates", pd.DataFrame({"date": pd.Series(sorted(bucket_dates(buckets)), dtype="string")}))
+        date_filter = "AND o.date IN (SELECT date FROM bucket_dates)"
+    region, region_join = "'unknown'", ""
+    if "users" in available:
+        conn.execute(
+            "CREATE TEMP VIEW user_regions AS "
+            "SELECT CAST(user_id AS VARCHAR) AS user_id, CAST(region AS VARCHAR) AS region FROM silver_users"
+        )
+        region, region_join = "coalesce(u.region, 'unknown')", "LEFT JOIN user_regions u ON u.user_id = o.user_id"
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE rollup_order_facts AS
+        SELECT o.date, o.order_id, o.status, {region} AS region
+        FROM orders_all o
+        {region_join}
+        WHERE NOT o.is_deleted {date_filter}
+        """
+    )
+    outputs = {"rollup_order_facts": conn.execute("SELECT * FROM rollup_order_facts ORDER BY date, order_id").df()}
+    if "order_items" not in available:
+        outputs["rollup_line_facts"] = pd.DataFrame(columns=LINE_FACT_COLUMNS)
+        return outputs
+    category, category_join = "'unknown'", ""
+    if "products" in available:
+        conn.execute(
+            "CREATE TEMP VIEW product_categories AS "
+            "SELECT CAST(product_id AS VARCHAR) AS product_id, CAST(category AS VARCHAR) AS category FROM silver_products"
+        )
+        category, category_join = "coalesce(c.category, 'unknown')", "LEFT JOIN product_categories c ON c.product_id = i.product_id"
+    outputs["rollup_line_facts"] = conn.execute(
+        f"""
+        SELECT f.date, f.order_id, f.region, {category} AS category, i.qty * i.unit_price AS line_revenue
+        FROM rollup_order_facts f
+        JOIN items i ON i.order_id = f.order_id
+        {category_join}
+        WHERE f.status IN {_PAID_STATUSES}
+        ORDER BY f.date, f.order_id
+        """
+    ).df()
+    return outputs
+
+
+def _first_orders(
+    conn: duckdb.DuckDBPyConnection,
+    settings: Settings,
+    changed_events: pd.DataFrame | None,
+    dates: set[str] | None,
+    previous_orders: pd.DataFrame | None = None,
+) -> tuple[tuple[pd.DataFrame, set[str] | None], set[str] | None]:
+    if changed_events is None or dates is None:
+        conn.execute(
+            """
+            CREATE TEMP TABLE first_orders AS
+            SELECT user_id, min(date) AS first_order_date FROM paid_all WHERE user_id IS NOT NULL GROUP BY user_id ORDER BY user_id
+            """
+        )
+        conn.execute("CREATE TEMP VIEW paid_retention AS SELECT * FROM paid_all")
+        return (conn.execute("SELECT * FROM first_orders").df(), None), None
+
+    previous = load_first_orders(settings)
+    conn.register("previous_frame", previous)
+    conn.execute(
+        "CREATE TEMP VIEW previous_first_orders AS "
+        "SELECT CAST(user_id AS VARCHAR) AS user_id, CAST(first_order_date AS VARCHAR) AS first_order_date FROM previous_frame"
+    )
+    changed: set[str] = set()
+    if not changed_events.empty:
+        previous_owners = previous_order_users(previous_orders, changed_keys(changed_events)["orders"])
+        conn.register("previous_owners", pd.DataFrame({"user_id": pd.Series(sorted(previous_owners), dtype="string")}))
+        conn.execute(
+            """
+            CREATE TEMP TABLE recomputed_first_orders AS
+            SELECT a.user_id, min(p.date) AS first_order_date
+            FROM (
+                SELECT DISTINCT user_id FROM orders_all
+                WHERE user_id IS NOT NULL AND order_id IN (SELECT key FROM changed_orders)
+                UNION
+                SELECT user_id FROM previous_owners
+            ) a
+            LEFT JOIN paid_all p ON p.user_id = a.user_id
+            GROUP BY a.user_id
+            """
+        )
+        rows = conn.execute(
+            """
+            SELECT r.user_id
+            FROM recomputed_first_orders r
+            LEFT JOIN previous_first_orders p ON p.user_id = r.user_id
+            WHERE p.first_order_date IS DISTINCT FROM r.first_order_date
+            """
+        ).fetchall()
+        changed = {row[0] for row in rows}
+
+    retention_dates = set(dates)
+    if changed:
+        conn.register("changed_users", pd.DataFrame({"user_id": pd.Series(sorted(changed), dtype="string")}))
+        table = conn.execute(
+            """
+            SELECT * FROM previous_first_orders WHERE user_id NOT IN (SELECT user_id FROM changed_users)
+            UNION ALL
+            SELECT * FROM recomputed_first_orders
+            WHERE first_order_date IS NOT NULL AND user_id IN (SELECT user_id FROM changed_users)
+            ORDER BY user_id
+            """
+        ).df()
+        rows = conn.execute("SELECT DISTINCT date FROM paid_all WHERE user_id IN (SELECT user_id FROM changed_users)").fetchall()
+        retention_dates |= {row[0] for row in rows}
+    else:
+        table = previous
+    conn.register("first_orders_frame", table)
+    conn.execute(
+        "CREATE TEMP VIEW first_orders AS "
+        "SELECT CAST(user_id AS VARCHAR) AS user_id, CAST(first_order_date AS VARCHAR) AS first_order_date FROM first_orders_frame"
+    )
+    conn.register("retention_dates", pd.DataFrame({"date": pd.Series(sorted(retention_dates), dtype="string")}))
+    conn.execute("CREATE TEMP VIEW paid_retention AS SELECT * FROM paid_all WHERE date IN (SELECT date FROM retention_dates)")
+    return (table, changed), retention_dates
+
+
+def _register_silver(
+    conn: duckdb.DuckDBPyConnection,
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None,
+) -> set[str]:
+    available: set[str] = set()
+    for entity in ("users", "products", "orders", "order_items"):
+        if silver_tables is not None:
+            frame = silver_tables[entity]
+            if frame.empty:
+                continue
+            conn.register(f"{entity}_frame", frame)
+            relation = f"{entity}_frame"
+        else:
+            relation = silver_relation_sql(settings, entity)
+            if relation is None:
+                continue
+        conn.execute(f"CREATE TEMP VIEW silver_{entity} AS SELECT * FROM {relation}")
+        available.add(entity)
+    return available
+
+
+def _create_order_views(conn: duckdb.DuckDBPyConnection, available: set[str]) -> None:
+    order_columns = {row[0] for row in conn.execute("SELECT column_name FROM (DESCRIBE silver_orders)").fetchall()}
+    is_deleted = "coalesce(TRY_CAST(is_deleted AS BOOLEAN), FALSE)" if "is_deleted" in order_columns else "FALSE"
+    conn.execute(
+        f"""
+        CREATE TEMP VIEW orders_all AS
+        SELECT
+            CAST(order_id AS VARCHAR) AS order_id,
+            CAST(user_id AS VARCHAR) AS user_id,
+            CAST(status AS VARCHAR) AS status,
+            CAST(CAST(TRY_CAST(order_ts AS TIMESTAMPTZ) AS DATE) AS VARCHAR) AS date,
+            {is_deleted} AS is_deleted
+        FROM silver_orders
+        WHERE TRY_CAST(order_ts AS TIMESTAMPTZ) IS NOT NULL
+        """
+    )
+    if "order_items" in available:
+        conn.execute(
+            """
+            CREATE TEMP VIEW items AS
+            SELECT
+                CAST(order_id AS VARCHAR) AS order_id,
+                CAST(product_id AS VARCHAR) AS product_id,
+                CAST(qty AS DOUBLE) AS qty,
+                CAST(unit_price AS DOUBLE) AS unit_price
+            FROM silver_order_items
+            """
+        )
+    if "products" in available:
+        conn.execute(
+            """
+            CREATE TEMP VIEW product_names AS
+            SELECT CAST(product_id AS VARCHAR) AS product_id, CAST(name AS VARCHAR) AS product_name FROM silver_products
+            """
+        )
+
+
+def _touched_dates(
+    conn: duckdb.DuckDBPyConnection,
+    changed_events: pd.DataFrame,
+    has_items: bool,
+    previous_orders: pd.DataFrame | None = None,
+) -> set[str]:
+    if changed_events.empty:
+        return set()
+    changed = changed_keys(changed_events)
+    for entity, keys in changed.items():
+        conn.register(f"changed_{entity}", pd.DataFrame({"key": pd.Series(sorted(keys), dtype="string")}))
+    item_orders = ""
+    if has_items:
+        item_orders = """
+            UNION
+            SELECT CAST(order_id AS VARCHAR) FROM silver_order_items
+            WHERE CAST(order_item_id AS VARCHAR) IN (SELECT key FROM changed_order_items)
+               OR CAST(product_id AS VARCHAR) IN (SELECT key FROM changed_products)
+        """
+    rows = conn.execute(
+        f"SELECT DISTINCT date FROM orders_all WHERE order_id IN (SELECT key FROM changed_orders {item_orders})"
+    ).fetchall()
+    return {row[0] for row in rows} | previous_order_dates(previous_orders, changed["orders"])
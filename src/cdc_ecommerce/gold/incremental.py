@@ -0,0 +1,61 @@
+"""Date-scoped gold maintenance."""
+from __future__ import annotations
+
+import pandas as pd
+
+from cdc_ecommerce.silver.columnar import decode_payloads
+
+DATE_KEYED_MARTS: tuple[str, ...] = (
+    "daily_gmv",
+    "orders_by_status",
+    "refund_rate",
+    "top_products",
+    "basic_retention",
+)
+
+
+def changed_keys(changed_events: pd.DataFrame) -> dict[str, set[str]]:
+    def keys(entity: str) -> pd.Series:
+        return changed_events.loc[changed_events["entity"] == entity, "pk"].astype(str)
+
+    return {
+        "orders": set(keys("orders")),
+        "order_items": set(keys("order_items")),
+        "products": _payload_keys(changed_events, "products", "name"),
+        "regions": _payload_keys(changed_events, "users", "region"),
+        "categories": _payload_keys(changed_events, "products", "category"),
+    }
+
+
+def previous_order_dates(previous_orders: pd.DataFrame | None, order_keys: set[str]) -> set[str]:
+    if previous_orders is None or previous_orders.empty or not order_keys:
+        return set()
+    moved = previous_orders[previous_orders["order_id"].astype(str).isin(order_keys)]
+    return set(pd.to_datetime(moved["order_ts"], utc=True, errors="coerce").dropna().dt.date.astype(str))
+
+
+def previous_order_users(previous_orders: pd.DataFrame | None, order_keys: set[str]) -> set[str]:
+    if previous_orders is None or previous_orders.empty or not order_keys:
+        return set()
+    moved = previous_orders[previous_orders["order_id"].astype(str).isin(order_keys)]
+    return set(moved["user_id"].dropna().astype(str))
+
+
+def _payload_keys(changed_events: pd.DataFrame, entity: str, field: str) -> set[str]:
+    events = changed_events[changed_events["entity"] == entity]
+    if events.empty:
+        return set()
+    payloads = decode_payloads(entity, events)
+    if field not in payloads.columns:
+        return set()
+    return set(events.loc[payloads[field].notna().to_numpy(), "pk"].astype(str))
+
+
+def upsert_dates(existing: pd.DataFrame, recomputed: pd.DataFrame, dates: set[str]) -> pd.DataFrame:
+    if not existing.empty:
+        existing = existing[~existing["date"].astype(str).isin(dates)]
+    frames = [frame for frame in (existing, recomputed) if not frame.empty]
+    if not frames:
+        return recomputed
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.sort_values("date", kind="stable").reset_index(drop=True)
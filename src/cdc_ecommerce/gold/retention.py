@@ -0,0 +1,76 @@
+"""Maintained first-order state for retention."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.gold.storage import write_gold_parquet
+from cdc_ecommerce.utils.io import read_parquet_or_empty
+
+FIRST_ORDER_COLUMNS: list[str] = ["user_id", "first_order_date"]
+RETENTION_COLUMNS: list[str] = ["date", "active_users", "returning_users", "retention_rate"]
+
+
+def first_orders_path(settings: Settings) -> Path:
+    return settings.gold_root / "_state" / "user_first_orders.parquet"
+
+
+def load_first_orders(settings: Settings) -> pd.DataFrame:
+    frame = read_parquet_or_empty(first_orders_path(settings))
+    if frame.empty:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in FIRST_ORDER_COLUMNS})
+    return frame
+
+
+def first_orders(paid_orders: pd.DataFrame) -> pd.DataFrame:
+    if paid_orders.empty:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in FIRST_ORDER_COLUMNS})
+    frame = paid_orders.loc[paid_orders["user_id"].notna(), ["user_id", "date"]]
+    grouped = frame.groupby(frame["user_id"].astype(str)).agg(first_order_date=("date", "min")).reset_index()
+    grouped["first_order_date"] = grouped["first_order_date"].astype(str)
+    return grouped[FIRST_ORDER_COLUMNS]
+
+
+def update_first_orders(
+    previous: pd.DataFrame,
+    affected_users: set[str],
+    affected_paid_orders: pd.DataFrame,
+) -> tuple[pd.DataFrame, set[str]]:
+    recomputed = first_orders(affected_paid_orders)
+    before = previous[previous["user_id"].isin(affected_users)].set_index("user_id")["first_order_date"]
+    after = recomputed.set_index("user_id")["first_order_date"]
+    changed = {user for user in affected_users if before.get(user) != after.get(user)}
+    if not changed:
+        return previous, changed
+    kept = previous[~previous["user_id"].isin(changed)]
+    updated = pd.concat([kept, recomputed[recomputed["user_id"].isin(changed)]], ignore_index=True)
+    return updated.sort_values("user_id", kind="stable").reset_index(drop=True), changed
+
+
+def write_first_orders(settings: Settings, state: tuple[pd.DataFrame, set[str] | None]) -> int:
+    table, changed = state
+    path = first_orders_path(settings)
+    if changed is None or changed or not path.exists():
+        write_gold_parquet(settings, table, path)
+    return int(table.shape[0])
+
+
+def basic_retention(paid_orders: pd.DataFrame, first_order_table: pd.DataFrame) -> pd.DataFrame:
+    if paid_orders.empty:
+        return pd.DataFrame(columns=RETENTION_COLUMNS)
+
+    active = paid_orders[["date", "user_id"]].drop_duplicates()
+    active = active.assign(date=active["date"].astype(str))
+    joined = active.merge(first_order_table, on="user_id", how="left")
+    joined["is_returning"] = joined["first_order_date"] < joined["date"]
+
+    grouped = joined.groupby("date", as_index=False).agg(
+        active_users=("user_id", "nunique"),
+        returning_users=("is_returning", "sum"),
+    )
+    grouped["retention_rate"] = (
+        grouped["returning_users"] / grouped["active_users"].replace(0, pd.NA)
+    ).fillna(0).round(6)
+    return grouped.sort_values("date").reset_index(drop=True)
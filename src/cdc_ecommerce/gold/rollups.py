@@ -0,0 +1,153 @@
+"""Day, ISO-week and month rollups over gold measures."""
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+
+import pandas as pd
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.gold.storage import write_gold_parquet
+from cdc_ecommerce.utils.io import parquet_row_count, read_parquet_or_empty
+
+ROLLUP_GRAINS: tuple[str, ...] = ("day", "week", "month")
+ROLLUP_COLUMNS: dict[str, list[str]] = {
+    "rollup_gmv": ["grain", "period", "region", "category", "gmv", "orders_count"],
+    "rollup_orders_by_status": ["grain", "period", "region", "status", "count"],
+    "rollup_refund_rate": ["grain", "period", "region", "refunded_orders", "paid_orders", "refund_rate"],
+}
+ROLLUP_TABLES: tuple[str, ...] = tuple(ROLLUP_COLUMNS)
+ORDER_FACT_COLUMNS: list[str] = ["date", "order_id", "status", "region"]
+LINE_FACT_COLUMNS: list[str] = ["date", "order_id", "region", "category", "line_revenue"]
+ALL = "all"
+UNKNOWN = "unknown"
+_PAID_STATUSES = ("paid", "shipped", "refunded")
+
+
+def period_keys(dates: pd.Series, grain: str) -> pd.Series:
+    days = pd.to_datetime(dates.astype(str))
+    if grain == "day":
+        return days.dt.strftime("%Y-%m-%d")
+    if grain == "week":
+        iso = days.dt.isocalendar()
+        return iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    if grain == "month":
+        return days.dt.strftime("%Y-%m")
+    raise ValueError(f"Unknown rollup grain: {grain}")
+
+
+def rollup_buckets(dates: set[str] | None) -> dict[str, set[str]] | None:
+    if dates is None:
+        return None
+    days = pd.Series(sorted(dates), dtype=object)
+    return {grain: set(period_keys(days, grain)) if dates else set() for grain in ROLLUP_GRAINS}
+
+
+def bucket_dates(buckets: dict[str, set[str]]) -> set[str]:
+    days: set[str] = set(buckets["day"])
+    for week in buckets["week"]:
+        monday = date.fromisocalendar(int(week[:4]), int(week[6:]), 1)
+        days.update((monday + timedelta(days=offset)).isoformat() for offset in range(7))
+    for month in buckets["month"]:
+        year, number = int(month[:4]), int(month[5:])
+        days.update(date(year, number, day).isoformat() for day in range(1, calendar.monthrange(year, number)[1] + 1))
+    return days
+
+
+def build_rollups(
+    order_facts: pd.DataFrame,
+    line_facts: pd.DataFrame,
+    buckets: dict[str, set[str]] | None,
+) -> dict[str, pd.DataFrame]:
+    frames: dict[str, list[pd.DataFrame]] = {name: [] for name in ROLLUP_TABLES}
+    for grain in ROLLUP_GRAINS:
+        orders = _in_grain(order_facts, grain, buckets)
+        lines = _in_grain(line_facts, grain, buckets)
+        frames["rollup_gmv"].append(_gmv_cube(lines, grain))
+        frames["rollup_orders_by_status"].append(_status_cube(orders, grain))
+        frames["rollup_refund_rate"].append(_refund_cube(orders, grain))
+    return {name: _concat(parts, ROLLUP_COLUMNS[name]) for name, parts in frames.items()}
+
+
+def write_rollup_table(settings: Settings, name: str, df: pd.DataFrame, buckets: dict[str, set[str]] | None) -> int:
+    path = settings.gold_root / f"{name}.parquet"
+    if buckets is not None:
+        if not any(buckets.values()):
+            return parquet_row_count(path)
+        existing = read_parquet_or_empty(path)
+        if not existing.empty:
+            stale = pd.Series(False, index=existing.index)
+            for grain, periods in buckets.items():
+                stale |= (existing["grain"] == grain) & existing["period"].astype(str).isin(periods)
+            existing = existing[~stale]
+        df = _concat([existing, df], ROLLUP_COLUMNS[name])
+    write_gold_parquet(settings, df, path)
+    return int(df.shape[0])
+
+
+def _in_grain(facts: pd.DataFrame, grain: str, buckets: dict[str, set[str]] | None) -> pd.DataFrame:
+    if facts.empty:
+        return facts.assign(period=pd.Series(dtype=object))
+    framed = facts.assign(period=period_keys(facts["date"], grain).to_numpy())
+    if buckets is None:
+        return framed
+    return framed[framed["period"].isin(buckets[grain])]
+
+
+def _gmv_cube(lines: pd.DataFrame, grain: str) -> pd.DataFrame:
+    parts = []
+    for dimensions in (["region", "category"], ["region"], ["category"], []):
+        if lines.empty:
+            break
+        grouped = lines.groupby(["period", *dimensions], as_index=False).agg(
+            gmv=("line_revenue", "sum"), orders_count=("order_id", "nunique")
+        )
+        parts.append(grouped)
+    return _finish(parts, grain, ROLLUP_COLUMNS["rollup_gmv"])
+
+
+def _status_cube(orders: pd.DataFrame, grain: str) -> pd.DataFrame:
+    parts = []
+    for dimensions in (["region"], []):
+        if orders.empty:
+            break
+        parts.append(orders.groupby(["period", *dimensions, "status"], as_index=False).agg(count=("order_id", "nunique")))
+    return _finish(parts, grain, ROLLUP_COLUMNS["rollup_orders_by_status"])
+
+
+def _refund_cube(orders: pd.DataFrame, grain: str) -> pd.DataFrame:
+    paid = orders[orders["status"].isin(_PAID_STATUSES)] if not orders.empty else orders
+    parts = []
+    for dimensions in (["region"], []):
+        if paid.empty:
+            break
+        grouped = paid.assign(refunded=paid["order_id"].where(paid["status"] == "refunded")).groupby(
+            ["period", *dimensions], as_index=False
+        ).agg(refunded_orders=("refunded", "nunique"), paid_orders=("order_id", "nunique"))
+        grouped["refund_rate"] = (grouped["refunded_orders"] / grouped["paid_orders"]).round(6)
+        parts.append(grouped)
+    return _finish(parts, grain, ROLLUP_COLUMNS["rollup_refund_rate"])
+
+
+def _finish(parts: list[pd.DataFrame], grain: str, columns: list[str]) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    frame = pd.concat(parts, ignore_index=True)
+    for column in ("region", "category"):
+        if column in columns:
+            frame[column] = frame[column].fillna(ALL) if column in frame.columns else ALL
+    if "gmv" in columns:
+        frame["gmv"] = frame["gmv"].round(2)
+    frame["grain"] = grain
+    return frame[columns]
+
+
+def _concat(parts: list[pd.DataFrame], columns: list[str]) -> pd.DataFrame:
+    frames = [frame for frame in parts if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    merged = pd.concat(frames, ignore_index=True)[columns]
+    order = merged["grain"].map({grain: index for index, grain in enumerate(ROLLUP_GRAINS)})
+    keys = [column for column in columns if column in ("period", "region", "category", "status")]
+    return merged.assign(_grain=order).sort_values(["_grain", *keys], kind="stable").drop(columns="_grain").reset_index(drop=True)
+
@@ -0,0 +1,100 @@
+"""HyperLogLog sketches for approximate distinct counts."""
+from __future__ import annotations
+
+import math
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cdc_ecommerce.gold.rollups import period_keys
+from cdc_ecommerce.utils.io import read_gold_table
+
+SKETCH_TABLE = "distinct_sketches"
+SKETCH_COLUMNS: list[str] = ["date", "metric", "dimension", "estimate", "sketch"]
+KEY_COLUMNS: list[str] = ["date", "metric", "dimension", "key"]
+_MIN_PRECISION = 4
+_MAX_PRECISION = 18
+
+
+def precision_for_error(error: float) -> int:
+    if not 0 < error < 1:
+        raise ValueError(f"gold_sketch_error must be between 0 and 1, got {error}")
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(precision, _MIN_PRECISION), _MAX_PRECISION)
+
+
+def hll_sketch(values: pd.Series | np.ndarray, precision: int) -> np.ndarray:
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    if len(values) == 0:
+        return registers
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object).astype(str).astype(object))
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remainder = hashes & np.uint64((1 << (64 - precision)) - 1)
+    rank = (64 - precision) - _bit_length(remainder) + 1
+    np.maximum.at(registers, index, rank.astype(np.uint8))
+    return registers
+
+
+def hll_merge(sketches: list[np.ndarray]) -> np.ndarray:
+    if len({sketch.size for sketch in sketches}) > 1:
+        raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+    return np.maximum.reduce(sketches)
+
+
+def hll_estimate(registers: np.ndarray) -> int:
+    m = registers.size
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int64))))
+    zeros = int(np.count_nonzero(registers == 0))
+    if raw <= 2.5 * m and zeros:
+        raw = m * math.log(m / zeros)
+    return int(round(raw))
+
+
+def build_sketches(keys: pd.DataFrame, error: float) -> pd.DataFrame:
+    if keys.empty:
+        return pd.DataFrame(columns=SKETCH_COLUMNS)
+    precision = precision_for_error(error)
+    frame = keys.dropna(subset=["key"]).assign(date=keys["date"].astype(str))
+    rows = []
+    for (day, metric, dimension), group in frame.groupby(["date", "metric", "dimension"], sort=True):
+        registers = hll_sketch(group["key"].to_numpy(), precision)
+        rows.append((day, metric, dimension, hll_estimate(registers), registers.tobytes()))
+    return pd.DataFrame(rows, columns=SKETCH_COLUMNS)
+
+
+def rollup_sketches(sketches: pd.DataFrame, grain: str) -> pd.DataFrame:
+    columns = ["period", "metric", "dimension", "estimate"]
+    if sketches.empty:
+        return pd.DataFrame(columns=columns)
+    frame = sketches.assign(period=period_keys(sketches["date"], grain))
+    rows = []
+    for (period, metric, dimension), group in frame.groupby(["period", "metric", "dimension"], sort=True):
+        merged = hll_merge([np.frombuffer(blob, dtype=np.uint8) for blob in group["sketch"]])
+        rows.append((period, metric, dimension, hll_estimate(merged)))
+    return pd.DataFrame(rows, columns=columns)
+
+
+def read_distinct_rollup(
+    gold_root: Path,
+    grain: str,
+    metric: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> pd.DataFrame:
+    sketches = read_gold_table(gold_root, SKETCH_TABLE, start=start, end=end)
+    if metric is not None and not sketches.empty:
+        sketches = sketches[sketches["metric"] == metric]
+    return rollup_sketches(sketches, grain)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    remaining = values.copy()
+    length = np.zeros(values.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = remaining >= np.uint64(1 << shift)
+        length += np.where(wide, shift, 0)
+        remaining = np.where(wide, remaining >> np.uint64(shift), remaining)
+    return length + (remaining > 0)
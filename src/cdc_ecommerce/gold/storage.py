@@ -0,0 +1,178 @@
+"""Gold table layout."""
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.gold.incremental import upsert_dates
+from cdc_ecommerce.utils.io import parquet_row_count, read_parquet_or_empty, write_parquet
+
+REMOVED_SUFFIX = ".removed"
+
+
+def gold_file_path(settings: Settings, name: str) -> Path:
+    return settings.gold_root / f"{name}.parquet"
+
+
+def gold_dataset_dir(settings: Settings, name: str) -> Path:
+    return settings.gold_root / name
+
+
+def gold_table_exists(settings: Settings, name: str) -> bool:
+    if settings.gold_partitioning == "none":
+        return gold_file_path(settings, name).exists()
+    return gold_dataset_dir(settings, name).is_dir()
+
+
+def partition_value(day: str, partitioning: str) -> str:
+    return day[:7] if partitioning == "month" else day
+
+
+def partition_path(settings: Settings, name: str, value: str) -> Path:
+    column = "month" if settings.gold_partitioning == "month" else "date"
+    return gold_dataset_dir(settings, name) / f"{column}={value}" / "part.parquet"
+
+
+def gold_partition_files(settings: Settings, name: str) -> list[Path]:
+    return sorted(gold_dataset_dir(settings, name).glob("*=*/part.parquet"))
+
+
+def gold_rebuild_marker(settings: Settings) -> Path:
+    return settings.gold_root / "_state" / "rebuild_required"
+
+
+def mark_gold_for_rebuild(settings: Settings) -> None:
+    marker = gold_rebuild_marker(settings)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+
+
+def gold_write_path(settings: Settings, path: Path) -> Path:
+    if settings.gold_write_root is None:
+        return path
+    return settings.gold_write_root / path.relative_to(settings.gold_root)
+
+
+def write_gold_parquet(settings: Settings, df: pd.DataFrame, path: Path) -> None:
+    write_parquet(df, gold_write_path(settings, path))
+
+
+def remove_gold_path(settings: Settings, path: Path) -> None:
+    staged = gold_write_path(settings, path)
+    _remove_path(staged)
+    if staged != path and path.exists():
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        staged.with_name(staged.name + REMOVED_SUFFIX).touch()
+
+
+def gold_staging_root(settings: Settings) -> Path:
+    return settings.gold_root.parent / f"_{settings.gold_root.name}_staging"
+
+
+def stage_gold(settings: Settings) -> Path:
+    staging = gold_staging_root(settings)
+    discard_gold_staging(staging)
+    staging.mkdir(parents=True)
+    return staging
+
+
+def promote_gold(settings: Settings, staging: Path) -> None:
+    live = settings.gold_root
+    live.mkdir(parents=True, exist_ok=True)
+    staged = sorted(staging.rglob("*"))
+    for path in staged:
+        if path.is_file() and path.name.endswith(REMOVED_SUFFIX):
+            _remove_path(live / path.relative_to(staging).with_name(path.name[: -len(REMOVED_SUFFIX)]))
+    for path in staged:
+        target = live / path.relative_to(staging)
+        if path.is_dir():
+            target.mkdir(parents=True, exist_ok=True)
+        elif not path.name.endswith(REMOVED_SUFFIX):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+    discard_gold_staging(staging)
+
+
+def discard_gold_staging(staging: Path) -> None:
+    if staging.exists():
+        shutil.rmtree(staging)
+
+
+def write_gold_table(settings: Settings, name: str, df: pd.DataFrame, dates: set[str] | None = None) -> int:
+    if settings.gold_partitioning == "none":
+        return _write_gold_file(settings, name, df, dates)
+
+    gold_write_path(settings, gold_dataset_dir(settings, name)).mkdir(parents=True, exist_ok=True)
+    layout = settings.gold_partitioning
+    values = df["date"].astype(str).map(lambda day: partition_value(day, layout)) if not df.empty else pd.Series(dtype=object)
+
+    if dates is None:
+        existing = {path.parent.name.split("=", 1)[1] for path in gold_partition_files(settings, name)}
+        touched = existing | set(values)
+    else:
+        touched = {partition_value(day, layout) for day in dates}
+
+    for value in sorted(touched):
+        path = partition_path(settings, name, value)
+        rows = df[values == value].reset_index(drop=True) if not df.empty else df
+        current = read_parquet_or_empty(path)
+        if dates is None:
+            updated = rows
+        else:
+            updated = upsert_dates(current, rows, {day for day in dates if partition_value(day, layout) == value})
+        if updated.empty:
+            remove_gold_path(settings, path.parent)
+            continue
+        if _same_rows(current, updated):
+            continue
+        write_gold_parquet(settings, updated.reset_index(drop=True), path)
+
+    remove_gold_path(settings, gold_file_path(settings, name))
+    return parquet_row_count(_visible_partition_files(settings, name))
+
+
+def _write_gold_file(settings: Settings, name: str, df: pd.DataFrame, dates: set[str] | None) -> int:
+    path = gold_file_path(settings, name)
+    if dates is not None:
+        if not dates:
+            return parquet_row_count(path)
+        df = upsert_dates(read_parquet_or_empty(path), df, dates)
+    write_gold_parquet(settings, df, path)
+    remove_gold_path(settings, gold_dataset_dir(settings, name))
+    return int(df.shape[0])
+
+
+def _visible_partition_files(settings: Settings, name: str) -> list[Path]:
+    visible = {path.parent.name: path for path in gold_partition_files(settings, name)}
+    if settings.gold_write_root is not None:
+        staged = gold_write_path(settings, gold_dataset_dir(settings, name))
+        for marker in staged.glob(f"*=*{REMOVED_SUFFIX}"):
+            visible.pop(marker.name[: -len(REMOVED_SUFFIX)], None)
+        visible.update({path.parent.name: path for path in staged.glob("*=*/part.parquet")})
+    return [visible[key] for key in sorted(visible)]
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _same_rows(current: pd.DataFrame, updated: pd.DataFrame) -> bool:
+    if current.shape != updated.shape or list(current.columns) != list(updated.columns):
+        return False
+    try:
+        pd.testing.assert_frame_equal(
+            current.reset_index(drop=True),
+            updated.reset_index(drop=True),
+            check_dtype=False,
+            check_exact=True,
+        )
+    except AssertionError:
+        return False
+    return True
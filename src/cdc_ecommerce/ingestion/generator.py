@@ -4,6 +4,7 @@ import json
 import random
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta, timezone
+from typing import Literal
 
 import pandas as pd
 
@@ -18,32 +19,67 @@ class SimulationShape:
     users_per_day_base: int = 12
     products_day_zero: int = 40
     orders_per_day_base: int = 30
+    scale: int = 1
 
 
 def users_created_on(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
-    return shape.users_per_day_base + (day_idx % 5)
+    return (shape.users_per_day_base + (day_idx % 5)) * shape.scale
 
 
 def products_created_on(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
     if day_idx == 0:
-        return shape.products_day_zero
-    return 2 + (day_idx % 3)
+        return shape.products_day_zero * shape.scale
+    return (2 + (day_idx % 3)) * shape.scale
 
 
 def orders_created_on(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
-    return shape.orders_per_day_base + ((day_idx % 7) * 4)
+    return (shape.orders_per_day_base + ((day_idx % 7) * 4)) * shape.scale
 
 
-def cumulative_users(day_idx: int) -> int:
+def cumulative_users(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
     if day_idx < 0:
         return 0
-    return sum(users_created_on(idx) for idx in range(day_idx + 1))
+    return (shape.users_per_day_base * (day_idx + 1) + _cyclic_sum(day_idx + 1, 5)) * shape.scale
 
 
-def cumulative_products(day_idx: int) -> int:
+def cumulative_products(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
     if day_idx < 0:
         return 0
-    return sum(products_created_on(idx) for idx in range(day_idx + 1))
+    return (shape.products_day_zero + 2 * day_idx + _cyclic_sum(day_idx + 1, 3)) * shape.scale
+
+
+def _cyclic_sum(days: int, period: int) -> int:
+    cycles, remainder = divmod(days, period)
+    return cycles * period * (period - 1) // 2 + remainder * (remainder - 1) // 2
+
+
+def user_updates_on(existing_users: int, shape: SimulationShape = SimulationShape()) -> int:
+    return min(max(2, existing_users // 20), 12 * shape.scale)
+
+
+def product_updates_on(existing_products: int, shape: SimulationShape = SimulationShape()) -> int:
+    return min(max(2, existing_products // 18), 10 * shape.scale)
+
+
+def user_deletes_on(day_idx: int, existing_users: int, shape: SimulationShape = SimulationShape()) -> int:
+    return shape.scale if day_idx % 6 == 0 and existing_users > 25 * shape.scale else 0
+
+
+def product_deletes_on(day_idx: int, existing_products: int, shape: SimulationShape = SimulationShape()) -> int:
+    return shape.scale if day_idx % 8 == 0 and existing_products > 45 * shape.scale else 0
+
+
+def late_order_updates_on(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
+    return min(4 * shape.scale, orders_created_on(day_idx - 1, shape)) if day_idx > 0 else 0
+
+
+def order_deletes_on(day_idx: int, shape: SimulationShape = SimulationShape()) -> int:
+    return shape.scale if day_idx % 9 == 0 and day_idx > 2 else 0
+
+
+def check_shape(shape: SimulationShape) -> None:
+    if shape.scale < 1:
+        raise ValueError(f"simulation scale must be at least 1, got {shape.scale}")
 
 
 def user_id(user_num: int) -> str:
@@ -70,7 +106,7 @@ def _to_iso(ts: datetime) -> str:
     return ts.astimezone(timezone.utc).isoformat()
 
 
-def _day_index(target: date, simulation_start_date: date) -> int:
+def day_index(target: date, simulation_start_date: date) -> int:
     idx = (target - simulation_start_date).days
     if idx < 0:
         raise ValueError(
@@ -138,7 +174,7 @@ def _emit(
             "operation": operation,
             "event_ts": event_ts,
             "pk": pk,
-            "payload": json.dumps(payload, sort_keys=True),
+            "payload": payload,
             "schema_version": schema_version,
         }
     )
@@ -150,16 +186,19 @@ def generate_cdc_batch(
     seed: int = 42,
     schema_version: int = 1,
     simulation_start_date: date = DEFAULT_SIMULATION_START_DATE,
+    payload_format: Literal["json", "dict"] = "json",
+    shape: SimulationShape = SimulationShape(),
 ) -> pd.DataFrame:
-    day_idx = _day_index(batch_date, simulation_start_date)
+    check_shape(shape)
+    day_idx = day_index(batch_date, simulation_start_date)
     rng = random.Random(seed + (day_idx * 7_919))
     events: list[dict] = []
     counter = 0
 
-    users_before = cumulative_users(day_idx - 1)
-    users_today = users_created_on(day_idx)
-    products_before = cumulative_products(day_idx - 1)
-    products_today = products_created_on(day_idx)
+    users_before = cumulative_users(day_idx - 1, shape)
+    users_today = users_created_on(day_idx, shape)
+    products_before = cumulative_products(day_idx - 1, shape)
+    products_today = products_created_on(day_idx, shape)
 
     first_user = users_before + 1
     for user_num in range(first_user, first_user + users_today):
@@ -175,9 +214,8 @@ def generate_cdc_batch(
         }
         counter = _emit(events, counter, batch_date, "users", "I", payload["user_id"], created_ts, payload, schema_version)
 
-    existing_users = cumulative_users(day_idx)
-    update_users_count = min(max(2, existing_users // 20), 12)
-    for user_num in rng.sample(range(1, existing_users + 1), k=update_users_count):
+    existing_users = cumulative_users(day_idx, shape)
+    for user_num in rng.sample(range(1, existing_users + 1), k=user_updates_on(existing_users, shape)):
         ts = _maybe_late_ts(rng, batch_date)
         payload = {
             "updated_at": _to_iso(ts),
@@ -186,7 +224,7 @@ def generate_cdc_batch(
         }
         counter = _emit(events, counter, batch_date, "users", "U", user_id(user_num), ts, payload, schema_version)
 
-    if day_idx % 6 == 0 and existing_users > 25:
+    for _ in range(user_deletes_on(day_idx, existing_users, shape)):
         user_num = rng.randint(1, existing_users)
         ts = _random_ts(rng, batch_date)
         payload = {
@@ -221,9 +259,8 @@ def generate_cdc_batch(
             schema_version,
         )
 
-    existing_products = cumulative_products(day_idx)
-    update_products_count = min(max(2, existing_products // 18), 10)
-    for product_num in rng.sample(range(1, existing_products + 1), k=update_products_count):
+    existing_products = cumulative_products(day_idx, shape)
+    for product_num in rng.sample(range(1, existing_products + 1), k=product_updates_on(existing_products, shape)):
         ts = _maybe_late_ts(rng, batch_date)
         adjustment = 1 + (rng.uniform(-0.05, 0.09))
         payload = {
@@ -232,7 +269,7 @@ def generate_cdc_batch(
         }
         counter = _emit(events, counter, batch_date, "products", "U", product_id(product_num), ts, payload, schema_version)
 
-    if day_idx % 8 == 0 and existing_products > 45:
+    for _ in range(product_deletes_on(day_idx, existing_products, shape)):
         product_num = rng.randint(1, existing_products)
         ts = _random_ts(rng, batch_date)
         payload = {
@@ -242,7 +279,7 @@ def generate_cdc_batch(
         }
         counter = _emit(events, counter, batch_date, "products", "D", product_id(product_num), ts, payload, schema_version)
 
-    order_count = orders_created_on(day_idx)
+    order_count = orders_created_on(day_idx, shape)
     for order_seq in range(order_count):
         pk = order_id(day_idx, order_seq)
         u_num = ((day_idx * 113) + (order_seq * 17)) % existing_users + 1
@@ -368,9 +405,8 @@ def generate_cdc_batch(
             )
 
     if day_idx > 0:
-        prev_day_orders = orders_created_on(day_idx - 1)
-        sample_size = min(4, prev_day_orders)
-        for seq in rng.sample(range(prev_day_orders), k=sample_size):
+        prev_day_orders = orders_created_on(day_idx - 1, shape)
+        for seq in rng.sample(range(prev_day_orders), k=late_order_updates_on(day_idx, shape)):
             pk = order_id(day_idx - 1, seq)
             ts = _maybe_late_ts(rng, batch_date)
             status = ["shipped", "cancelled", "refunded"][rng.randint(0, 2)]
@@ -398,9 +434,9 @@ def generate_cdc_batch(
                     schema_version,
                 )
 
-    if day_idx % 9 == 0 and day_idx > 2:
+    for _ in range(order_deletes_on(day_idx, shape)):
         prev_day = day_idx - 2
-        seq = rng.randint(0, orders_created_on(prev_day) - 1)
+        seq = rng.randint(0, orders_created_on(prev_day, shape) - 1)
         pk = order_id(prev_day, seq)
         ts = _random_ts(rng, batch_date)
         counter = _emit(
@@ -418,5 +454,7 @@ def generate_cdc_batch(
     df = pd.DataFrame(events)
     if df.empty:
         return df
+    if payload_format == "json":
+        df["payload"] = [json.dumps(payload, sort_keys=True) for payload in df["payload"]]
     df["event_ts"] = pd.to_datetime(df["event_ts"], utc=True)
     return df.sort_values(["event_ts", "event_id"]).reset_index(drop=True)
@@ -0,0 +1,313 @@
+"""Array-based CDC batch generator for high-volume simulations."""
+from __future__ import annotations
+
+import json
+from datetime import date
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from cdc_ecommerce.bronze.writer import ENVELOPE_COLUMNS
+from cdc_ecommerce.ingestion.generator import (
+    CATEGORIES,
+    COUNTRIES,
+    CURRENCIES,
+    DEFAULT_SIMULATION_START_DATE,
+    SimulationShape,
+    check_shape,
+    cumulative_products,
+    cumulative_users,
+    day_index,
+    late_order_updates_on,
+    order_deletes_on,
+    orders_created_on,
+    product_deletes_on,
+    product_updates_on,
+    products_created_on,
+    user_deletes_on,
+    user_updates_on,
+    users_created_on,
+)
+from cdc_ecommerce.quality.schema import PAYLOAD_COLUMN_PREFIX, payload_dtypes, payload_records, typed_payload_columns
+
+_DAY_SECONDS = 86_400
+_EPOCH = date(1970, 1, 1)
+_PAYMENT_METHODS = np.array(["card", "pix", "boleto", "paypal"], dtype=object)
+_LATE_STATUSES = np.array(["shipped", "cancelled", "refunded"], dtype=object)
+
+
+def generate_cdc_batch_vectorized(
+    batch_date: date,
+    seed: int = 42,
+    schema_version: int = 1,
+    simulation_start_date: date = DEFAULT_SIMULATION_START_DATE,
+    payload_format: Literal["json", "dict", "columns"] = "columns",
+    shape: SimulationShape = SimulationShape(),
+) -> pd.DataFrame:
+    check_shape(shape)
+    day_idx = day_index(batch_date, simulation_start_date)
+    rng = np.random.default_rng([seed, day_idx])
+    day_start = (batch_date - _EPOCH).days * _DAY_SECONDS
+
+    blocks = [
+        *_user_events(rng, day_idx, day_start, shape),
+        *_product_events(rng, day_idx, day_start, shape),
+        *_order_events(rng, day_idx, day_start, shape),
+        *_late_order_events(rng, day_idx, day_start, shape),
+    ]
+    events = pd.concat([block for block in blocks if not block.empty], ignore_index=True)
+    counters = np.arange(len(events))
+    order = np.lexsort((counters, events["event_seconds"].to_numpy()))
+    events = events.take(order).reset_index(drop=True)
+    width = max(6, len(str(len(events) - 1)))
+    events["event_id"] = np.char.add(f"{batch_date:%Y%m%d}-", _zfill(counters[order], width)).astype(object)
+    events["event_ts"] = pd.to_datetime(events.pop("event_seconds"), unit="s", utc=True)
+    events["schema_version"] = schema_version
+    payload_columns = [column for column in events.columns if column.startswith(PAYLOAD_COLUMN_PREFIX)]
+    events = events[[*ENVELOPE_COLUMNS, *payload_columns]]
+    if payload_format == "columns":
+        return events
+
+    payloads = payload_records(typed_payload_columns(events))
+    if payload_format == "json":
+        payloads = [json.dumps(payload, sort_keys=True) for payload in payloads]
+    return events[["event_id", "entity", "operation", "event_ts", "pk"]].assign(
+        payload=payloads, schema_version=schema_version
+    )
+
+
+def _user_events(
+    rng: np.random.Generator, day_idx: int, day_start: int, shape: SimulationShape
+) -> list[pd.DataFrame]:
+    existing = cumulative_users(day_idx, shape)
+    created = np.arange(existing - users_created_on(day_idx, shape) + 1, existing + 1)
+    created_ts = day_start + rng.integers(0, _DAY_SECONDS, created.size)
+    created_at = _iso(created_ts)
+    inserts = _block(
+        "users",
+        "I",
+        _ids("U", created),
+        created_ts,
+        user_id=_ids("U", created),
+        name=_ids("User ", created),
+        email=_emails(created, 0),
+        region=_pick(COUNTRIES, created),
+        created_at=created_at,
+        updated_at=created_at,
+        is_deleted=False,
+    )
+
+    updated = rng.choice(existing, size=user_updates_on(existing, shape), replace=False) + 1
+    updated_ts = _late_seconds(rng, day_start, updated.size)
+    updates = _block(
+        "users",
+        "U",
+        _ids("U", updated),
+        updated_ts,
+        updated_at=_iso(updated_ts),
+        email=_emails(updated, day_idx + 1),
+        region=_pick(COUNTRIES, updated + day_idx + 1),
+    )
+
+    deleted = rng.choice(existing, size=user_deletes_on(day_idx, existing, shape), replace=False) + 1
+    return [inserts, updates, _deletes(rng, "users", _ids("U", deleted), day_start, 0.2)]
+
+
+def _product_events(
+    rng: np.random.Generator, day_idx: int, day_start: int, shape: SimulationShape
+) -> list[pd.DataFrame]:
+    existing = cumulative_products(day_idx, shape)
+    created = np.arange(existing - products_created_on(day_idx, shape) + 1, existing + 1)
+    created_ts = day_start + rng.integers(0, _DAY_SECONDS, created.size)
+    created_at = _iso(created_ts)
+    inserts = _block(
+        "products",
+        "I",
+        _ids("P", created),
+        created_ts,
+        product_id=_ids("P", created),
+        name=_ids("Product ", created),
+        category=_pick(CATEGORIES, created),
+        price=_base_prices(created),
+        currency=_pick(CURRENCIES, created),
+        created_at=created_at,
+        updated_at=created_at,
+        is_deleted=False,
+    )
+
+    updated = rng.choice(existing, size=product_updates_on(existing, shape), replace=False) + 1
+    updated_ts = _late_seconds(rng, day_start, updated.size)
+    adjustment = 1 + rng.uniform(-0.05, 0.09, updated.size)
+    updates = _block(
+        "products",
+        "U",
+        _ids("P", updated),
+        updated_ts,
+        updated_at=_iso(updated_ts),
+        price=np.round(np.maximum(0.01, _base_prices(updated) * adjustment), 2),
+    )
+
+    deleted = rng.choice(existing, size=product_deletes_on(day_idx, existing, shape), replace=False) + 1
+    return [inserts, updates, _deletes(rng, "products", _ids("P", deleted), day_start, 0.15)]
+
+
+def _order_events(
+    rng: np.random.Generator, day_idx: int, day_start: int, shape: SimulationShape
+) -> list[pd.DataFrame]:
+    count = orders_created_on(day_idx, shape)
+    seq = np.arange(count)
+    keys = _order_keys(day_idx, seq)
+    orders = np.char.add("O", keys).astype(object)
+    payments = np.char.add("PM", keys).astype(object)
+    order_ts = day_start + rng.integers(0, _DAY_SECONDS, count)
+    users = (day_idx * 113 + seq * 17) % cumulative_users(day_idx, shape) + 1
+    order_at = _iso(order_ts)
+    inserts = _block(
+        "orders",
+        "I",
+        orders,
+        order_ts,
+        order_id=orders,
+        user_id=_ids("U", users),
+        status="created",
+        order_ts=order_at,
+        updated_at=order_at,
+        is_deleted=False,
+    )
+
+    item_counts = 1 + rng.integers(0, 3, count)
+    owner = np.repeat(seq, item_counts)
+    item_seq = np.arange(owner.size) - np.repeat(np.cumsum(item_counts) - item_counts, item_counts)
+    products = (day_idx * 41 + owner * 5 + item_seq * 3) % cumulative_products(day_idx, shape) + 1
+    qty = 1 + rng.integers(0, 4, owner.size)
+    unit_price = np.round(_base_prices(products) * (1 + (day_idx % 4) * 0.01), 2)
+    item_ts = order_ts[owner] + (item_seq + 1) * 3
+    item_ids = np.char.add(np.char.add("OI", keys[owner]), _zfill(item_seq, 2)).astype(object)
+    items = _block(
+        "order_items",
+        "I",
+        item_ids,
+        item_ts,
+        order_item_id=item_ids,
+        order_id=orders[owner],
+        product_id=_ids("P", products),
+        qty=qty,
+        unit_price=unit_price,
+        created_at=_iso(item_ts),
+    )
+    totals = np.round(np.bincount(owner, weights=qty * unit_price, minlength=count), 2)
+
+    next_ts = order_ts + (10 + rng.integers(0, 91, count)) * 60
+    paid = rng.random(count) < 0.86
+    status_roll = rng.random(count)
+    methods = _PAYMENT_METHODS[rng.integers(0, 4, count)]
+    shipped_ts = next_ts + (30 + rng.integers(0, 241, count)) * 60
+    refund_ts = _late_seconds(rng, day_start, count)
+    shipped = paid & (status_roll < 0.65)
+    refunded = paid & (status_roll >= 0.65) & (status_roll < 0.76)
+
+    payment_ts = next_ts[paid] + 120
+    payment_at = _iso(payment_ts)
+    return [
+        inserts,
+        items,
+        _status_updates("orders", orders[paid], next_ts[paid], "paid"),
+        _block(
+            "payments",
+            "I",
+            payments[paid],
+            payment_ts,
+            payment_id=payments[paid],
+            order_id=orders[paid],
+            method=methods[paid],
+            amount=totals[paid],
+            status="captured",
+            created_at=payment_at,
+            updated_at=payment_at,
+        ),
+        _status_updates("orders", orders[shipped], shipped_ts[shipped], "shipped"),
+        _status_updates("orders", orders[refunded], refund_ts[refunded], "refunded"),
+        _status_updates("payments", payments[refunded], refund_ts[refunded] + 60, "refunded"),
+        _status_updates("orders", orders[~paid], next_ts[~paid], "cancelled"),
+    ]
+
+
+def _late_order_events(
+    rng: np.random.Generator, day_idx: int, day_start: int, shape: SimulationShape
+) -> list[pd.DataFrame]:
+    blocks: list[pd.DataFrame] = []
+    late_count = late_order_updates_on(day_idx, shape)
+    if late_count:
+        seq = rng.choice(orders_created_on(day_idx - 1, shape), size=late_count, replace=False)
+        keys = _order_keys(day_idx - 1, seq)
+        late_ts = _late_seconds(rng, day_start, late_count)
+        statuses = _LATE_STATUSES[rng.integers(0, 3, late_count)]
+        refunded = statuses == "refunded"
+        orders = np.char.add("O", keys).astype(object)
+        blocks.append(_block("orders", "U", orders, late_ts, updated_at=_iso(late_ts), status=statuses))
+        payments = np.char.add("PM", keys[refunded]).astype(object)
+        blocks.append(_status_updates("payments", payments, late_ts[refunded] + 60, "refunded"))
+
+    delete_count = order_deletes_on(day_idx, shape)
+    if delete_count:
+        seq = rng.choice(orders_created_on(day_idx - 2, shape), size=delete_count, replace=False)
+        keys = _order_keys(day_idx - 2, seq)
+        blocks.append(_deletes(rng, "orders", np.char.add("O", keys).astype(object), day_start, 0.0))
+    return blocks
+
+
+def _block(entity: str, operation: str, pks: np.ndarray, seconds: np.ndarray, **payload: object) -> pd.DataFrame:
+    frame = pd.DataFrame({"entity": entity, "operation": operation, "pk": pks, "event_seconds": seconds})
+    dtypes = payload_dtypes(entity)
+    for name, values in payload.items():
+        frame[f"{PAYLOAD_COLUMN_PREFIX}{name}"] = pd.array(np.broadcast_to(values, len(frame)), dtype=dtypes[name])
+    return frame
+
+
+def _status_updates(entity: str, pks: np.ndarray, seconds: np.ndarray, status: str) -> pd.DataFrame:
+    return _block(entity, "U", pks, seconds, updated_at=_iso(seconds), status=status)
+
+
+def _deletes(
+    rng: np.random.Generator, entity: str, pks: np.ndarray, day_start: int, hard_share: float
+) -> pd.DataFrame:
+    seconds = day_start + rng.integers(0, _DAY_SECONDS, pks.size)
+    delete_mode = np.where(rng.random(pks.size) < hard_share, "hard", "soft").astype(object)
+    return _block(entity, "D", pks, seconds, updated_at=_iso(seconds), is_deleted=True, delete_mode=delete_mode)
+
+
+def _late_seconds(rng: np.random.Generator, day_start: int, size: int) -> np.ndarray:
+    late = rng.random(size) < 0.18
+    lag_days = np.where(rng.random(size) < 0.85, 1, 2)
+    return day_start - np.where(late, lag_days, 0) * _DAY_SECONDS + rng.integers(0, _DAY_SECONDS, size)
+
+
+def _iso(seconds: np.ndarray) -> np.ndarray:
+    return np.char.add(np.datetime_as_string(np.asarray(seconds).astype("datetime64[s]")), "+00:00").astype(object)
+
+
+def _ids(prefix: str, numbers: np.ndarray) -> np.ndarray:
+    return np.char.add(prefix, _zfill(numbers, 6)).astype(object)
+
+
+def _order_keys(day_idx: int, seq: np.ndarray) -> np.ndarray:
+    return np.char.add(f"{day_idx:04d}", _zfill(seq, 4))
+
+
+def _zfill(numbers: np.ndarray, width: int) -> np.ndarray:
+    digits = np.asarray(numbers).astype(str)
+    return np.char.zfill(digits, width) if digits.size else digits
+
+
+def _emails(numbers: np.ndarray, rev: int) -> np.ndarray:
+    suffix = "" if rev == 0 else f".r{rev}"
+    return np.char.add(np.char.add("user", _zfill(numbers, 6)), f"{suffix}@example.com").astype(object)
+
+
+def _pick(values: list[str], numbers: np.ndarray) -> np.ndarray:
+    return np.array(values, dtype=object)[numbers % len(values)]
+
+
+def _base_prices(numbers: np.ndarray) -> np.ndarray:
+    return np.round(7 + ((numbers * 19) % 400) + ((numbers % 7) * 0.49), 2)
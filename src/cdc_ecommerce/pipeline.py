@@ -1,63 +1,130 @@
 from __future__ import annotations
 
-import json
 import time
-from datetime import date, datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import replace
+from datetime import date, datetime, timedelta, timezone
+from itertools import repeat
 
-from cdc_ecommerce.bronze.writer import write_bronze_batch
+import numpy as np
+import pandas as pd
+
+from cdc_ecommerce.bronze.writer import bronze_batch_files, new_batch_id, typed_bronze_events, write_bronze_batch
 from cdc_ecommerce.config import Settings, get_settings
-from cdc_ecommerce.gold.builder import build_gold
-from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.gold.builder import run_gold
+from cdc_ecommerce.gold.storage import discard_gold_staging, mark_gold_for_rebuild, promote_gold, stage_gold
+from cdc_ecommerce.ingestion.generator import SimulationShape, generate_cdc_batch
+from cdc_ecommerce.ingestion.vectorized import generate_cdc_batch_vectorized
 from cdc_ecommerce.quality.checks import run_quality_checks
-from cdc_ecommerce.silver.merge import SilverMerger
-from cdc_ecommerce.utils.io import read_parquet_or_empty
+from cdc_ecommerce.silver.merge import ENTITIES, SilverMerger, migrate_legacy_ledger
+from cdc_ecommerce.silver.resident import (
+    ResidentSilverMerger,
+    checkpoint_batch_id,
+    clear_checkpoint,
+    read_checkpoint,
+    write_checkpoint,
+)
+from cdc_ecommerce.silver.storage import ensure_silver_layout, load_silver_rows, silver_table_files
+from cdc_ecommerce.utils.io import read_parquet_files
 from cdc_ecommerce.utils.logging import get_logger
+from cdc_ecommerce.utils.metrics_store import upsert_run_metrics
 
 logger = get_logger(__name__)
 
 
-def run_pipeline_for_date(run_date: date, settings: Settings | None = None) -> dict:
+def run_pipeline_for_date(
+    run_date: date,
+    settings: Settings | None = None,
+    silver_merger: SilverMerger | None = None,
+    full_quality_check: bool = False,
+) -> dict:
+    cfg = settings or get_settings()
+    ensure_silver_layout(cfg)
+    migrate_legacy_ledger(cfg)
+    return run_pipeline_for_window([run_date], cfg, silver_merger, full_quality_check)[0]
+
+
+def run_pipeline_for_window(
+    run_dates: list[date],
+    settings: Settings | None = None,
+    silver_merger: SilverMerger | None = None,
+    full_quality_check: bool = False,
+    bronze_batch_id: str | None = None,
+) -> list[dict]:
     cfg = settings or get_settings()
     started = time.perf_counter()
+    batch_id = bronze_batch_id or new_batch_id()
 
-    events_df = generate_cdc_batch(
-        run_date,
-        seed=cfg.seed,
-        schema_version=cfg.schema_version,
-        simulation_start_date=cfg.simulation_start_date,
-    )
-    bronze_path = write_bronze_batch(events_df, cfg, run_date)
+    day_events: list[pd.DataFrame] = []
+    bronze_paths = []
+    for run_date in run_dates:
+        events_df = _generate_events(run_date, cfg)
+        bronze_paths.append(write_bronze_batch(events_df, cfg, run_date, batch_id))
+        day_events.append(events_df)
+    window_events = day_events[0] if len(day_events) == 1 else pd.concat(day_events, ignore_index=True)
+    arrival = None
+    if len(day_events) > 1:
+        arrival = pd.Series(np.repeat(np.arange(len(day_events)), [len(events) for events in day_events]))
 
-    silver_merger = SilverMerger(cfg)
-    silver_merge_metrics = silver_merger.merge_events(events_df)
+    silver_merger = silver_merger or SilverMerger(cfg)
+    previous_orders = _previous_orders(cfg, silver_merger, window_events) if cfg.gold_incremental else None
+    silver_merge_metrics = silver_merger.merge_events(window_events, arrival)
+    silver_tables = silver_merger.tables if isinstance(silver_merger, ResidentSilverMerger) else None
+    daily_counts = _attribute_processed_events(day_events, silver_merge_metrics["processed_event_ids"])
 
-    gold_row_counts = build_gold(cfg)
-    silver_row_counts = run_quality_checks(cfg, silver_merge_metrics["processed_events_count"])
+    changed_events = window_events[window_events["event_id"].isin(silver_merge_metrics["processed_event_ids"])]
+    staging = stage_gold(cfg)
+    with ThreadPoolExecutor(max_workers=max(1, cfg.post_merge_workers)) as pool:
+        gold_future = pool.submit(
+            run_gold,
+            replace(cfg, gold_write_root=staging),
+            silver_tables,
+            changed_events if cfg.gold_incremental else None,
+            previous_orders,
+        )
+        quality_future = pool.submit(run_quality_checks, cfg, daily_counts, silver_tables, changed_events, full_quality_check)
+        wait([gold_future, quality_future])
+    try:
+        silver_row_counts = quality_future.result()
+        gold_row_counts, gold_node_seconds = gold_future.result()
+    except Exception:
+        discard_gold_staging(staging)
+        mark_gold_for_rebuild(cfg)
+        raise
+    promote_gold(cfg, staging)
 
     finished = datetime.now(timezone.utc)
-    runtime_seconds = round(time.perf_counter() - started, 4)
+    runtime_seconds = round((time.perf_counter() - started) / len(run_dates), 4)
 
     freshness = {
-        "silver": _silver_freshness_iso(cfg),
+        "silver": _silver_freshness_iso(cfg, silver_tables),
         "gold": finished.isoformat(),
     }
 
-    metrics = {
-        "run_date": run_date.isoformat(),
-        "processed_events_count": int(silver_merge_metrics["processed_events_count"]),
-        "runtime_seconds": runtime_seconds,
-        "output_row_counts": {
-            "silver": silver_row_counts,
-            "gold": gold_row_counts,
-        },
-        "freshness": freshness,
-        "bronze_batch_path": str(bronze_path),
-        "finished_at": finished.isoformat(),
-    }
+    outputs: list[dict] = []
+    for run_date, processed_events_count, bronze_path in zip(run_dates, daily_counts, bronze_paths):
+        metrics = {
+            "run_date": run_date.isoformat(),
+            "processed_events_count": processed_events_count,
+            "runtime_seconds": runtime_seconds,
+            "output_row_counts": {
+                "silver": silver_row_counts,
+                "gold": gold_row_counts,
+            },
+            "gold_node_seconds": gold_node_seconds,
+            "freshness": freshness,
+            "bronze_batch_path": str(bronze_path),
+            "bronze_batch_files": [str(path) for path in bronze_batch_files(cfg, run_date, batch_id)],
+            "bronze_batch_id": batch_id,
+            "finished_at": finished.isoformat(),
+        }
+        if len(run_dates) > 1:
+            metrics["batch_window"] = {"start": run_dates[0].isoformat(), "end": run_dates[-1].isoformat()}
 
-    _write_metrics(cfg, metrics)
-    logger.info("pipeline_run_completed", extra=metrics)
-    return metrics
+        _write_metrics(cfg, metrics)
+        logger.info("pipeline_run_completed", extra=metrics)
+        outputs.append(metrics)
+    return outputs
 
 
 def backfill(start: date, end: date, settings: Settings | None = None) -> list[dict]:
@@ -65,21 +132,137 @@ def backfill(start: date, end: date, settings: Settings | None = None) -> list[d
         raise ValueError("end date must be greater than or equal to start date")
 
     cfg = settings or get_settings()
-    current = start
+    if cfg.backfill_batch_days < 1:
+        raise ValueError("backfill_batch_days must be at least 1")
+    ensure_silver_layout(cfg)
+    migrate_legacy_ledger(cfg)
+    if cfg.backfill_resident_silver:
+        return _resident_backfill(start, end, cfg)
+
+    outputs: list[dict] = []
+    for window in _windows(start, end, cfg.backfill_batch_days):
+        outputs.extend(run_pipeline_for_window(window, cfg, full_quality_check=window[-1] == end))
+    return outputs
+
+
+def generate_range(start: date, end: date, settings: Settings | None = None, workers: int = 1) -> list[dict]:
+    if end < start:
+        raise ValueError("end date must be greater than or equal to start date")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    cfg = settings or get_settings()
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    if workers == 1 or len(days) == 1:
+        return [_generate_bronze_day(run_date, cfg) for run_date in days]
+    with ProcessPoolExecutor(max_workers=min(workers, len(days))) as pool:
+        return list(pool.map(_generate_bronze_day, days, repeat(cfg)))
+
+
+def _generate_bronze_day(run_date: date, settings: Settings) -> dict:
+    events_df = _generate_events(run_date, settings)
+    batch_id = new_batch_id()
+    return {
+        "run_date": run_date.isoformat(),
+        "events_count": int(events_df.shape[0]),
+        "bronze_batch_path": str(write_bronze_batch(events_df, settings, run_date, batch_id)),
+        "bronze_batch_files": [str(path) for path in bronze_batch_files(settings, run_date, batch_id)],
+    }
+
+
+def _resident_backfill(start: date, end: date, settings: Settings) -> list[dict]:
+    flushed_through = read_checkpoint(settings, start, end)
+    batch_id = checkpoint_batch_id(settings, start, end)
+    if flushed_through is None or batch_id is None:
+        flushed_through = flushed_through or start - timedelta(days=1)
+        batch_id = new_batch_id()
+        write_checkpoint(settings, start, end, flushed_through, batch_id)
+    else:
+        logger.info("backfill_resumed", extra={"flushed_through": flushed_through.isoformat(), "bronze_batch_id": batch_id})
+    resume_from = flushed_through + timedelta(days=1)
+
+    merger = ResidentSilverMerger(settings)
     outputs: list[dict] = []
-    while current <= end:
-        outputs.append(run_pipeline_for_date(current, cfg))
-        current = current.fromordinal(current.toordinal() + 1)
+    days_since_flush = 0
+    for window in _windows(resume_from, end, settings.backfill_batch_days):
+        outputs.extend(
+            run_pipeline_for_window(
+                window, settings, merger, full_quality_check=window[-1] == end, bronze_batch_id=batch_id
+            )
+        )
+        days_since_flush += len(window)
+        if days_since_flush >= settings.backfill_checkpoint_days and window[-1] < end:
+            merger.flush()
+            write_checkpoint(settings, start, end, window[-1], batch_id)
+            days_since_flush = 0
+
+    merger.flush()
+    clear_checkpoint(settings)
     return outputs
 
 
-def _silver_freshness_iso(settings: Settings) -> str | None:
+def _windows(start: date, end: date, batch_days: int) -> list[list[date]]:
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    return [days[offset : offset + batch_days] for offset in range(0, len(days), batch_days)]
+
+
+def _generate_events(run_date: date, settings: Settings) -> pd.DataFrame:
+    shape = SimulationShape(scale=settings.generator_scale)
+    if settings.generator_mode == "vectorized":
+        return generate_cdc_batch_vectorized(
+            run_date,
+            seed=settings.seed,
+            schema_version=settings.schema_version,
+            simulation_start_date=settings.simulation_start_date,
+            payload_format="columns" if settings.bronze_format == "typed" else "json",
+            shape=shape,
+        )
+    if settings.generator_mode != "python":
+        raise ValueError(f"Unknown generator mode: {settings.generator_mode}")
+    events_df = generate_cdc_batch(
+        run_date,
+        seed=settings.seed,
+        schema_version=settings.schema_version,
+        simulation_start_date=settings.simulation_start_date,
+        payload_format="dict" if settings.bronze_format == "typed" else "json",
+        shape=shape,
+    )
+    if settings.bronze_format == "typed":
+        events_df = typed_bronze_events(events_df)
+    return events_df
+
+
+def _previous_orders(settings: Settings, silver_merger: SilverMerger, events: pd.DataFrame) -> pd.DataFrame:
+    updated = events.loc[(events["entity"] == "orders") & (events["operation"] == "U"), "pk"].astype(str).drop_duplicates()
+    if isinstance(silver_merger, ResidentSilverMerger):
+        orders = silver_merger.tables["orders"]
+        rows = orders[orders["order_id"].astype(str).isin(updated)] if not orders.empty else orders
+    else:
+        rows = load_silver_rows(settings, "orders", updated)
+    if rows.empty:
+        return pd.DataFrame(columns=["order_id", "user_id", "order_ts"])
+    return rows[["order_id", "user_id", "order_ts"]].reset_index(drop=True)
+
+
+def _attribute_processed_events(day_events: list[pd.DataFrame], processed_event_ids: pd.Series) -> list[int]:
+    remaining = set(processed_event_ids.astype(str))
+    counts: list[int] = []
+    for events_df in day_events:
+        day_ids = set(events_df["event_id"].astype(str)) if not events_df.empty else set()
+        claimed = day_ids & remaining
+        counts.append(len(claimed))
+        remaining -= claimed
+    return counts
+
+
+def _silver_freshness_iso(settings: Settings, silver_tables: dict[str, pd.DataFrame] | None = None) -> str | None:
     latest = None
-    for path in settings.silver_root.glob("*.parquet"):
-        if path.name.startswith("_"):
-            continue
+    for entity in ENTITIES:
         try:
-            frame = read_parquet_or_empty(path)
+            if silver_tables is not None:
+                frame = silver_tables[entity]
+            else:
+                frame = read_parquet_files(silver_table_files(settings, entity), columns=["_last_event_ts"])
         except Exception:
             continue
         if frame.empty or "_last_event_ts" not in frame.columns:
@@ -94,7 +277,4 @@ def _silver_freshness_iso(settings: Settings) -> str | None:
 
 
 def _write_metrics(settings: Settings, payload: dict) -> None:
-    settings.metrics_root.mkdir(parents=True, exist_ok=True)
-    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
-    path = settings.metrics_root / f"run_{payload['run_date']}_{stamp}.json"
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    upsert_run_metrics(settings.metrics_root, payload)
@@ -1,77 +1,204 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
+import duckdb
 import pandas as pd
 
 from cdc_ecommerce.config import Settings
-from cdc_ecommerce.silver.merge import ENTITIES
-from cdc_ecommerce.utils.io import read_parquet_or_empty
-
-
-def run_quality_checks(settings: Settings, processed_events_count: int) -> dict[str, int]:
-    silver_tables = {entity: read_parquet_or_empty(settings.silver_root / f"{entity}.parquet") for entity in ENTITIES}
-
+from cdc_ecommerce.quality.key_index import (
+    INDEXED_ENTITIES,
+    extend_key_index,
+    full_check_marker,
+    key_index_exists,
+    key_index_relation,
+    rebuild_key_index,
+    record_quality_run,
+    require_full_check,
+    runs_since_full_check,
+)
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK
+from cdc_ecommerce.silver.storage import silver_relation_sql, silver_row_count
+from cdc_ecommerce.utils.io import connect_duckdb
+from cdc_ecommerce.utils.metrics_store import recent_processed_counts
+
+CHECK_COLUMNS: dict[str, tuple[str, ...]] = {
+    "users": ("user_id",),
+    "products": ("product_id",),
+    "orders": ("order_id", "user_id"),
+    "order_items": ("order_item_id", "order_id", "product_id", "qty", "unit_price"),
+    "payments": ("payment_id", "amount"),
+}
+FOREIGN_KEYS: tuple[tuple[str, str, str], ...] = (
+    ("orders", "user_id", "users"),
+    ("order_items", "order_id", "orders"),
+    ("order_items", "product_id", "products"),
+)
+RANGE_CHECKS: tuple[tuple[str, str, str], ...] = (
+    ("order_items", "order_items.qty must be positive", "coalesce(TRY_CAST(qty AS DOUBLE), 0) <= 0"),
+    ("order_items", "order_items.unit_price must be non-negative", "coalesce(TRY_CAST(unit_price AS DOUBLE), 0) < 0"),
+    ("payments", "payments.amount must be non-negative", "coalesce(TRY_CAST(amount AS DOUBLE), 0) < 0"),
+)
+
+
+def run_quality_checks(
+    settings: Settings,
+    processed_events_count: int | list[int],
+    silver_tables: dict[str, pd.DataFrame] | None = None,
+    changed_events: pd.DataFrame | None = None,
+    full_check: bool = False,
+) -> dict[str, int]:
+    if settings.quality_mode not in ("full", "incremental"):
+        raise ValueError(f"Unknown quality mode: {settings.quality_mode}")
+    incremental = settings.quality_mode == "incremental"
+    if incremental and not full_check:
+        full_check = changed_events is None or not key_index_exists(settings) or _full_check_due(settings)
+
+    row_counts = {
+        entity: int(silver_tables[entity].shape[0]) if silver_tables is not None else silver_row_count(settings, entity)
+        for entity in ENTITIES
+    }
     for entity in ("users", "products", "orders"):
-        if silver_tables[entity].empty:
+        if row_counts[entity] == 0:
             raise ValueError(f"Quality check failed: {entity} current-state table is empty")
 
-    users = silver_tables["users"]
-    products = silver_tables["products"]
-    orders = silver_tables["orders"]
-    order_items = silver_tables["order_items"]
-    payments = silver_tables["payments"]
-
-    if not orders.empty and not users.empty:
-        missing_users = set(orders["user_id"].dropna().astype(str)) - set(users["user_id"].dropna().astype(str))
-        if missing_users:
-            raise ValueError(f"Quality check failed: orders reference missing users ({len(missing_users)} keys)")
-
-    if not order_items.empty:
-        missing_orders = set(order_items["order_id"].dropna().astype(str)) - set(orders["order_id"].dropna().astype(str))
-        if missing_orders:
-            raise ValueError(f"Quality check failed: order_items reference missing orders ({len(missing_orders)} keys)")
-
-        missing_products = set(order_items["product_id"].dropna().astype(str)) - set(products["product_id"].dropna().astype(str))
-        if missing_products:
-            raise ValueError(f"Quality check failed: order_items reference missing products ({len(missing_products)} keys)")
-
-        if (order_items["qty"].fillna(0) <= 0).any():
-            raise ValueError("Quality check failed: order_items.qty must be positive")
-
-        if (order_items["unit_price"].fillna(0) < 0).any():
-            raise ValueError("Quality check failed: order_items.unit_price must be non-negative")
-
-    if not payments.empty and (payments["amount"].fillna(0) < 0).any():
-        raise ValueError("Quality check failed: payments.amount must be non-negative")
-
-    _volume_anomaly_check(settings.metrics_root, processed_events_count)
-
-    return {entity: int(df.shape[0]) for entity, df in silver_tables.items()}
+    conn = connect_duckdb(settings.duckdb_memory_limit, settings.data_root / ".duckdb_tmp" / "quality")
+    try:
+        available = _register_silver(conn, settings, silver_tables)
+        if incremental and not full_check:
+            _register_changed_scope(conn, settings, available, changed_events)
+        else:
+            _register_full_scope(conn, available)
+
+        for name, (failures, sample) in _run_checks(conn, available, settings.quality_sample_size).items():
+            if failures:
+                if incremental:
+                    require_full_check(settings)
+                raise ValueError(f"Quality check failed: {name} ({failures} keys, sample: {', '.join(sample)})")
+
+        if incremental:
+            if full_check:
+                rebuild_key_index(conn, settings)
+            else:
+                extend_key_index(conn, settings)
+            record_quality_run(settings, full_check)
+    finally:
+        conn.close()
+
+    daily_counts = processed_events_count if isinstance(processed_events_count, list) else [processed_events_count]
+    _volume_anomaly_check(settings.metrics_root, daily_counts)
+
+    return row_counts
+
+
+def _full_check_due(settings: Settings) -> bool:
+    if full_check_marker(settings).exists():
+        return True
+    every = settings.quality_full_check_every
+    return every > 0 and runs_since_full_check(settings) + 1 >= every
+
+
+def _register_silver(
+    conn: duckdb.DuckDBPyConnection,
+    settings: Settings,
+    silver_tables: dict[str, pd.DataFrame] | None,
+) -> set[str]:
+    available: set[str] = set()
+    for entity in ENTITIES:
+        if silver_tables is not None:
+            frame = silver_tables[entity]
+            if frame.empty:
+                continue
+            conn.register(f"{entity}_frame", frame[[column for column in CHECK_COLUMNS[entity] if column in frame.columns]])
+            relation = f"{entity}_frame"
+        else:
+            relation = silver_relation_sql(settings, entity)
+            if relation is None:
+                continue
+        conn.execute(f"CREATE TEMP VIEW silver_{entity} AS SELECT * FROM {relation}")
+        available.add(entity)
+    return available
+
+
+def _register_full_scope(conn: duckdb.DuckDBPyConnection, available: set[str]) -> None:
+    for entity in available:
+        conn.execute(f"CREATE TEMP VIEW scope_{entity} AS SELECT * FROM silver_{entity}")
+        conn.execute(f"CREATE TEMP VIEW keys_{entity} AS SELECT CAST({ENTITY_PK[entity]} AS VARCHAR) AS key FROM silver_{entity}")
+
+
+def _register_changed_scope(
+    conn: duckdb.DuckDBPyConnection,
+    settings: Settings,
+    available: set[str],
+    changed_events: pd.DataFrame,
+) -> None:
+    for entity in ENTITIES:
+        keys = changed_events.loc[changed_events["entity"] == entity, "pk"].astype(str).drop_duplicates()
+        conn.register(f"changed_{entity}", pd.DataFrame({"key": pd.Series(keys.to_numpy(), dtype="string")}))
+    for entity in available:
+        pk = ENTITY_PK[entity]
+        conn.execute(
+            f"CREATE TEMP VIEW scope_{entity} AS "
+            f"SELECT * FROM silver_{entity} WHERE CAST({pk} AS VARCHAR) IN (SELECT key FROM changed_{entity})"
+        )
+        if entity in INDEXED_ENTITIES:
+            conn.execute(
+                f"CREATE TEMP VIEW keys_{entity} AS "
+                f"SELECT key FROM {key_index_relation(settings, entity)} UNION ALL SELECT key FROM changed_{entity}"
+            )
+
+
+def _run_checks(conn: duckdb.DuckDBPyConnection, available: set[str], sample_size: int) -> dict[str, tuple[int, list[str]]]:
+    names: list[str] = []
+    queries: list[str] = []
+    for child, column, parent in FOREIGN_KEYS:
+        if child not in available or parent not in available:
+            continue
+        names.append(f"{child} reference missing {parent}")
+        queries.append(
+            f"""
+            SELECT '{child} reference missing {parent}', count(*), list(key ORDER BY key)[1:{sample_size}]
+            FROM (
+                SELECT DISTINCT CAST(c.{column} AS VARCHAR) AS key
+                FROM scope_{child} c
+                ANTI JOIN keys_{parent} p ON p.key = CAST(c.{column} AS VARCHAR)
+                WHERE c.{column} IS NOT NULL
+            )
+            """
+        )
+    for entity, name, predicate in RANGE_CHECKS:
+        if entity not in available:
+            continue
+        names.append(name)
+        queries.append(
+            f"""
+            SELECT '{name}', count(*), list(key ORDER BY key)[1:{sample_size}]
+            FROM (SELECT CAST({ENTITY_PK[entity]} AS VARCHAR) AS key FROM scope_{entity} WHERE {predicate})
+            """
+        )
+    if not queries:
+        return {}
+    rows = conn.execute(" UNION ALL ".join(queries)).fetchall()
+    found = {name: (int(failures), list(sample or [])) for name, failures, sample in rows}
+    return {name: found[name] for name in names}
 
 
-def _volume_anomaly_check(metrics_root: Path, processed_events_count: int) -> None:
-    if processed_events_count == 0:
+def _volume_anomaly_check(metrics_root: Path, daily_counts: list[int]) -> None:
+    if not any(daily_counts):
         return
 
-    metrics_root.mkdir(parents=True, exist_ok=True)
-    history = []
-    for path in sorted(metrics_root.glob("run_*.json"))[-10:]:
-        try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-            history.append(int(payload.get("processed_events_count", 0)))
-        except Exception:
-            continue
-
-    if len(history) < 3:
-        return
+    history = recent_processed_counts(metrics_root, 10)
 
-    avg = sum(history) / len(history)
-    upper = avg * 3.0
-    lower = max(1.0, avg * 0.25)
-    if processed_events_count > upper or processed_events_count < lower:
-        raise ValueError(
-            "Quality check failed: processed event volume outside expected range "
-            f"(count={processed_events_count}, lower={lower:.2f}, upper={upper:.2f})"
-        )
+    for processed_events_count in daily_counts:
+        if processed_events_count == 0:
+            continue
+        if len(history) >= 3:
+            avg = sum(history[-10:]) / len(history[-10:])
+            upper = avg * 3.0
+            lower = max(1.0, avg * 0.25)
+            if processed_events_count > upper or processed_events_count < lower:
+                raise ValueError(
+                    "Quality check failed: processed event volume outside expected range "
+                    f"(count={processed_events_count}, lower={lower:.2f}, upper={upper:.2f})"
+                )
+        history.append(processed_events_count)
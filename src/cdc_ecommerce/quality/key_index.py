@@ -0,0 +1,79 @@
+"""Maintained key index for incremental quality checks."""
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import duckdb
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.utils.io import copy_query_to_parquet, ensure_parent
+
+INDEXED_ENTITIES: tuple[str, ...] = ("users", "products", "orders")
+
+
+def key_index_root(settings: Settings) -> Path:
+    return settings.silver_root / "_quality"
+
+
+def key_index_dir(settings: Settings, entity: str) -> Path:
+    return key_index_root(settings) / f"keys_{entity}"
+
+
+def key_index_files(settings: Settings, entity: str) -> list[Path]:
+    return sorted(key_index_dir(settings, entity).glob("part-*.parquet"))
+
+
+def key_index_exists(settings: Settings) -> bool:
+    return all(key_index_files(settings, entity) for entity in INDEXED_ENTITIES)
+
+
+def key_index_relation(settings: Settings, entity: str) -> str:
+    paths = ", ".join("'" + path.as_posix().replace("'", "''") + "'" for path in key_index_files(settings, entity))
+    return f"read_parquet([{paths}])"
+
+
+def rebuild_key_index(conn: duckdb.DuckDBPyConnection, settings: Settings) -> None:
+    for entity in INDEXED_ENTITIES:
+        directory = key_index_dir(settings, entity)
+        if directory.exists():
+            shutil.rmtree(directory)
+        copy_query_to_parquet(conn, f"SELECT DISTINCT key FROM keys_{entity}", directory / "part-000000.parquet")
+
+
+def extend_key_index(conn: duckdb.DuckDBPyConnection, settings: Settings) -> None:
+    for entity in INDEXED_ENTITIES:
+        new_keys = f"SELECT DISTINCT key FROM changed_{entity} ANTI JOIN {key_index_relation(settings, entity)} USING (key)"
+        if conn.execute(f"SELECT count(*) FROM ({new_keys})").fetchone()[0] == 0:
+            continue
+        part = len(key_index_files(settings, entity))
+        copy_query_to_parquet(conn, new_keys, key_index_dir(settings, entity) / f"part-{part:06d}.parquet")
+
+
+def full_check_marker(settings: Settings) -> Path:
+    return key_index_root(settings) / "full_check_required"
+
+
+def require_full_check(settings: Settings) -> None:
+    marker = full_check_marker(settings)
+    ensure_parent(marker)
+    marker.touch()
+
+
+def runs_since_full_check(settings: Settings) -> int:
+    path = key_index_root(settings) / "state.json"
+    if not path.exists():
+        return 0
+    return int(json.loads(path.read_text(encoding="utf-8")).get("runs_since_full_check", 0))
+
+
+def record_quality_run(settings: Settings, full_check: bool) -> None:
+    path = key_index_root(settings) / "state.json"
+    ensure_parent(path)
+    runs = 0 if full_check else runs_since_full_check(settings) + 1
+    if full_check:
+        full_check_marker(settings).unlink(missing_ok=True)
+    tmp_path = path.with_suffix(".tmp.json")
+    tmp_path.write_text(json.dumps({"runs_since_full_check": runs}), encoding="utf-8")
+    tmp_path.replace(path)
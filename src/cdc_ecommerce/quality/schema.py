@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Literal
+from functools import lru_cache
+from typing import Any, Literal, Union, get_args, get_origin
 
-from pydantic import BaseModel, ConfigDict, Field, ValidationError
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 
 Entity = Literal["users", "products", "orders", "order_items", "payments"]
 Operation = Literal["I", "U", "D"]
 
+PAYLOAD_COLUMN_PREFIX = "payload_"
+
 
 class StrictModel(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -130,3 +134,79 @@ def validate_payload(entity: Entity, operation: Operation, payload_raw: str | di
         return DeletePayload(**payload).model_dump(exclude_none=True)
     except (ValidationError, ValueError) as exc:
         raise ValueError(f"Invalid payload for entity={entity}, operation={operation}: {exc}") from exc
+
+
+def validate_payloads(entity: Entity, operation: Operation, payloads: pd.Series | pd.DataFrame) -> pd.DataFrame:
+    if payloads.empty:
+        return pd.DataFrame(index=payloads.index)
+    rows = payload_records(payloads) if isinstance(payloads, pd.DataFrame) else list(payloads)
+    if operation == "U" and entity == "order_items":
+        return _raise_first_invalid(entity, operation, rows)
+
+    model = _payload_model(entity, operation)
+    adapter = _list_adapter(model)
+    try:
+        if all(isinstance(raw, str) for raw in rows):
+            validated = adapter.validate_json("[" + ",".join(rows) + "]")
+        else:
+            validated = adapter.validate_python([json.loads(raw) if isinstance(raw, str) else raw for raw in rows])
+    except ValidationError:
+        return _raise_first_invalid(entity, operation, rows)
+
+    records = adapter.dump_python(validated, exclude_none=operation != "I")
+    frame = pd.DataFrame.from_records(records, index=payloads.index, columns=list(model.model_fields))
+    frame = frame.dropna(axis=1, how="all") if operation != "I" else frame
+    dtypes = payload_dtypes(entity)
+    return frame.astype({name: dtypes[name] for name in frame.columns})
+
+
+def typed_payload_columns(events: pd.DataFrame) -> pd.DataFrame:
+    columns = [column for column in events.columns if column.startswith(PAYLOAD_COLUMN_PREFIX)]
+    return events[columns].rename(columns=lambda column: column[len(PAYLOAD_COLUMN_PREFIX) :])
+
+
+def payload_records(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    return [{key: value for key, value in row.items() if not pd.isna(value)} for row in frame.to_dict(orient="records")]
+
+
+def payload_field_types(entity: Entity) -> dict[str, type]:
+    field_types: dict[str, type] = {}
+    for model in (_INSERT_MODELS[entity], _UPDATE_MODELS[entity], DeletePayload):
+        for name, field in model.model_fields.items():
+            field_types.setdefault(name, _scalar_type(field.annotation))
+    return field_types
+
+
+def payload_dtypes(entity: Entity) -> dict[str, str]:
+    return {name: _PANDAS_DTYPES[field_type] for name, field_type in payload_field_types(entity).items()}
+
+
+def _scalar_type(annotation: Any) -> type:
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return type(get_args(annotation)[0])
+    if origin is Union or (origin is not None and type(None) in get_args(annotation)):
+        return _scalar_type(next(arg for arg in get_args(annotation) if arg is not type(None)))
+    return annotation
+
+
+_PANDAS_DTYPES: dict[type, str] = {str: "object", bool: "boolean", int: "Int64", float: "Float64"}
+
+
+def _payload_model(entity: Entity, operation: Operation) -> type[BaseModel]:
+    if operation == "I":
+        return _INSERT_MODELS[entity]
+    if operation == "U":
+        return _UPDATE_MODELS[entity]
+    return DeletePayload
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def _raise_first_invalid(entity: Entity, operation: Operation, rows: list[str | dict[str, Any]]) -> pd.DataFrame:
+    for raw in rows:
+        validate_payload(entity, operation, raw)
+    raise ValueError(f"Invalid payload for entity={entity}, operation={operation}")
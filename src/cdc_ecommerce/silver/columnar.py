@@ -0,0 +1,94 @@
+"""Columnar silver merge engine."""
+from __future__ import annotations
+
+import pandas as pd
+
+from cdc_ecommerce.quality.schema import Entity, typed_payload_columns, validate_payloads
+
+TIMESTAMP_COLUMNS: tuple[str, ...] = ("created_at", "updated_at", "order_ts", "_last_event_ts")
+BOOKKEEPING_COLUMNS: tuple[str, ...] = ("_last_event_ts", "_last_event_id", "_schema_version")
+
+
+def apply_entity_events_columnar(
+    entity: Entity,
+    pk_col: str,
+    current: pd.DataFrame,
+    events: pd.DataFrame,
+) -> pd.DataFrame:
+    if events.empty:
+        if current.empty:
+            return pd.DataFrame(columns=[pk_col])
+        return finalize_current_state(current, pk_col)
+
+    events = events.sort_values(["event_ts", "event_id"], kind="stable").reset_index(drop=True)
+    payloads = decode_payloads(entity, events)
+    event_ts = pd.to_datetime(events["event_ts"], utc=True)
+    pks = events["pk"].astype(str)
+
+    current_keys = current[pk_col].astype(str) if not current.empty else pd.Series(dtype=object)
+    if not current.empty and "_last_event_ts" in current.columns:
+        last_ts = pd.Series(pd.to_datetime(current["_last_event_ts"], utc=True).to_numpy(), index=current_keys.to_numpy())
+        prior_ts = pks.map(last_ts)
+        applied = ~(prior_ts.notna() & (event_ts < prior_ts))
+    else:
+        applied = pd.Series(True, index=events.index)
+
+    events = events[applied]
+    payloads = payloads[applied]
+    event_ts = event_ts[applied]
+    pks = pks[applied]
+    if events.empty:
+        return finalize_current_state(current, pk_col) if not current.empty else pd.DataFrame(columns=[pk_col])
+
+    # Only the events from each key's last insert onwards survive: an insert resets the row.
+    is_insert = events["operation"].eq("I")
+    segment = is_insert.astype(int).groupby(pks).cumsum()
+    live = segment.eq(segment.groupby(pks).transform("max"))
+    restarted_keys = set(pks[is_insert & live])
+    touched_keys = pks[live].unique()
+
+    changes = payloads[live].drop(columns=[pk_col], errors="ignore")
+    changes.insert(0, pk_col, pks[live])
+    deletes = events.loc[live, "operation"].eq("D")
+    if "is_deleted" not in changes.columns:
+        changes["is_deleted"] = pd.NA
+    changes["is_deleted"] = changes["is_deleted"].astype(object)
+    changes.loc[deletes, "is_deleted"] = True
+    changes["_last_event_ts"] = event_ts[live]
+    changes["_last_event_id"] = events.loc[live, "event_id"].astype(str)
+    changes["_schema_version"] = events.loc[live, "schema_version"].astype(int)
+
+    if current.empty:
+        untouched = current
+        base = current
+    else:
+        touched_mask = current_keys.isin(touched_keys)
+        untouched = current[~touched_mask]
+        base = current[touched_mask & ~current_keys.isin(restarted_keys)].copy()
+        base[pk_col] = current_keys[base.index]
+
+    stacked = pd.concat([base, changes], ignore_index=True) if not base.empty else changes.reset_index(drop=True)
+    merged = stacked.groupby(pk_col, sort=False, dropna=False).last().reset_index()
+    merged["is_deleted"] = merged["is_deleted"].where(merged["is_deleted"].notna(), False)
+
+    result = pd.concat([untouched, merged], ignore_index=True) if not untouched.empty else merged
+    return finalize_current_state(result, pk_col)
+
+
+def finalize_current_state(frame: pd.DataFrame, pk_col: str) -> pd.DataFrame:
+    frame = frame.copy()
+    for col in TIMESTAMP_COLUMNS:
+        if col in frame.columns:
+            frame[col] = pd.to_datetime(frame[col], utc=True, errors="coerce")
+    return frame.sort_values(pk_col).reset_index(drop=True)
+
+
+def decode_payloads(entity: Entity, events: pd.DataFrame) -> pd.DataFrame:
+    if events.empty:
+        return pd.DataFrame(index=events.index)
+    payloads = events["payload"] if "payload" in events.columns else typed_payload_columns(events)
+    frames = [
+        validate_payloads(entity, operation, payloads.loc[group.index])
+        for operation, group in events.groupby("operation", sort=False)
+    ]
+    return pd.concat(frames).reindex(events.index)
@@ -0,0 +1,171 @@
+"""DuckDB silver merge engine."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+from cdc_ecommerce.quality.schema import Entity, payload_field_types
+from cdc_ecommerce.silver.columnar import TIMESTAMP_COLUMNS, decode_payloads
+from cdc_ecommerce.silver.storage import reconciled_sql
+from cdc_ecommerce.utils.io import copy_query_to_parquet
+
+_SQL_TYPES: dict[type, str] = {str: "VARCHAR", bool: "BOOLEAN", int: "BIGINT", float: "DOUBLE"}
+_PANDAS_TYPES: dict[type, str] = {str: "string", bool: "boolean", int: "Int64", float: "Float64"}
+_BOOKKEEPING_TYPES: dict[str, str] = {
+    "_last_event_ts": "TIMESTAMPTZ",
+    "_last_event_id": "VARCHAR",
+    "_schema_version": "BIGINT",
+}
+
+
+def merge_entity_duckdb(
+    conn: duckdb.DuckDBPyConnection,
+    entity: Entity,
+    pk_col: str,
+    sources: list[Path],
+    events: pd.DataFrame,
+    target: Path,
+    changed_only: bool = False,
+) -> int:
+    known_types = entity_column_types(entity, pk_col)
+    typed_events = _typed_events(entity, events, known_types)
+    conn.register("batch_events", typed_events)
+
+    column_types = {
+        name: sql_type
+        for name, sql_type in known_types.items()
+        if name in (pk_col, "is_deleted", *_BOOKKEEPING_TYPES) or f"p_{name}" in typed_events.columns
+    }
+    current_columns: set[str] = set()
+    if len(sources) == 1 and not changed_only:
+        source = sources[0].as_posix().replace("'", "''")
+        conn.execute(f"CREATE OR REPLACE TEMP VIEW current_state AS SELECT * FROM read_parquet('{source}', hive_partitioning = false)")
+    elif sources:
+        key_filter = "SELECT pk FROM batch_events" if changed_only else None
+        conn.execute(f"CREATE OR REPLACE TEMP VIEW current_state AS {reconciled_sql(sources, pk_col, key_filter)}")
+    if sources:
+        for name, sql_type in conn.execute("SELECT column_name, column_type FROM (DESCRIBE current_state)").fetchall():
+            column_types.setdefault(name, known_types.get(name, sql_type))
+            current_columns.add(name)
+    else:
+        empty_columns = ", ".join(f"CAST(NULL AS {sql_type}) AS {_quote(name)}" for name, sql_type in column_types.items())
+        conn.execute(f"CREATE OR REPLACE TEMP VIEW current_state AS SELECT {empty_columns} WHERE false")
+        current_columns.update(column_types)
+
+    query = _merge_query(pk_col, column_types, current_columns, set(typed_events.columns), changed_only)
+    try:
+        return copy_query_to_parquet(conn, query, target)
+    finally:
+        conn.unregister("batch_events")
+        conn.execute("DROP VIEW IF EXISTS current_state")
+
+
+def entity_column_types(entity: Entity, pk_col: str) -> dict[str, str]:
+    column_types = {pk_col: "VARCHAR"}
+    for name, python_type in payload_field_types(entity).items():
+        column_types.setdefault(name, "TIMESTAMPTZ" if name in TIMESTAMP_COLUMNS else _SQL_TYPES[python_type])
+    column_types.update(_BOOKKEEPING_TYPES)
+    return column_types
+
+
+def _typed_events(entity: Entity, events: pd.DataFrame, column_types: dict[str, str]) -> pd.DataFrame:
+    events = events.reset_index(drop=True)
+    payloads = decode_payloads(entity, events)
+    typed = pd.DataFrame(
+        {
+            "pk": events["pk"].astype(str),
+            "operation": events["operation"].astype(str),
+            "event_id": events["event_id"].astype(str),
+            "event_ts": pd.to_datetime(events["event_ts"], utc=True),
+            "schema_version": events["schema_version"].astype("int64"),
+        }
+    )
+    for name, python_type in payload_field_types(entity).items():
+        if name not in payloads.columns:
+            continue
+        pandas_type = "string" if column_types[name] == "TIMESTAMPTZ" else _PANDAS_TYPES[python_type]
+        typed[f"p_{name}"] = payloads[name].astype(pandas_type)
+    return typed
+
+
+def _merge_query(
+    pk_col: str,
+    column_types: dict[str, str],
+    current_columns: set[str],
+    event_columns: set[str],
+    changed_only: bool = False,
+) -> str:
+    pk = _quote(pk_col)
+    payload_columns = [name for name in column_types if name != pk_col and name not in _BOOKKEEPING_TYPES]
+    all_columns = [pk_col, *payload_columns, *_BOOKKEEPING_TYPES]
+
+    change_exprs = [f"pk AS {pk}"]
+    base_exprs = [f"CAST({pk} AS VARCHAR) AS {pk}"]
+    for name in payload_columns:
+        sql_type = column_types[name]
+        source_expr = f"CAST(p_{name} AS {sql_type})" if f"p_{name}" in event_columns else f"CAST(NULL AS {sql_type})"
+        if name == "is_deleted":
+            source_expr = f"CASE WHEN operation = 'D' THEN TRUE ELSE {source_expr} END"
+        change_exprs.append(f"{source_expr} AS {_quote(name)}")
+        base_exprs.append(f"{_cast_current(name, sql_type, current_columns)} AS {_quote(name)}")
+    change_exprs += ["event_ts AS _last_event_ts", "event_id AS _last_event_id", "schema_version AS _schema_version"]
+    base_exprs += [f"{_cast_current(name, sql_type, current_columns)} AS {name}" for name, sql_type in _BOOKKEEPING_TYPES.items()]
+
+    merged_exprs = [pk]
+    for name in all_columns[1:]:
+        column = _quote(name)
+        merged_exprs.append(f"arg_max({column}, seq) FILTER (WHERE {column} IS NOT NULL) AS {column}")
+
+    output_exprs = [_quote(name) if name != "is_deleted" else "coalesce(is_deleted, FALSE) AS is_deleted" for name in all_columns]
+    untouched_exprs = [_quote(name) for name in all_columns]
+    untouched = "" if changed_only else f"""
+        SELECT {", ".join(untouched_exprs)} FROM current_typed WHERE {pk} NOT IN (SELECT pk FROM live)
+        UNION ALL"""
+    return f"""
+        WITH current_typed AS (
+            SELECT {", ".join(base_exprs)} FROM current_state
+        ),
+        ordered AS (
+            SELECT *, row_number() OVER (ORDER BY event_ts, event_id) AS seq FROM batch_events
+        ),
+        applied AS (
+            SELECT o.*
+            FROM ordered o
+            LEFT JOIN current_typed c ON c.{pk} = o.pk
+            WHERE c._last_event_ts IS NULL OR o.event_ts >= c._last_event_ts
+        ),
+        restarts AS (
+            SELECT pk, max(seq) AS restart_seq FROM applied WHERE operation = 'I' GROUP BY pk
+        ),
+        live AS (
+            SELECT a.*
+            FROM applied a
+            LEFT JOIN restarts r ON r.pk = a.pk
+            WHERE a.seq >= coalesce(r.restart_seq, 0)
+        ),
+        stacked AS (
+            SELECT c.*, 0 AS seq
+            FROM current_typed c
+            WHERE c.{pk} IN (SELECT pk FROM live) AND c.{pk} NOT IN (SELECT pk FROM restarts)
+            UNION ALL BY NAME
+            SELECT {", ".join(change_exprs)}, seq FROM live
+        ),
+        merged AS (
+            SELECT {", ".join(merged_exprs)} FROM stacked GROUP BY {pk}
+        )
+        {untouched}
+        SELECT {", ".join(output_exprs)} FROM merged
+        ORDER BY {pk}
+    """
+
+
+def _cast_current(name: str, sql_type: str, current_columns: set[str]) -> str:
+    if name not in current_columns:
+        return f"CAST(NULL AS {sql_type})"
+    return f"TRY_CAST({_quote(name)} AS {sql_type})"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,164 @@
+"""Processed event ledger."""
+from __future__ import annotations
+
+import json
+import shutil
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cdc_ecommerce.utils.io import read_parquet_or_empty, write_parquet
+
+COUNTER_SPAN = 10**10
+FALLBACK_PARTITION = "other"
+_EVENT_ID_PATTERN = r"^(\d{8})-(\d{1,10})$"
+
+
+class ProcessedEventLedger:
+    def __init__(self, root: Path, retention_days: int | None = None):
+        self.root = root
+        self.retention_days = retention_days
+        self.watermark_path = root / "_watermark.json"
+
+    def unprocessed_mask(self, event_ids: pd.Series) -> pd.Series:
+        partitions, keys = encode_event_ids(event_ids)
+        fresh = pd.Series(True, index=event_ids.index)
+        pruned = self.pruned_runs()
+        for partition, positions in _partition_positions(partitions):
+            index = event_ids.index[positions]
+            if partition == FALLBACK_PARTITION:
+                seen = self._load_partition(partition)["event_id"].to_numpy(dtype=object)
+                fresh.loc[index] = ~np.isin(event_ids.iloc[positions].astype(str).to_numpy(dtype=object), seen)
+                continue
+            seen = self._load_partition(partition)["event_key"].to_numpy(dtype=np.int64)
+            unseen = ~np.isin(keys[positions], seen)
+            if partition in pruned:
+                unseen &= ~_in_runs(keys[positions] % COUNTER_SPAN, pruned[partition])
+            fresh.loc[index] = unseen
+        return fresh
+
+    def record(self, event_ids: pd.Series) -> None:
+        if event_ids.empty:
+            return
+        partitions, keys = encode_event_ids(event_ids)
+        for partition, positions in _partition_positions(partitions):
+            existing = self._load_partition(partition)
+            if partition == FALLBACK_PARTITION:
+                column, values = "event_id", event_ids.iloc[positions].astype(str).to_numpy(dtype=object)
+            else:
+                column, values = "event_key", keys[positions]
+            merged = np.union1d(existing[column].to_numpy(dtype=values.dtype), values)
+            write_parquet(pd.DataFrame({column: merged}), self._partition_path(partition))
+        self._advance_watermark()
+
+    def migrate_legacy(self, legacy_path: Path) -> None:
+        if not legacy_path.exists():
+            return
+        legacy = read_parquet_or_empty(legacy_path)
+        if not legacy.empty and "event_id" in legacy.columns:
+            self.record(legacy["event_id"].astype(str))
+        legacy_path.unlink()
+
+    def partitions(self) -> list[str]:
+        return sorted(path.name.split("=", 1)[1] for path in self.root.glob("event_date=*") if path.is_dir())
+
+    def watermark(self) -> str | None:
+        return self._read_state().get("watermark")
+
+    def pruned_runs(self) -> dict[str, list[tuple[int, int]]]:
+        pruned = self._read_state().get("pruned", {})
+        return {partition: _parse_runs(runs) for partition, runs in pruned.items()}
+
+    def _advance_watermark(self) -> None:
+        if self.retention_days is None:
+            return
+        dated = [partition for partition in self.partitions() if partition != FALLBACK_PARTITION]
+        if not dated:
+            return
+        newest = datetime.strptime(dated[-1], "%Y%m%d").date()
+        watermark = (newest - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        previous = self.watermark()
+        if previous is not None and previous > watermark:
+            watermark = previous
+        pruned = self.pruned_runs()
+        for partition in dated:
+            if partition < watermark:
+                counters = self._load_partition(partition)["event_key"].to_numpy(dtype=np.int64) % COUNTER_SPAN
+                if counters.size:
+                    pruned[partition] = _counter_runs(counters, pruned.get(partition, []))
+                shutil.rmtree(self._partition_path(partition).parent)
+        self.watermark_path.parent.mkdir(parents=True, exist_ok=True)
+        runs = {partition: [list(run) for run in pruned[partition]] for partition in sorted(pruned)}
+        state = {"watermark": watermark, "pruned": runs}
+        self.watermark_path.write_text(json.dumps(state), encoding="utf-8")
+
+    def _read_state(self) -> dict:
+        if not self.watermark_path.exists():
+            return {}
+        return json.loads(self.watermark_path.read_text(encoding="utf-8"))
+
+    def _partition_path(self, partition: str) -> Path:
+        return self.root / f"event_date={partition}" / "part.parquet"
+
+    def _load_partition(self, partition: str) -> pd.DataFrame:
+        column = "event_id" if partition == FALLBACK_PARTITION else "event_key"
+        frame = read_parquet_or_empty(self._partition_path(partition))
+        if frame.empty or column not in frame.columns:
+            return pd.DataFrame({column: pd.Series(dtype=object if column == "event_id" else np.int64)})
+        return frame
+
+
+def encode_event_ids(event_ids: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    parts = event_ids.astype(str).str.extract(_EVENT_ID_PATTERN)
+    prefixes = parts[0]
+    conforming = prefixes.notna().to_numpy()
+    partitions = np.where(conforming, prefixes.fillna(FALLBACK_PARTITION).to_numpy(dtype=object), FALLBACK_PARTITION)
+
+    ordinals = {prefix: _prefix_ordinal(prefix) for prefix in prefixes.dropna().unique()}
+    keys = np.full(len(event_ids), -1, dtype=np.int64)
+    if conforming.any():
+        keys[conforming] = (
+            prefixes[conforming].map(ordinals).to_numpy(dtype=np.int64) * COUNTER_SPAN
+            + parts[1][conforming].astype(np.int64).to_numpy()
+        )
+    return partitions, keys
+
+
+def _prefix_ordinal(prefix: str) -> int:
+    try:
+        return datetime.strptime(prefix, "%Y%m%d").date().toordinal()
+    except ValueError:
+        return date.min.toordinal()
+
+
+def _parse_runs(runs: list) -> list[tuple[int, int]]:
+    if runs and not isinstance(runs[0], list):
+        runs = [runs]
+    return [(int(low), int(high)) for low, high in runs]
+
+
+def _counter_runs(counters: np.ndarray, runs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    values = np.unique(counters)
+    breaks = np.flatnonzero(np.diff(values) != 1)
+    starts = values[np.concatenate(([0], breaks + 1))]
+    ends = values[np.concatenate((breaks, [values.size - 1]))]
+    merged: list[tuple[int, int]] = []
+    for low, high in sorted([*runs, *zip(starts.tolist(), ends.tolist())]):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def _in_runs(counters: np.ndarray, runs: list[tuple[int, int]]) -> np.ndarray:
+    starts = np.array([low for low, _ in runs], dtype=np.int64)
+    ends = np.array([high for _, high in runs], dtype=np.int64)
+    positions = np.searchsorted(starts, counters, side="right") - 1
+    return (positions >= 0) & (counters <= ends[np.maximum(positions, 0)])
+
+
+def _partition_positions(partitions: np.ndarray) -> list[tuple[str, np.ndarray]]:
+    return [(str(partition), np.flatnonzero(partitions == partition)) for partition in np.unique(partitions)]
@@ -1,85 +1,189 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import duckdb
+import numpy as np
 import pandas as pd
 
 from cdc_ecommerce.config import Settings
-from cdc_ecommerce.quality.schema import Entity, Operation, validate_payload
-from cdc_ecommerce.utils.io import read_parquet_or_empty, write_parquet
+from cdc_ecommerce.quality.schema import Entity, Operation, payload_records, typed_payload_columns, validate_payload
+from cdc_ecommerce.silver.columnar import apply_entity_events_columnar, finalize_current_state
+from cdc_ecommerce.silver.duckdb_merge import merge_entity_duckdb
+from cdc_ecommerce.silver.ledger import ProcessedEventLedger
+from cdc_ecommerce.silver.storage import (
+    ENTITIES,
+    ENTITY_PK,
+    bucket_path,
+    delta_dir,
+    entity_path,
+    key_buckets,
+    load_partition,
+    new_delta_path,
+    partition_files,
+    silver_row_count,
+)
+from cdc_ecommerce.utils.io import connect_duckdb, write_parquet
 
-ENTITY_PK: dict[Entity, str] = {
-    "users": "user_id",
-    "products": "product_id",
-    "orders": "order_id",
-    "order_items": "order_item_id",
-    "payments": "payment_id",
-}
-
-ENTITIES: tuple[Entity, ...] = ("users", "products", "orders", "order_items", "payments")
+__all__ = ["ENTITIES", "ENTITY_PK", "SilverMerger", "migrate_legacy_ledger", "superseded_by_earlier_arrival"]
 
 
 class SilverMerger:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.settings.silver_root.mkdir(parents=True, exist_ok=True)
-        self.processed_events_path = self.settings.silver_root / "_processed_event_ids.parquet"
+        self._duckdb_conn: duckdb.DuckDBPyConnection | None = None
+        self.ledger = _processed_ledger(self.settings)
 
-    def merge_events(self, events_df: pd.DataFrame) -> dict:
+    def merge_events(self, events_df: pd.DataFrame, arrival: pd.Series | None = None) -> dict:
         if events_df.empty:
             return {
                 "processed_events_count": 0,
-                "output_row_counts": {entity: self._load_entity(entity).shape[0] for entity in ENTITIES},
+                "processed_event_ids": pd.Series(dtype=object),
+                "output_row_counts": {entity: self._entity_row_count(entity) for entity in ENTITIES},
             }
 
-        processed_ids = self._load_processed_event_ids()
         deduped = events_df.sort_values(["event_ts", "event_id"]).drop_duplicates(subset=["event_id"], keep="first")
-        fresh_events = deduped[~deduped["event_id"].isin(processed_ids)].copy()
+        fresh_events = deduped[self.ledger.unprocessed_mask(deduped["event_id"])].copy()
 
         if fresh_events.empty:
             return {
                 "processed_events_count": 0,
-                "output_row_counts": {entity: self._load_entity(entity).shape[0] for entity in ENTITIES},
+                "processed_event_ids": pd.Series(dtype=object),
+                "output_row_counts": {entity: self._entity_row_count(entity) for entity in ENTITIES},
             }
 
-        entity_row_counts: dict[str, int] = {}
-        for entity in ENTITIES:
-            subset = fresh_events[fresh_events["entity"] == entity].sort_values(["event_ts", "event_id"])
-            merged = self._apply_entity_events(entity, subset.to_dict(orient="records"))
-            self._save_entity(entity, merged)
-            entity_row_counts[entity] = int(merged.shape[0])
+        applied = fresh_events[~superseded_by_earlier_arrival(fresh_events, arrival)]
+        subsets = {
+            entity: applied[applied["entity"] == entity].sort_values(["event_ts", "event_id"])
+            for entity in ENTITIES
+        }
+        if self.settings.silver_merge_workers > 1:
+            entity_row_counts = self._merge_entities_parallel(subsets)
+        else:
+            entity_row_counts = {entity: self._merge_entity(entity, subset) for entity, subset in subsets.items()}
 
-        processed_ids.update(fresh_events["event_id"].tolist())
-        self._save_processed_event_ids(processed_ids)
+        self.ledger.record(fresh_events["event_id"])
 
         return {
             "processed_events_count": int(fresh_events.shape[0]),
+            "processed_event_ids": fresh_events["event_id"],
             "output_row_counts": entity_row_counts,
         }
 
     def _entity_path(self, entity: Entity) -> Path:
-        return self.settings.silver_root / f"{entity}.parquet"
+        return entity_path(self.settings, entity)
 
-    def _load_entity(self, entity: Entity) -> pd.DataFrame:
-        return read_parquet_or_empty(self._entity_path(entity))
+    def _entity_row_count(self, entity: Entity) -> int:
+        return silver_row_count(self.settings, entity)
 
-    def _save_entity(self, entity: Entity, df: pd.DataFrame) -> None:
-        write_parquet(df, self._entity_path(entity))
+    def _merge_entities_parallel(self, subsets: dict[Entity, pd.DataFrame]) -> dict[str, int]:
+        workers = min(self.settings.silver_merge_workers, len(subsets))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                entity: pool.submit(_merge_entity_in_worker, self.settings, entity, subset)
+                for entity, subset in subsets.items()
+            }
+            return {entity: future.result() for entity, future in futures.items()}
 
-    def _load_processed_event_ids(self) -> set[str]:
-        df = read_parquet_or_empty(self.processed_events_path)
-        if df.empty or "event_id" not in df.columns:
-            return set()
-        return set(df["event_id"].astype(str).tolist())
+    def _entity_partitions(self, entity: Entity, events: pd.DataFrame) -> list[tuple[Path, pd.DataFrame]]:
+        if self.settings.silver_buckets <= 0:
+            return [(self._entity_path(entity), events)]
+        buckets = key_buckets(events["pk"], self.settings.silver_buckets)
+        return [
+            (bucket_path(self.settings, entity, int(bucket)), group)
+            for bucket, group in events.groupby(buckets, sort=True)
+        ]
 
-    def _save_processed_event_ids(self, event_ids: Iterable[str]) -> None:
-        df = pd.DataFrame({"event_id": sorted(set(event_ids))})
-        write_parquet(df, self.processed_events_path)
+    def _merge_entity(self, entity: Entity, events: pd.DataFrame) -> int:
+        partitions = self._entity_partitions(entity, events)
+        shards = self._shard_count(entity)
+        if shards > 1 and len(partitions) > 1:
+            with ProcessPoolExecutor(max_workers=min(shards, len(partitions))) as pool:
+                futures = [
+                    pool.submit(_merge_partition_in_worker, self.settings, entity, path, partition_events)
+                    for path, partition_events in partitions
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            for path, partition_events in partitions:
+                self._merge_partition(entity, path, partition_events)
+        return self._entity_row_count(entity)
 
-    def _apply_entity_events(self, entity: Entity, events: list[dict]) -> pd.DataFrame:
+    def _merge_partition(self, entity: Entity, path: Path, events: pd.DataFrame) -> None:
+        pk_col = ENTITY_PK[entity]
+        delta_log = self.settings.silver_delta_log
+        if delta_log and events.empty:
+            return
+        target = new_delta_path(path) if delta_log else path
+
+        if self.settings.silver_merge_engine == "duckdb":
+            sources = partition_files(path)
+            written = merge_entity_duckdb(self._connection(), entity, pk_col, sources, events, target, changed_only=delta_log)
+            if delta_log and written == 0:
+                target.unlink()
+        else:
+            current = load_partition(path, pk_col, events["pk"] if delta_log else None)
+            if self.settings.silver_buckets <= 0 and self._shard_count(entity) > 1:
+                merged = self._apply_sharded(entity, current, events)
+            else:
+                merged = self._apply_entity_events(entity, current, events)
+            if delta_log:
+                merged = _changed_rows(current, merged, pk_col)
+                if merged.empty:
+                    return
+            write_parquet(merged, target)
+
+        if not delta_log and delta_dir(path).exists():
+            shutil.rmtree(delta_dir(path))
+
+    def _shard_count(self, entity: Entity) -> int:
+        if entity not in self.settings.silver_sharded_entities:
+            return 1
+        return max(1, self.settings.silver_merge_shards)
+
+    def _apply_sharded(self, entity: Entity, current: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+        pk_col = ENTITY_PK[entity]
+        shards = self._shard_count(entity)
+        current_shards = key_buckets(current[pk_col], shards) if not current.empty else np.array([], dtype=np.int64)
+        event_shards = key_buckets(events["pk"], shards)
+
+        parts: list[pd.DataFrame] = []
+        with ProcessPoolExecutor(max_workers=shards) as pool:
+            futures = []
+            for shard in range(shards):
+                shard_current = current[current_shards == shard] if not current.empty else current
+                shard_events = events[event_shards == shard]
+                if shard_events.empty:
+                    parts.append(shard_current)
+                    continue
+                futures.append(pool.submit(_apply_in_worker, self.settings, entity, shard_current, shard_events))
+            parts.extend(future.result() for future in futures)
+
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return pd.DataFrame(columns=[pk_col])
+        return finalize_current_state(pd.concat(parts, ignore_index=True), pk_col)
+
+    def _connection(self) -> duckdb.DuckDBPyConnection:
+        if self._duckdb_conn is None:
+            self._duckdb_conn = connect_duckdb(self.settings.duckdb_memory_limit, self.settings.data_root / ".duckdb_tmp")
+        return self._duckdb_conn
+
+    def _apply_entity_events(self, entity: Entity, current: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+        if self.settings.silver_merge_engine == "python":
+            if "payload" not in events.columns:
+                events = events.assign(payload=payload_records(typed_payload_columns(events)))
+            return self._apply_entity_events_python(entity, current, events.to_dict(orient="records"))
+        if self.settings.silver_merge_engine == "columnar":
+            return apply_entity_events_columnar(entity, ENTITY_PK[entity], current, events)
+        raise ValueError(f"Unknown silver merge engine: {self.settings.silver_merge_engine}")
+
+    def _apply_entity_events_python(self, entity: Entity, current: pd.DataFrame, events: list[dict]) -> pd.DataFrame:
         pk_col = ENTITY_PK[entity]
-        current = self._load_entity(entity)
         state: dict[str, dict] = {}
 
         if not current.empty:
@@ -127,11 +231,55 @@ class SilverMerger:
         if pk_col not in merged_df.columns:
             merged_df[pk_col] = merged_df.index.astype(str)
 
-        for col in ["created_at", "updated_at", "order_ts", "_last_event_ts"]:
-            if col in merged_df.columns:
-                merged_df[col] = pd.to_datetime(merged_df[col], utc=True, errors="coerce")
+        return finalize_current_state(merged_df, pk_col)
+
+
+def migrate_legacy_ledger(settings: Settings) -> None:
+    _processed_ledger(settings).migrate_legacy(settings.silver_root / "_processed_event_ids.parquet")
+
+
+def _processed_ledger(settings: Settings) -> ProcessedEventLedger:
+    return ProcessedEventLedger(
+        settings.silver_root / "_processed_events",
+        retention_days=settings.processed_ledger_retention_days,
+    )
+
+
+def superseded_by_earlier_arrival(events: pd.DataFrame, arrival: pd.Series | None) -> pd.Series:
+    if arrival is None or events.empty:
+        return pd.Series(False, index=events.index)
+    frame = pd.DataFrame(
+        {
+            "key": events["entity"].astype(str) + "|" + events["pk"].astype(str),
+            "arrival": arrival.loc[events.index].to_numpy(),
+            "event_ts": pd.to_datetime(events["event_ts"], utc=True),
+        },
+        index=events.index,
+    )
+    newest = frame.groupby(["key", "arrival"], sort=True)["event_ts"].max().reset_index()
+    newest["earlier"] = newest.groupby("key")["event_ts"].cummax().groupby(newest["key"]).shift()
+    earlier = frame.merge(newest[["key", "arrival", "earlier"]], on=["key", "arrival"], how="left")["earlier"]
+    return pd.Series((earlier.notna() & (frame["event_ts"].to_numpy() < earlier)).to_numpy(), index=events.index)
+
+
+def _changed_rows(current: pd.DataFrame, merged: pd.DataFrame, pk_col: str) -> pd.DataFrame:
+    if current.empty:
+        return merged
+    previous = pd.Series(current["_last_event_id"].to_numpy(), index=current[pk_col].astype(str).to_numpy())
+    prior = merged[pk_col].astype(str).map(previous)
+    return merged[prior.isna() | prior.ne(merged["_last_event_id"])].reset_index(drop=True)
+
+
+def _merge_entity_in_worker(settings: Settings, entity: Entity, events: pd.DataFrame) -> int:
+    return SilverMerger(settings)._merge_entity(entity, events)
+
+
+def _merge_partition_in_worker(settings: Settings, entity: Entity, path: Path, events: pd.DataFrame) -> None:
+    SilverMerger(settings)._merge_partition(entity, path, events)
+
 
-        return merged_df.sort_values(pk_col).reset_index(drop=True)
+def _apply_in_worker(settings: Settings, entity: Entity, current: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    return SilverMerger(settings)._apply_entity_events(entity, current, events)
 
 
 def _to_utc_ts(value: object) -> pd.Timestamp:
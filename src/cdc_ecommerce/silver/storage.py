@@ -0,0 +1,216 @@
+"""Silver table layout."""
+from __future__ import annotations
+
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cdc_ecommerce.config import Settings
+from cdc_ecommerce.quality.schema import Entity
+from cdc_ecommerce.utils.io import copy_query_to_parquet, duckdb_cursor, ensure_parent, parquet_row_count, read_parquet_files
+
+ENTITY_PK: dict[Entity, str] = {
+    "users": "user_id",
+    "products": "product_id",
+    "orders": "order_id",
+    "order_items": "order_item_id",
+    "payments": "payment_id",
+}
+
+ENTITIES: tuple[Entity, ...] = ("users", "products", "orders", "order_items", "payments")
+
+
+def entity_path(settings: Settings, entity: Entity) -> Path:
+    return settings.silver_root / f"{entity}.parquet"
+
+
+def bucket_path(settings: Settings, entity: Entity, bucket: int) -> Path:
+    width = max(2, len(str(settings.silver_buckets - 1)))
+    return settings.silver_root / entity / f"bucket={bucket:0{width}d}" / "part.parquet"
+
+
+def layout_path(settings: Settings, entity: Entity) -> Path:
+    return settings.silver_root / entity / "_layout.json"
+
+
+def stored_buckets(settings: Settings, entity: Entity) -> int | None:
+    path = layout_path(settings, entity)
+    if path.exists():
+        return int(json.loads(path.read_text(encoding="utf-8"))["buckets"])
+    if entity_path(settings, entity).exists():
+        return 0
+    return None
+
+
+def check_silver_layout(settings: Settings) -> None:
+    for entity in ENTITIES:
+        buckets = stored_buckets(settings, entity)
+        if buckets is None:
+            bucketed = any(path.is_dir() for path in (settings.silver_root / entity).glob("bucket=*"))
+            if not bucketed or settings.silver_buckets > 0:
+                continue
+        if buckets != settings.silver_buckets:
+            stored = "in buckets" if buckets is None else f"with {buckets} buckets"
+            raise ValueError(
+                f"Silver {entity} is stored {stored} but silver_buckets is {settings.silver_buckets}; "
+                "rerun with the matching --buckets"
+            )
+
+
+def ensure_silver_layout(settings: Settings) -> None:
+    check_silver_layout(settings)
+    for entity in ENTITIES:
+        path = layout_path(settings, entity)
+        if not path.exists():
+            ensure_parent(path)
+            path.write_text(json.dumps({"buckets": settings.silver_buckets}), encoding="utf-8")
+
+
+def key_buckets(keys: pd.Series, buckets: int) -> np.ndarray:
+    hashed = pd.util.hash_array(keys.astype(str).to_numpy(dtype=object))
+    return (hashed % np.uint64(buckets)).astype(np.int64)
+
+
+def base_paths(settings: Settings, entity: Entity) -> list[Path]:
+    if settings.silver_buckets > 0:
+        return [path / "part.parquet" for path in sorted((settings.silver_root / entity).glob("bucket=*")) if path.is_dir()]
+    return [entity_path(settings, entity)]
+
+
+def delta_dir(base: Path) -> Path:
+    if base.name == "part.parquet":
+        return base.parent / "_delta"
+    return base.with_suffix("") / "_delta"
+
+
+def delta_files(base: Path) -> list[Path]:
+    return sorted(delta_dir(base).glob("delta_*.parquet"))
+
+
+def partition_files(base: Path) -> list[Path]:
+    return ([base] if base.exists() else []) + delta_files(base)
+
+
+def silver_table_files(settings: Settings, entity: Entity) -> list[Path]:
+    return [path for base in base_paths(settings, entity) for path in partition_files(base)]
+
+
+def load_silver_table(settings: Settings, entity: Entity) -> pd.DataFrame:
+    files = silver_table_files(settings, entity)
+    if not any(_is_delta(path) for path in files):
+        return read_parquet_files(files)
+    with duckdb_cursor() as conn:
+        return conn.execute(reconciled_sql(files, ENTITY_PK[entity])).df()
+
+
+def load_partition(base: Path, pk_col: str, keys: pd.Series | None = None) -> pd.DataFrame:
+    files = partition_files(base)
+    if not files:
+        return pd.DataFrame()
+    if keys is None and len(files) == 1:
+        return read_parquet_files(files)
+    with duckdb_cursor() as conn:
+        if keys is None:
+            return conn.execute(reconciled_sql(files, pk_col)).df()
+        conn.register("partition_keys", pd.DataFrame({"key": keys.astype(str).unique()}))
+        try:
+            return conn.execute(reconciled_sql(files, pk_col, "SELECT key FROM partition_keys")).df()
+        finally:
+            conn.unregister("partition_keys")
+
+
+def load_silver_rows(settings: Settings, entity: Entity, keys: pd.Series) -> pd.DataFrame:
+    if keys.empty:
+        return pd.DataFrame()
+    if settings.silver_buckets > 0:
+        buckets = sorted(set(key_buckets(keys, settings.silver_buckets).tolist()))
+        bases = [bucket_path(settings, entity, bucket) for bucket in buckets]
+    else:
+        bases = base_paths(settings, entity)
+    frames = [frame for frame in (load_partition(base, ENTITY_PK[entity], keys) for base in bases) if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def silver_row_count(settings: Settings, entity: Entity) -> int:
+    files = silver_table_files(settings, entity)
+    if not any(_is_delta(path) for path in files):
+        return parquet_row_count(files)
+    pk = _quote(ENTITY_PK[entity])
+    with duckdb_cursor() as conn:
+        return int(conn.execute(f"SELECT count(DISTINCT {pk}) FROM {_files_relation(files)}").fetchone()[0])
+
+
+def silver_relation_sql(settings: Settings, entity: Entity) -> str | None:
+    files = silver_table_files(settings, entity)
+    if not files:
+        return None
+    if any(_is_delta(path) for path in files):
+        return f"({reconciled_sql(files, ENTITY_PK[entity])})"
+    return _files_relation(files)
+
+
+def reconciled_sql(files: list[Path], pk_col: str, key_filter_sql: str | None = None) -> str:
+    pk = _quote(pk_col)
+    where = f"WHERE CAST({pk} AS VARCHAR) IN ({key_filter_sql})" if key_filter_sql else ""
+    return f"""
+        SELECT * EXCLUDE (filename)
+        FROM {_files_relation(files, with_filename=True)}
+        {where}
+        QUALIFY row_number() OVER (
+            PARTITION BY {pk}
+            ORDER BY _last_event_ts DESC, CASE WHEN contains(filename, '/_delta/') THEN filename ELSE '' END DESC
+        ) = 1
+        ORDER BY {pk}
+    """
+
+
+def new_delta_path(base: Path) -> Path:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return delta_dir(base) / f"delta_{stamp}.parquet"
+
+
+def needs_compaction(base: Path, max_deltas: int, max_delta_bytes: int) -> bool:
+    deltas = delta_files(base)
+    if not deltas:
+        return False
+    return len(deltas) >= max_deltas or sum(path.stat().st_size for path in deltas) >= max_delta_bytes
+
+
+def compact_partition(base: Path, pk_col: str) -> int:
+    deltas = delta_files(base)
+    if not deltas:
+        return 0
+    with duckdb_cursor() as conn:
+        copy_query_to_parquet(conn, reconciled_sql(partition_files(base), pk_col), base)
+    shutil.rmtree(delta_dir(base))
+    return len(deltas)
+
+
+def compact_silver(settings: Settings, force: bool = False) -> dict[str, int]:
+    check_silver_layout(settings)
+    compacted: dict[str, int] = {}
+    for entity in ENTITIES:
+        folded = 0
+        for base in base_paths(settings, entity):
+            if force or needs_compaction(base, settings.silver_compaction_max_deltas, settings.silver_compaction_max_delta_bytes):
+                folded += compact_partition(base, ENTITY_PK[entity])
+        compacted[entity] = folded
+    return compacted
+
+
+def _is_delta(path: Path) -> bool:
+    return path.parent.name == "_delta"
+
+
+def _files_relation(files: list[Path], with_filename: bool = False) -> str:
+    listing = ", ".join("'" + path.as_posix().replace("'", "''") + "'" for path in files)
+    filename = ", filename = true" if with_filename else ""
+    return f"read_parquet([{listing}], union_by_name = true, hive_partitioning = false{filename})"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
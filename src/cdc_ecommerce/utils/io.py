@@ -1,32 +1,133 @@
 from __future__ import annotations
 
 import json
+import os
+import re
+import threading
+from datetime import date
 from pathlib import Path
 
 import duckdb
 import pandas as pd
 
+_shared_connection: tuple[int, duckdb.DuckDBPyConnection] | None = None
+_shared_lock = threading.Lock()
+_MEMORY_LIMIT_PATTERN = re.compile(r"^\d+(\.\d+)?\s*(B|KB|MB|GB|TB|KiB|MiB|GiB|TiB)$", re.IGNORECASE)
+
 
 def ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+def duckdb_cursor() -> duckdb.DuckDBPyConnection:
+    global _shared_connection
+    with _shared_lock:
+        if _shared_connection is None or _shared_connection[0] != os.getpid():
+            _shared_connection = (os.getpid(), duckdb.connect())
+        return _shared_connection[1].cursor()
+
+
 def read_parquet_or_empty(path: Path) -> pd.DataFrame:
     if not path.exists():
         return pd.DataFrame()
-    with duckdb.connect() as conn:
-        return conn.execute("SELECT * FROM read_parquet(?)", [str(path)]).df()
+    with duckdb_cursor() as conn:
+        return conn.execute("SELECT * FROM read_parquet(?, hive_partitioning = false)", [str(path)]).df()
+
+
+def read_parquet_files(paths: list[Path], columns: list[str] | None = None) -> pd.DataFrame:
+    existing = [str(path) for path in paths if path.exists()]
+    if not existing:
+        return pd.DataFrame()
+    projection = ", ".join(f'"{column}"' for column in columns) if columns else "*"
+    with duckdb_cursor() as conn:
+        return conn.execute(
+            f"SELECT {projection} FROM read_parquet(?, union_by_name = true, hive_partitioning = false)", [existing]
+        ).df()
+
+
+def read_gold_table(
+    gold_root: Path,
+    name: str,
+    start: date | None = None,
+    end: date | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    low = start.isoformat() if start else None
+    high = end.isoformat() if end else None
+    dataset = gold_root / name
+    if dataset.is_dir():
+        paths = [
+            path
+            for path in sorted(dataset.glob("*=*/part.parquet"))
+            if _partition_overlaps(path.parent.name, low, high)
+        ]
+    else:
+        paths = [gold_root / f"{name}.parquet"]
+    projection = None if columns is None else ["date", *(column for column in columns if column != "date")]
+    frame = read_parquet_files(paths, columns=projection)
+    if frame.empty:
+        return frame
+    dates = frame["date"].astype(str)
+    keep = pd.Series(True, index=frame.index)
+    if low:
+        keep &= dates >= low
+    if high:
+        keep &= dates <= high
+    frame = frame[keep].reset_index(drop=True)
+    return frame if columns is None else frame[columns]
 
 
 def write_parquet(df: pd.DataFrame, path: Path) -> None:
     ensure_parent(path)
     tmp_path = path.with_suffix(".tmp.parquet")
-    with duckdb.connect() as conn:
+    with duckdb_cursor() as conn:
         conn.register("df_view", df)
         conn.execute("COPY df_view TO ? (FORMAT PARQUET)", [str(tmp_path)])
     tmp_path.replace(path)
 
 
+def connect_duckdb(memory_limit: str | None = None, temp_directory: Path | None = None) -> duckdb.DuckDBPyConnection:
+    conn = duckdb.connect()
+    conn.execute("SET TimeZone = 'UTC'")
+    conn.execute("SET preserve_insertion_order = false")
+    if memory_limit:
+        if not _MEMORY_LIMIT_PATTERN.match(memory_limit):
+            raise ValueError(f"Invalid DuckDB memory limit: {memory_limit!r}")
+        conn.execute("SET memory_limit = ?", [memory_limit])
+    if temp_directory is not None:
+        temp_directory.mkdir(parents=True, exist_ok=True)
+        conn.execute("SET temp_directory = ?", [temp_directory.as_posix()])
+    return conn
+
+
+def copy_query_to_parquet(conn: duckdb.DuckDBPyConnection, query: str, path: Path, params: list | None = None) -> int:
+    ensure_parent(path)
+    tmp_path = path.with_suffix(".tmp.parquet")
+    conn.execute(f"COPY ({query}) TO {_sql_string(tmp_path.as_posix())} (FORMAT PARQUET)", params or [])
+    tmp_path.replace(path)
+    return parquet_row_count(path, conn)
+
+
+def parquet_row_count(path: Path | list[Path], conn: duckdb.DuckDBPyConnection | None = None) -> int:
+    paths = [str(item) for item in (path if isinstance(path, list) else [path]) if item.exists()]
+    if not paths:
+        return 0
+    if conn is None:
+        with duckdb_cursor() as own_conn:
+            return parquet_row_count(path, own_conn)
+    return int(conn.execute("SELECT count(*) FROM read_parquet(?)", [paths]).fetchone()[0])
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _partition_overlaps(partition: str, low: str | None, high: str | None) -> bool:
+    column, value = partition.split("=", 1)
+    first, last = (f"{value}-01", f"{value}-31") if column == "month" else (value, value)
+    return (low is None or last >= low) and (high is None or first <= high)
+
+
 def append_json(path: Path, payload: dict) -> None:
     ensure_parent(path)
     with path.open("a", encoding="utf-8") as handle:
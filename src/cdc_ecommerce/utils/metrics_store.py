@@ -0,0 +1,129 @@
+"""Indexed run-metrics store."""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_date TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    processed_events_count INTEGER NOT NULL,
+    runtime_seconds REAL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_run_date ON runs (run_date, finished_at);
+CREATE INDEX IF NOT EXISTS runs_finished_at ON runs (finished_at);
+"""
+
+
+def metrics_store_path(metrics_root: Path) -> Path:
+    return metrics_root / "runs.sqlite"
+
+
+def append_run_metrics(metrics_root: Path, payload: dict) -> None:
+    with closing(_connect(metrics_root)) as conn, conn:
+        _insert(conn, payload)
+
+
+def upsert_run_metrics(metrics_root: Path, payload: dict) -> None:
+    with closing(_connect(metrics_root)) as conn, conn:
+        conn.execute(
+            "DELETE FROM runs WHERE run_date = ? AND json_extract(payload, '$.bronze_batch_id') = ?",
+            (payload["run_date"], payload.get("bronze_batch_id")),
+        )
+        _insert(conn, payload)
+
+
+def recent_processed_counts(metrics_root: Path, limit: int = 10) -> list[int]:
+    if not metrics_store_path(metrics_root).exists() and not _legacy_files(metrics_root):
+        return []
+    with closing(_connect(metrics_root)) as conn:
+        rows = conn.execute(
+            "SELECT processed_events_count FROM runs ORDER BY run_date DESC, finished_at DESC, id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [int(row[0]) for row in reversed(rows)]
+
+
+def rolling_processed_counts(metrics_root: Path, window: int = 10) -> pd.DataFrame:
+    columns = ["run_date", "finished_at", "processed_events_count", "rolling_avg", "rolling_runs"]
+    if not metrics_store_path(metrics_root).exists() and not _legacy_files(metrics_root):
+        return pd.DataFrame(columns=columns)
+    with closing(_connect(metrics_root)) as conn:
+        return pd.read_sql_query(
+            f"""
+            SELECT
+                run_date,
+                finished_at,
+                processed_events_count,
+                avg(processed_events_count) OVER recent AS rolling_avg,
+                count(*) OVER recent AS rolling_runs
+            FROM runs
+            WINDOW recent AS (ORDER BY run_date, finished_at, id ROWS BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW)
+            ORDER BY run_date, finished_at, id
+            """,
+            conn,
+        )
+
+
+def read_run_metrics(metrics_root: Path, start: date | None = None, end: date | None = None) -> list[dict]:
+    if not metrics_store_path(metrics_root).exists() and not _legacy_files(metrics_root):
+        return []
+    low = start.isoformat() if start is not None else ""
+    high = end.isoformat() if end is not None else "9999-12-31"
+    with closing(_connect(metrics_root)) as conn:
+        rows = conn.execute(
+            "SELECT payload FROM runs WHERE run_date BETWEEN ? AND ? ORDER BY run_date, finished_at, id",
+            (low, high),
+        ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def export_run_metrics_json(metrics_root: Path, output_dir: Path) -> int:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    payloads = read_run_metrics(metrics_root)
+    for payload in payloads:
+        stamp = datetime.fromisoformat(payload["finished_at"]).strftime("%Y%m%dT%H%M%S%f")
+        path = output_dir / f"run_{payload['run_date']}_{stamp}.json"
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return len(payloads)
+
+
+def _connect(metrics_root: Path) -> sqlite3.Connection:
+    metrics_root.mkdir(parents=True, exist_ok=True)
+    path = metrics_store_path(metrics_root)
+    created = not path.exists()
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    if created:
+        with conn:
+            for legacy in _legacy_files(metrics_root):
+                try:
+                    _insert(conn, json.loads(legacy.read_text(encoding="utf-8")))
+                except (ValueError, KeyError):
+                    continue
+    return conn
+
+
+def _insert(conn: sqlite3.Connection, payload: dict) -> None:
+    conn.execute(
+        "INSERT INTO runs (run_date, finished_at, processed_events_count, runtime_seconds, payload) VALUES (?, ?, ?, ?, ?)",
+        (
+            payload["run_date"],
+            payload["finished_at"],
+            int(payload.get("processed_events_count", 0)),
+            payload.get("runtime_seconds"),
+            json.dumps(payload),
+        ),
+    )
+
+
+def _legacy_files(metrics_root: Path) -> list[Path]:
+    return sorted(metrics_root.glob("run_*.json")) if metrics_root.exists() else []
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce import pipeline
+from cdc_ecommerce.gold.rollups import ROLLUP_TABLES
+from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.silver import resident as resident_module
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK, superseded_by_earlier_arrival
+from cdc_ecommerce.silver.resident import checkpoint_path, read_checkpoint
+from cdc_ecommerce.silver.storage import load_silver_table
+from cdc_ecommerce.utils.io import read_parquet_or_empty
+from cdc_ecommerce.utils.metrics_store import read_run_metrics
+
+START = date(2021, 1, 1)
+END = date(2021, 1, 6)
+GOLD_TABLES = ("daily_gmv", "orders_by_status", "refund_rate", "top_products", "basic_retention")
+
+
+def _isolated(settings, name: str, **overrides):
+    root = settings.data_root.parent / name
+    return replace(
+        settings,
+        data_root=root,
+        bronze_root=root / "bronze",
+        silver_root=root / "silver",
+        gold_root=root / "gold",
+        metrics_root=root / "metrics",
+        **overrides,
+    )
+
+
+def _assert_same_outputs(actual_settings, expected_settings, gold_tables=GOLD_TABLES) -> None:
+    for entity in ENTITIES:
+        pk_col = ENTITY_PK[entity]
+        actual = load_silver_table(actual_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        expected = load_silver_table(expected_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual[sorted(actual.columns)], expected[sorted(expected.columns)], check_dtype=False)
+    for name in gold_tables:
+        pd.testing.assert_frame_equal(
+            read_parquet_or_empty(actual_settings.gold_root / f"{name}.parquet"),
+            read_parquet_or_empty(expected_settings.gold_root / f"{name}.parquet"),
+            check_dtype=False,
+        )
+
+
+def test_resident_backfill_matches_daily_backfill(settings) -> None:
+    resident = _isolated(settings, "resident", backfill_resident_silver=True, backfill_checkpoint_days=2)
+
+    expected = pipeline.backfill(START, END, settings)
+    actual = pipeline.backfill(START, END, resident)
+
+    assert [run["output_row_counts"] for run in actual] == [run["output_row_counts"] for run in expected]
+    assert [run["processed_events_count"] for run in actual] == [run["processed_events_count"] for run in expected]
+    assert len(list(resident.bronze_root.glob("event_date=*"))) == 6
+    assert not checkpoint_path(resident).exists()
+    _assert_same_outputs(resident, settings)
+
+
+@pytest.mark.parametrize("resident", [False, True])
+def test_batched_backfill_attributes_per_day_metrics(settings, resident) -> None:
+    batched = _isolated(settings, "batched", backfill_batch_days=4, backfill_resident_silver=resident)
+
+    expected = pipeline.backfill(START, END, settings)
+    actual = pipeline.backfill(START, END, batched)
+
+    assert [run["run_date"] for run in actual] == [run["run_date"] for run in expected]
+    assert [run["processed_events_count"] for run in actual] == [run["processed_events_count"] for run in expected]
+    assert [run["batch_window"]["end"] for run in actual] == ["2021-01-04"] * 4 + ["2021-01-06"] * 2
+    assert actual[-1]["output_row_counts"] == expected[-1]["output_row_counts"]
+    assert len(read_run_metrics(batched.metrics_root)) == 6
+    assert len(list(batched.bronze_root.glob("event_date=*"))) == 6
+    _assert_same_outputs(batched, settings)
+
+
+def test_batched_backfill_skips_updates_superseded_by_an_earlier_day(settings) -> None:
+    late_end = date(2021, 1, 21)
+    window = [generate_cdc_batch(date(2021, 1, day), seed=settings.seed) for day in (19, 20, 21)]
+    arrival = pd.Series([offset for offset, events in enumerate(window) for _ in range(len(events))])
+    assert superseded_by_earlier_arrival(pd.concat(window, ignore_index=True), arrival).any()
+
+    pipeline.backfill(START, late_end, settings)
+    for resident in (False, True):
+        batched = _isolated(settings, f"batched_{resident}", backfill_batch_days=3, backfill_resident_silver=resident)
+        pipeline.backfill(START, late_end, batched)
+        _assert_same_outputs(batched, settings, GOLD_TABLES + ROLLUP_TABLES)
+
+
+def test_resident_backfill_resumes_from_checkpoint(settings, monkeypatch) -> None:
+    resident = _isolated(settings, "resident", backfill_resident_silver=True, backfill_checkpoint_days=2)
+    pipeline.backfill(START, END, settings)
+
+    run_for_window = pipeline.run_pipeline_for_window
+
+    def crash_on_fifth_day(run_dates, cfg=None, silver_merger=None, **kwargs):
+        if date(2021, 1, 5) in run_dates:
+            raise RuntimeError("simulated crash")
+        return run_for_window(run_dates, cfg, silver_merger, **kwargs)
+
+    monkeypatch.setattr(pipeline, "run_pipeline_for_window", crash_on_fifth_day)
+    with pytest.raises(RuntimeError):
+        pipeline.backfill(START, END, resident)
+    assert read_checkpoint(resident, START, END) == date(2021, 1, 4)
+    monkeypatch.undo()
+
+    resumed = pipeline.backfill(START, END, resident)
+
+    assert [run["run_date"] for run in resumed] == ["2021-01-05", "2021-01-06"]
+    assert not checkpoint_path(resident).exists()
+    _assert_same_outputs(resident, settings)
+
+
+@pytest.mark.parametrize("bronze_format", ["json", "typed"])
+def test_resumed_backfill_replays_days_after_checkpoint_idempotently(settings, monkeypatch, bronze_format) -> None:
+    resident = _isolated(
+        settings, "resident", backfill_resident_silver=True, backfill_checkpoint_days=3, bronze_format=bronze_format
+    )
+    run_for_window = pipeline.run_pipeline_for_window
+
+    def crash_on_fifth_day(run_dates, cfg=None, silver_merger=None, **kwargs):
+        if date(2021, 1, 5) in run_dates:
+            raise RuntimeError("simulated crash")
+        return run_for_window(run_dates, cfg, silver_merger, **kwargs)
+
+    monkeypatch.setattr(pipeline, "run_pipeline_for_window", crash_on_fifth_day)
+    with pytest.raises(RuntimeError):
+        pipeline.backfill(START, END, resident)
+    assert read_checkpoint(resident, START, END) == date(2021, 1, 3)
+    bronze_files = sorted(resident.bronze_root.rglob("*.parquet"))
+    monkeypatch.undo()
+
+    resumed = pipeline.backfill(START, END, resident)
+
+    assert [run["run_date"] for run in resumed] == ["2021-01-04", "2021-01-05", "2021-01-06"]
+    assert [run["run_date"] for run in read_run_metrics(resident.metrics_root)] == [
+        f"2021-01-0{day}" for day in range(1, 7)
+    ]
+    day_four = resident.bronze_root / "event_date=2021-01-04"
+    assert sorted(day_four.rglob("*.parquet")) == [path for path in bronze_files if day_four in path.parents]
+
+
+def test_repeated_resident_backfills_append_new_bronze_batches(settings) -> None:
+    resident = _isolated(settings, "resident", backfill_resident_silver=True, backfill_checkpoint_days=2)
+
+    pipeline.backfill(START, END, resident)
+    first = sorted(resident.bronze_root.rglob("*.parquet"))
+    pipeline.backfill(START, END, resident)
+    second = sorted(resident.bronze_root.rglob("*.parquet"))
+
+    assert set(first) < set(second)
+    assert len(second) == 2 * len(first)
+
+
+def test_resident_backfill_reports_duckdb_merge_fallback(settings, monkeypatch) -> None:
+    resident = _isolated(settings, "resident", backfill_resident_silver=True, silver_merge_engine="duckdb")
+    warnings: list[str] = []
+    monkeypatch.setattr(resident_module.logger, "warning", lambda message, **kwargs: warnings.append(message))
+
+    pipeline.backfill(START, date(2021, 1, 2), resident)
+
+    assert warnings == ["resident_merge_engine_fallback"]
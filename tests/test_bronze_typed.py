@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.bronze.writer import read_typed_bronze_partition, typed_bronze_events, write_bronze_batch
+from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.pipeline import generate_range, run_pipeline_for_date
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK, SilverMerger
+from cdc_ecommerce.silver.storage import load_silver_table
+
+
+def test_typed_bronze_writes_one_file_per_entity_without_json(settings) -> None:
+    typed_settings = replace(settings, bronze_format="typed")
+    run_date = date(2021, 1, 3)
+    events = typed_bronze_events(generate_cdc_batch(run_date, payload_format="dict"))
+
+    partition = write_bronze_batch(events, typed_settings, run_date)
+
+    orders = read_typed_bronze_partition(typed_settings, run_date, "orders")
+    assert sorted(path.name for path in partition.iterdir()) == [f"entity={entity}" for entity in sorted(ENTITIES)]
+    assert "payload" not in orders.columns
+    assert {"payload_status", "payload_order_ts", "payload_user_id"} <= set(orders.columns)
+    assert set(orders["entity"]) == {"orders"}
+
+
+@pytest.mark.parametrize("engine", ["python", "columnar", "duckdb"])
+def test_typed_bronze_merges_like_json_payloads(settings, tmp_path, engine) -> None:
+    json_settings = replace(settings, silver_merge_engine=engine)
+    typed_root = tmp_path / "typed"
+    typed_settings = replace(
+        json_settings,
+        data_root=typed_root,
+        bronze_root=typed_root / "bronze",
+        silver_root=typed_root / "silver",
+        bronze_format="typed",
+    )
+
+    for offset in range(4):
+        run_date = date(2021, 1, 1) + timedelta(days=offset)
+        SilverMerger(json_settings).merge_events(generate_cdc_batch(run_date))
+        write_bronze_batch(typed_bronze_events(generate_cdc_batch(run_date, payload_format="dict")), typed_settings, run_date)
+        SilverMerger(typed_settings).merge_events(read_typed_bronze_partition(typed_settings, run_date))
+
+    for entity in ENTITIES:
+        pk_col = ENTITY_PK[entity]
+        expected = load_silver_table(json_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        actual = load_silver_table(typed_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual[sorted(actual.columns)], expected[sorted(expected.columns)], check_dtype=False)
+
+
+@pytest.mark.parametrize("bronze_format", ["json", "typed"])
+def test_pipeline_reports_written_bronze_files(settings, bronze_format) -> None:
+    cfg = replace(settings, bronze_format=bronze_format)
+
+    metrics = run_pipeline_for_date(date(2021, 1, 1), cfg)
+    generated = generate_range(date(2021, 1, 2), date(2021, 1, 2), cfg)[0]
+
+    for result in (metrics, generated):
+        files = result["bronze_batch_files"]
+        assert files
+        assert all(Path(path).is_file() and Path(path).suffix == ".parquet" for path in files)
+        if bronze_format == "json":
+            assert files == [result["bronze_batch_path"]]
+        else:
+            assert Path(result["bronze_batch_path"]).is_dir()
+    assert len(metrics["bronze_batch_files"]) == (1 if bronze_format == "json" else len(ENTITIES))
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.bronze.writer import bronze_partition
+from cdc_ecommerce.ingestion.generator import (
+    SimulationShape,
+    cumulative_products,
+    cumulative_users,
+    products_created_on,
+    users_created_on,
+)
+from cdc_ecommerce.pipeline import generate_range
+from cdc_ecommerce.utils.io import read_parquet_files
+
+
+def _isolated(settings, name: str, **overrides):
+    root = settings.data_root.parent / name
+    return replace(
+        settings,
+        data_root=root,
+        bronze_root=root / "bronze",
+        silver_root=root / "silver",
+        gold_root=root / "gold",
+        metrics_root=root / "metrics",
+        **overrides,
+    )
+
+
+def _bronze_day(settings, run_date: date) -> pd.DataFrame:
+    return read_parquet_files(sorted(bronze_partition(settings, run_date).rglob("*.parquet")))
+
+
+@pytest.mark.parametrize("shape", [SimulationShape(), SimulationShape(scale=4), SimulationShape(5, 3, 9)])
+def test_cumulative_counts_match_daily_sums(shape) -> None:
+    for day_idx in range(-1, 800):
+        assert cumulative_users(day_idx, shape) == sum(users_created_on(idx, shape) for idx in range(day_idx + 1))
+        assert cumulative_products(day_idx, shape) == sum(products_created_on(idx, shape) for idx in range(day_idx + 1))
+
+
+@pytest.mark.parametrize("generator_mode", ["python", "vectorized"])
+def test_parallel_generation_matches_serial(settings, generator_mode) -> None:
+    serial = _isolated(settings, "serial", generator_mode=generator_mode)
+    parallel = _isolated(settings, "parallel", generator_mode=generator_mode)
+
+    serial_results = generate_range(date(2021, 1, 1), date(2021, 1, 6), serial)
+    parallel_results = generate_range(date(2021, 1, 1), date(2021, 1, 6), parallel, workers=3)
+
+    assert [result["run_date"] for result in parallel_results] == [f"2021-01-0{day}" for day in range(1, 7)]
+    assert [result["events_count"] for result in parallel_results] == [
+        result["events_count"] for result in serial_results
+    ]
+    for day in range(1, 7):
+        run_date = date(2021, 1, day)
+        expected = _bronze_day(serial, run_date)
+        assert not expected.empty
+        pd.testing.assert_frame_equal(_bronze_day(parallel, run_date), expected)
+
+
+def test_generate_range_rejects_invalid_arguments(settings) -> None:
+    with pytest.raises(ValueError, match="end date"):
+        generate_range(date(2021, 1, 3), date(2021, 1, 1), settings)
+    with pytest.raises(ValueError, match="workers must be at least 1"):
+        generate_range(date(2021, 1, 1), date(2021, 1, 3), settings, workers=0)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+from datetime import date
+
+import pytest
+
+from cdc_ecommerce.gold.builder import MARTS
+from cdc_ecommerce.gold.dag import GoldNode, run_graph
+from cdc_ecommerce.pipeline import run_pipeline_for_date
+
+
+def test_shared_node_runs_once_and_feeds_concurrent_consumers() -> None:
+    calls: list[str] = []
+    barrier = threading.Barrier(2, timeout=5)
+
+    def shared() -> int:
+        calls.append("shared")
+        return 20
+
+    def consumer(value: int) -> int:
+        barrier.wait()
+        return value + 1
+
+    results, timings = run_graph(
+        [
+            GoldNode("left", ("shared",), consumer),
+            GoldNode("right", ("shared",), consumer),
+            GoldNode("shared", (), shared),
+            GoldNode("total", ("left", "right"), lambda left, right: left + right),
+        ],
+        workers=2,
+    )
+
+    assert calls == ["shared"]
+    assert results["total"] == 42
+    assert list(timings) == ["left", "right", "shared", "total"]
+
+
+def test_unresolved_inputs_are_rejected() -> None:
+    with pytest.raises(ValueError, match="unresolved inputs"):
+        run_graph([GoldNode("mart", ("missing",), lambda value: value)])
+
+
+def test_run_metrics_report_gold_node_timings(settings) -> None:
+    metrics = run_pipeline_for_date(date(2021, 1, 1), settings)
+
+    node_seconds = metrics["gold_node_seconds"]
+    assert {"normalized_orders", "paid_order_lines", *MARTS, *(f"write_{name}" for name in MARTS)} <= set(node_seconds)
+    assert all(seconds >= 0 for seconds in node_seconds.values())
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.gold.builder import build_gold
+from cdc_ecommerce.pipeline import backfill
+from cdc_ecommerce.utils.io import read_parquet_or_empty
+
+GOLD_TABLES = ("daily_gmv", "orders_by_status", "refund_rate", "top_products", "basic_retention")
+
+
+def _gold(settings) -> dict[str, pd.DataFrame]:
+    return {name: read_parquet_or_empty(settings.gold_root / f"{name}.parquet") for name in GOLD_TABLES}
+
+
+@pytest.mark.parametrize("overrides", [{}, {"silver_buckets": 4, "silver_delta_log": True}])
+def test_duckdb_gold_full_build_matches_pandas(settings, overrides) -> None:
+    settings = replace(settings, **overrides)
+    backfill(date(2021, 1, 1), date(2021, 1, 10), settings)
+    expected = _gold(settings)
+
+    build_gold(replace(settings, gold_engine="duckdb"))
+
+    for name, frame in _gold(settings).items():
+        pd.testing.assert_frame_equal(frame, expected[name])
+
+
+@pytest.mark.parametrize("resident", [False, True])
+def test_duckdb_gold_incremental_backfill_matches_pandas(settings, resident) -> None:
+    duckdb_root = settings.data_root.parent / "duckdb"
+    duckdb_settings = replace(
+        settings,
+        data_root=duckdb_root,
+        bronze_root=duckdb_root / "bronze",
+        silver_root=duckdb_root / "silver",
+        gold_root=duckdb_root / "gold",
+        metrics_root=duckdb_root / "metrics",
+        gold_engine="duckdb",
+        backfill_resident_silver=resident,
+    )
+
+    expected_runs = backfill(date(2021, 1, 1), date(2021, 1, 8), settings)
+    actual_runs = backfill(date(2021, 1, 1), date(2021, 1, 8), duckdb_settings)
+
+    assert [run["output_row_counts"] for run in actual_runs] == [run["output_row_counts"] for run in expected_runs]
+    expected = _gold(settings)
+    for name, frame in _gold(duckdb_settings).items():
+        pd.testing.assert_frame_equal(frame, expected[name])
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+from dataclasses import replace
+
 import pandas as pd
+import pytest
 
 from cdc_ecommerce.gold.builder import build_gold
 from cdc_ecommerce.utils.io import read_parquet_or_empty, write_parquet
 
 
-def test_gold_metrics_from_small_fixture(settings) -> None:
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_gold_metrics_from_small_fixture(settings, engine) -> None:
+    settings = replace(settings, gold_engine=engine)
     users = pd.DataFrame(
         [
             {"user_id": "U1", "name": "A", "email": "a@example.com", "region": "US", "created_at": "2026-01-01T00:00:00Z", "updated_at": "2026-01-01T00:00:00Z", "is_deleted": False},
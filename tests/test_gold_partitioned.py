@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.gold.builder import MARTS
+from cdc_ecommerce.gold.storage import gold_partition_files
+from cdc_ecommerce.pipeline import backfill, run_pipeline_for_date
+from cdc_ecommerce.utils.io import read_gold_table
+
+
+def _isolated(settings, name: str, **overrides):
+    root = settings.data_root.parent / name
+    return replace(
+        settings,
+        data_root=root,
+        bronze_root=root / "bronze",
+        silver_root=root / "silver",
+        gold_root=root / "gold",
+        metrics_root=root / "metrics",
+        **overrides,
+    )
+
+
+@pytest.mark.parametrize("partitioning", ["date", "month"])
+def test_partitioned_gold_reads_back_as_flat_tables(settings, partitioning) -> None:
+    settings = replace(settings, simulation_start_date=date(2021, 1, 28))
+    partitioned = _isolated(settings, partitioning, gold_partitioning=partitioning)
+
+    flat_runs = backfill(date(2021, 1, 28), date(2021, 2, 3), settings)
+    partitioned_runs = backfill(date(2021, 1, 28), date(2021, 2, 3), partitioned)
+
+    assert [run["output_row_counts"] for run in partitioned_runs] == [run["output_row_counts"] for run in flat_runs]
+    for name in MARTS:
+        assert not (partitioned.gold_root / f"{name}.parquet").exists()
+        pd.testing.assert_frame_equal(
+            read_gold_table(partitioned.gold_root, name),
+            read_gold_table(settings.gold_root, name),
+            check_dtype=False,
+        )
+    partitions = {path.parent.name for path in gold_partition_files(partitioned, "daily_gmv")}
+    expected = {"month=2021-01", "month=2021-02"} if partitioning == "month" else {"date=2021-01-28", "date=2021-02-03"}
+    assert expected <= partitions
+
+
+def test_reader_prunes_partitions_outside_range(settings) -> None:
+    partitioned = replace(settings, gold_partitioning="date")
+    backfill(date(2021, 1, 1), date(2021, 1, 5), partitioned)
+    (partitioned.gold_root / "daily_gmv" / "date=2021-01-01" / "part.parquet").write_bytes(b"not parquet")
+
+    frame = read_gold_table(partitioned.gold_root, "daily_gmv", start=date(2021, 1, 3), end=date(2021, 1, 4), columns=["gmv"])
+
+    assert list(frame.columns) == ["gmv"]
+    assert len(frame) == 2
+
+
+def test_run_rewrites_only_changed_partitions(settings) -> None:
+    partitioned = replace(settings, gold_partitioning="date")
+    backfill(date(2021, 1, 1), date(2021, 1, 6), partitioned)
+    before = {path: path.stat().st_mtime_ns for name in MARTS for path in gold_partition_files(partitioned, name)}
+
+    run_pipeline_for_date(date(2021, 1, 7), partitioned)
+
+    after = {path: path.stat().st_mtime_ns for name in MARTS for path in gold_partition_files(partitioned, name)}
+    rewritten = {path.parent.name for path in before if after.get(path) != before[path]}
+    assert rewritten <= {"date=2021-01-05", "date=2021-01-06"}
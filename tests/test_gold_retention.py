@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.gold.builder import run_gold
+from cdc_ecommerce.gold.retention import first_orders_path
+from cdc_ecommerce.pipeline import backfill
+from cdc_ecommerce.silver.merge import ENTITIES
+from cdc_ecommerce.silver.storage import load_silver_table
+from cdc_ecommerce.utils.io import read_parquet_or_empty
+
+
+def _retention_after_full_rebuild(settings, silver_tables) -> pd.DataFrame:
+    full = replace(settings, gold_root=settings.data_root.parent / "full_gold")
+    run_gold(full, silver_tables)
+    return read_parquet_or_empty(full.gold_root / "basic_retention.parquet")
+
+
+def test_first_order_table_tracks_full_history(settings) -> None:
+    backfill(date(2021, 1, 1), date(2021, 1, 6), settings)
+    table = read_parquet_or_empty(first_orders_path(settings))
+    orders = load_silver_table(settings, "orders")
+    paid = orders[orders["status"].isin(["paid", "shipped", "refunded"]) & ~orders["is_deleted"].astype(bool)]
+    expected = (
+        paid.assign(date=pd.to_datetime(paid["order_ts"], utc=True).dt.date.astype(str))
+        .groupby("user_id")["date"]
+        .min()
+    )
+
+    assert table.set_index("user_id")["first_order_date"].sort_index().to_dict() == expected.sort_index().to_dict()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_deleting_first_order_moves_retention_incrementally(settings, engine) -> None:
+    settings = replace(settings, gold_engine=engine)
+    backfill(date(2021, 1, 1), date(2021, 1, 6), settings)
+    silver_tables = {entity: load_silver_table(settings, entity) for entity in ENTITIES}
+    table = read_parquet_or_empty(first_orders_path(settings)).set_index("user_id")["first_order_date"]
+
+    orders = silver_tables["orders"]
+    order_dates = pd.to_datetime(orders["order_ts"], utc=True).dt.date.astype(str)
+    paid = orders["status"].isin(["paid", "shipped", "refunded"]) & ~orders["is_deleted"].astype(bool)
+    repeat_users = orders[paid].groupby("user_id")["order_ts"].nunique()
+    user = repeat_users[repeat_users > 1].index[0]
+    first = orders[paid & (orders["user_id"] == user) & (order_dates == table[user])]
+    orders.loc[first.index, "is_deleted"] = True
+    changed_events = pd.DataFrame({"entity": "orders", "pk": first["order_id"].astype(str).tolist()})
+
+    run_gold(settings, silver_tables, changed_events)
+
+    updated = read_parquet_or_empty(first_orders_path(settings)).set_index("user_id")["first_order_date"]
+    assert updated.get(user) != table[user]
+    assert updated.drop(user, errors="ignore").equals(table.drop(user))
+    pd.testing.assert_frame_equal(
+        read_parquet_or_empty(settings.gold_root / "basic_retention.parquet"),
+        _retention_after_full_rebuild(settings, silver_tables),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_reassigning_an_order_recomputes_its_previous_owner(settings, engine) -> None:
+    settings = replace(settings, gold_engine=engine)
+    backfill(date(2021, 1, 1), date(2021, 1, 6), settings)
+    silver_tables = {entity: load_silver_table(settings, entity) for entity in ENTITIES}
+    table = read_parquet_or_empty(first_orders_path(settings)).set_index("user_id")["first_order_date"]
+
+    orders = silver_tables["orders"]
+    order_dates = pd.to_datetime(orders["order_ts"], utc=True).dt.date.astype(str)
+    paid = orders["status"].isin(["paid", "shipped", "refunded"]) & ~orders["is_deleted"].astype(bool)
+    repeat_users = orders[paid].groupby("user_id")["order_ts"].nunique()
+    owner = repeat_users[repeat_users > 1].index[0]
+    first = orders[paid & (orders["user_id"] == owner) & (order_dates == table[owner])]
+    previous_orders = first[["order_id", "user_id", "order_ts"]].reset_index(drop=True)
+    orders.loc[first.index, "user_id"] = "U999999"
+    changed_events = pd.DataFrame({"entity": "orders", "pk": first["order_id"].astype(str).tolist()})
+
+    run_gold(settings, silver_tables, changed_events, previous_orders)
+
+    updated = read_parquet_or_empty(first_orders_path(settings)).set_index("user_id")["first_order_date"]
+    assert updated[owner] > table[owner]
+    full = replace(settings, gold_root=settings.data_root.parent / "full_gold")
+    run_gold(full, silver_tables)
+    pd.testing.assert_frame_equal(
+        read_parquet_or_empty(first_orders_path(settings)),
+        read_parquet_or_empty(first_orders_path(full)),
+        check_dtype=False,
+    )
+    pd.testing.assert_frame_equal(
+        read_parquet_or_empty(settings.gold_root / "basic_retention.parquet"),
+        read_parquet_or_empty(full.gold_root / "basic_retention.parquet"),
+        check_dtype=False,
+    )
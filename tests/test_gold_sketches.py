@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.gold.builder import run_gold
+from cdc_ecommerce.gold.sketches import (
+    SKETCH_TABLE,
+    hll_estimate,
+    hll_merge,
+    hll_sketch,
+    period_keys,
+    precision_for_error,
+    read_distinct_rollup,
+)
+from cdc_ecommerce.pipeline import backfill
+from cdc_ecommerce.silver.merge import ENTITIES
+from cdc_ecommerce.silver.storage import load_silver_table
+from cdc_ecommerce.utils.io import read_gold_table
+
+
+def test_merged_sketches_estimate_union_within_error_bound() -> None:
+    precision = precision_for_error(0.01)
+    left = hll_sketch(np.array([f"user-{index}" for index in range(60_000)], dtype=object), precision)
+    right = hll_sketch(np.array([f"user-{index}" for index in range(30_000, 90_000)], dtype=object), precision)
+    union = hll_sketch(np.array([f"user-{index}" for index in range(90_000)], dtype=object), precision)
+
+    assert np.array_equal(hll_merge([left, right]), union)
+    assert abs(hll_estimate(union) - 90_000) / 90_000 < 0.03
+
+
+def test_sketch_error_must_be_a_fraction() -> None:
+    with pytest.raises(ValueError, match="gold_sketch_error"):
+        precision_for_error(0)
+
+
+def test_sketch_rollups_match_exact_distinct_counts(settings) -> None:
+    settings = replace(settings, gold_distinct_sketches=True, gold_sketch_error=0.01)
+    duckdb_settings = replace(
+        settings,
+        data_root=settings.data_root.parent / "duckdb",
+        bronze_root=settings.data_root.parent / "duckdb" / "bronze",
+        silver_root=settings.data_root.parent / "duckdb" / "silver",
+        gold_root=settings.data_root.parent / "duckdb" / "gold",
+        metrics_root=settings.data_root.parent / "duckdb" / "metrics",
+        gold_engine="duckdb",
+    )
+    backfill(date(2021, 1, 1), date(2021, 1, 12), settings)
+    backfill(date(2021, 1, 1), date(2021, 1, 12), duckdb_settings)
+
+    pd.testing.assert_frame_equal(
+        read_gold_table(settings.gold_root, SKETCH_TABLE),
+        read_gold_table(duckdb_settings.gold_root, SKETCH_TABLE),
+        check_dtype=False,
+    )
+
+    daily = read_distinct_rollup(settings.gold_root, "day", metric="orders_count").set_index("period")["estimate"]
+    gmv = read_gold_table(settings.gold_root, "daily_gmv").set_index("date")["orders_count"]
+    assert daily.to_dict() == gmv.to_dict()
+
+    orders = load_silver_table(settings, "orders")
+    paid = orders[orders["status"].isin(["paid", "shipped", "refunded"]) & ~orders["is_deleted"].astype(bool)]
+    days = pd.to_datetime(paid["order_ts"], utc=True).dt.date.astype(str)
+    for grain in ("week", "month"):
+        exact = paid.groupby(period_keys(days, grain).to_numpy())["user_id"].nunique()
+        approximate = read_distinct_rollup(settings.gold_root, grain, metric="active_users").set_index("period")["estimate"]
+        assert list(approximate.index) == list(exact.index)
+        assert ((approximate - exact).abs() <= np.ceil(exact * 0.03)).all()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_sketched_marts_approximate_exact_marts(settings, engine) -> None:
+    settings = replace(settings, gold_engine=engine, gold_distinct_sketches=True, gold_sketch_error=0.01)
+    backfill(date(2021, 1, 1), date(2021, 1, 12), settings)
+    exact = replace(settings, gold_root=settings.data_root.parent / "exact_gold", gold_distinct_sketches=False)
+    run_gold(exact, {entity: load_silver_table(settings, entity) for entity in ENTITIES})
+
+    def both(name: str, keys: list[str]) -> pd.DataFrame:
+        approximate = read_gold_table(settings.gold_root, name).set_index(keys)
+        reference = read_gold_table(exact.gold_root, name).set_index(keys)
+        assert list(approximate.index) == list(reference.index)
+        return approximate.join(reference, rsuffix="_exact")
+
+    gmv = both("daily_gmv", ["date"])
+    assert np.allclose(gmv["gmv"], gmv["gmv_exact"])
+    assert ((gmv["orders_count"] - gmv["orders_count_exact"]).abs() <= np.ceil(gmv["orders_count_exact"] * 0.03)).all()
+    status = both("orders_by_status", ["date", "status"])
+    assert ((status["count"] - status["count_exact"]).abs() <= np.ceil(status["count_exact"] * 0.03)).all()
+    refunds = both("refund_rate", ["date"])
+    assert ((refunds["refund_rate"] - refunds["refund_rate_exact"]).abs() <= 0.05).all()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.gold.builder import _top_products, build_gold
+from cdc_ecommerce.pipeline import backfill
+from cdc_ecommerce.utils.io import read_parquet_or_empty
+
+
+def test_heap_selection_breaks_revenue_ties_by_product_id() -> None:
+    lines = pd.DataFrame(
+        {
+            "date": [date(2021, 1, 1)] * 5 + [date(2021, 1, 2)],
+            "product_id": ["p3", "p1", "p2", "p4", "p1", "p9"],
+            "line_revenue": [10.0, 5.0, 10.0, 1.0, 5.0, 2.5],
+        }
+    )
+    products = pd.DataFrame({"product_id": ["p1", "p2", "p3", "p4", "p9"], "name": ["a", "b", "c", "d", "e"]})
+
+    top = _top_products(lines, products, k=2)
+
+    assert top.values.tolist() == [
+        ["2021-01-01", "p1", "a", 10.0],
+        ["2021-01-01", "p2", "b", 10.0],
+        ["2021-01-02", "p9", "e", 2.5],
+    ]
+
+
+def test_top_k_is_configurable_for_both_engines(settings) -> None:
+    settings = replace(settings, gold_top_k=3)
+    backfill(date(2021, 1, 1), date(2021, 1, 6), settings)
+    expected = read_parquet_or_empty(settings.gold_root / "top_products.parquet")
+
+    build_gold(replace(settings, gold_engine="duckdb"))
+
+    assert expected.groupby("date").size().max() == 3
+    pd.testing.assert_frame_equal(read_parquet_or_empty(settings.gold_root / "top_products.parquet"), expected)
+
+
+def test_top_k_must_be_positive(settings) -> None:
+    with pytest.raises(ValueError, match="gold_top_k"):
+        build_gold(replace(settings, gold_top_k=0))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+
+from cdc_ecommerce.pipeline import backfill
+from cdc_ecommerce.quality.checks import run_quality_checks
+from cdc_ecommerce.utils.metrics_store import (
+    append_run_metrics,
+    export_run_metrics_json,
+    metrics_store_path,
+    read_run_metrics,
+    recent_processed_counts,
+    rolling_processed_counts,
+)
+
+
+def _payload(run_date: str, count: int, finished_at: str = "2026-01-01T00:00:00+00:00") -> dict:
+    return {"run_date": run_date, "processed_events_count": count, "runtime_seconds": 0.1, "finished_at": finished_at}
+
+
+def test_runs_are_stored_in_one_indexed_file(settings) -> None:
+    runs = backfill(date(2021, 1, 1), date(2021, 1, 4), settings)
+
+    assert list(settings.metrics_root.glob("run_*.json")) == []
+    assert metrics_store_path(settings.metrics_root).exists()
+    assert read_run_metrics(settings.metrics_root, start=date(2021, 1, 2), end=date(2021, 1, 3)) == runs[1:3]
+    assert recent_processed_counts(settings.metrics_root, 3) == [run["processed_events_count"] for run in runs[-3:]]
+
+
+def test_rolling_window_and_rerun_ordering(tmp_path) -> None:
+    for run_date, count in (("2021-01-01", 10), ("2021-01-02", 20), ("2021-01-03", 30)):
+        append_run_metrics(tmp_path, _payload(run_date, count))
+    append_run_metrics(tmp_path, _payload("2021-01-02", 40, "2026-01-02T00:00:00+00:00"))
+
+    rolling = rolling_processed_counts(tmp_path, window=2)
+
+    assert rolling["processed_events_count"].tolist() == [10, 20, 40, 30]
+    assert rolling["rolling_avg"].tolist() == [10.0, 15.0, 30.0, 35.0]
+    assert recent_processed_counts(tmp_path, 2) == [40, 30]
+
+
+def test_legacy_json_is_imported_and_exported(tmp_path) -> None:
+    legacy = _payload("2021-01-01", 12)
+    (tmp_path / "run_2021-01-01_20260101T000000000000.json").write_text(json.dumps(legacy), encoding="utf-8")
+    append_run_metrics(tmp_path, _payload("2021-01-02", 14))
+
+    exported = export_run_metrics_json(tmp_path, tmp_path / "export")
+
+    assert exported == 2
+    files = sorted((tmp_path / "export").glob("run_*.json"))
+    assert [json.loads(path.read_text(encoding="utf-8")) for path in files] == [legacy, _payload("2021-01-02", 14)]
+
+
+def test_volume_anomaly_reads_history_from_store(settings) -> None:
+    for day in range(1, 5):
+        append_run_metrics(settings.metrics_root, _payload(f"2021-01-0{day}", 100))
+    backfill(date(2021, 1, 1), date(2021, 1, 1), settings)
+
+    with pytest.raises(ValueError, match="volume outside expected range"):
+        run_quality_checks(settings, 10_000)
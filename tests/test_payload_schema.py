@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.quality.schema import validate_payload, validate_payloads
+
+
+def test_validate_payloads_returns_typed_columns() -> None:
+    payloads = pd.Series(
+        [
+            json.dumps({"updated_at": "2026-01-01T00:00:00Z", "price": 10.5}),
+            json.dumps({"updated_at": "2026-01-02T00:00:00Z", "name": "Renamed"}),
+        ],
+        index=[10, 11],
+    )
+
+    frame = validate_payloads("products", "U", payloads)
+
+    assert list(frame.index) == [10, 11]
+    assert set(frame.columns) == {"updated_at", "price", "name"}
+    assert str(frame["price"].dtype) == "Float64"
+    assert frame.loc[10, "price"] == 10.5
+    assert pd.isna(frame.loc[10, "name"])
+
+
+def test_validate_payloads_reports_the_same_error_as_single_row_validation() -> None:
+    bad = json.dumps({"order_item_id": "OI1", "order_id": "O1", "product_id": "P1", "qty": 0, "unit_price": 1.0, "created_at": "x"})
+    good = json.dumps({"order_item_id": "OI2", "order_id": "O1", "product_id": "P1", "qty": 1, "unit_price": 1.0, "created_at": "x"})
+
+    with pytest.raises(ValueError) as single:
+        validate_payload("order_items", "I", bad)
+    with pytest.raises(ValueError) as batch:
+        validate_payloads("order_items", "I", pd.Series([good, bad]))
+
+    assert str(batch.value) == str(single.value)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from cdc_ecommerce import pipeline
+from cdc_ecommerce.gold.storage import gold_rebuild_marker, gold_staging_root
+from cdc_ecommerce.utils.io import read_gold_table
+
+
+def _gold_files(settings) -> dict[str, int]:
+    return {
+        str(path.relative_to(settings.gold_root)): path.stat().st_mtime_ns
+        for path in settings.gold_root.rglob("*")
+        if path.is_file()
+    }
+
+
+def test_gold_and_quality_overlap(settings, monkeypatch) -> None:
+    barrier = threading.Barrier(2, timeout=30)
+    run_gold, run_quality_checks = pipeline.run_gold, pipeline.run_quality_checks
+
+    def gold(*args, **kwargs):
+        barrier.wait()
+        return run_gold(*args, **kwargs)
+
+    def quality(*args, **kwargs):
+        barrier.wait()
+        return run_quality_checks(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "run_gold", gold)
+    monkeypatch.setattr(pipeline, "run_quality_checks", quality)
+
+    metrics = pipeline.run_pipeline_for_date(date(2021, 1, 1), replace(settings, post_merge_workers=2))
+
+    assert metrics["output_row_counts"]["gold"]["daily_gmv"] == 1
+    assert (settings.gold_root / "daily_gmv.parquet").exists()
+    assert not gold_staging_root(settings).exists()
+
+
+@pytest.mark.parametrize("partitioning", ["none", "date"])
+def test_failed_quality_check_blocks_gold_publish(settings, monkeypatch, partitioning) -> None:
+    settings = replace(settings, gold_partitioning=partitioning)
+    pipeline.backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    before = _gold_files(settings)
+
+    def failing_quality(*args, **kwargs):
+        raise ValueError("Quality check failed: simulated")
+
+    monkeypatch.setattr(pipeline, "run_quality_checks", failing_quality)
+    with pytest.raises(ValueError, match="simulated"):
+        pipeline.run_pipeline_for_date(date(2021, 1, 4), settings)
+
+    marker = gold_rebuild_marker(settings)
+    assert _gold_files(settings) == {**before, str(marker.relative_to(settings.gold_root)): marker.stat().st_mtime_ns}
+    assert not gold_staging_root(settings).exists()
+
+    monkeypatch.undo()
+    pipeline.run_pipeline_for_date(date(2021, 1, 5), settings)
+    assert not marker.exists()
+    assert not gold_staging_root(settings).exists()
+    gmv_dates = read_gold_table(settings.gold_root, "daily_gmv")["date"].tolist()
+    assert gmv_dates == ["2021-01-01", "2021-01-02", "2021-01-03", "2021-01-04", "2021-01-05"]
+
+
+def test_incremental_run_stages_only_written_files(settings, monkeypatch) -> None:
+    settings = replace(settings, gold_partitioning="date")
+    pipeline.backfill(date(2021, 1, 1), date(2021, 1, 6), settings)
+    live_files = _gold_files(settings)
+    staged_files: list[str] = []
+    promote_gold = pipeline.promote_gold
+
+    def capture(cfg, staging):
+        staged_files.extend(str(path.relative_to(staging)) for path in staging.rglob("*") if path.is_file())
+        return promote_gold(cfg, staging)
+
+    monkeypatch.setattr(pipeline, "promote_gold", capture)
+    pipeline.run_pipeline_for_date(date(2021, 1, 7), settings)
+
+    assert staged_files
+    assert len(staged_files) < len(live_files)
+    assert "daily_gmv/date=2021-01-01/part.parquet" not in staged_files
+    assert "daily_gmv/date=2021-01-07/part.parquet" in staged_files
+    gmv_dates = read_gold_table(settings.gold_root, "daily_gmv")["date"].tolist()
+    assert gmv_dates == [f"2021-01-0{day}" for day in range(1, 8)]
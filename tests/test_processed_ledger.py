@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from cdc_ecommerce.silver.ledger import COUNTER_SPAN, ProcessedEventLedger, encode_event_ids
+from cdc_ecommerce.silver.merge import SilverMerger, migrate_legacy_ledger
+from cdc_ecommerce.utils.io import write_parquet
+
+
+def test_event_ids_are_encoded_by_date_prefix() -> None:
+    partitions, keys = encode_event_ids(pd.Series(["20210102-000007", "e-001", "20210102-12345678901"]))
+    assert list(partitions) == ["20210102", "other", "other"]
+    assert keys[0] % COUNTER_SPAN == 7
+    assert keys[1] == keys[2] == -1
+
+
+def test_ledger_only_reports_unseen_ids(tmp_path) -> None:
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events")
+    ledger.record(pd.Series(["20210101-000001", "20210102-000001", "e-001"]))
+
+    candidates = pd.Series(["20210101-000001", "20210101-000002", "20210102-000001", "e-001", "e-002"])
+    assert ledger.unprocessed_mask(candidates).tolist() == [False, True, False, False, True]
+    assert ledger.partitions() == ["20210101", "20210102", "other"]
+
+
+def test_retention_prunes_partitions_behind_watermark(tmp_path) -> None:
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events", retention_days=2)
+    ledger.record(pd.Series(["20210101-000001", "20210101-000003", "20210102-000001"]))
+    ledger.record(pd.Series(["20210105-000001"]))
+
+    assert ledger.watermark() == "20210103"
+    assert ledger.partitions() == ["20210105"]
+    assert ledger.pruned_runs() == {"20210101": [(1, 1), (3, 3)], "20210102": [(1, 1)]}
+    candidates = pd.Series(["20210101-000003", "20210101-000009", "20201231-000001", "20210105-000002"])
+    assert ledger.unprocessed_mask(candidates).tolist() == [False, True, True, True]
+
+
+def test_gap_ids_in_pruned_dates_still_apply(tmp_path) -> None:
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events", retention_days=2)
+    ledger.record(pd.Series([f"20210101-{counter:06d}" for counter in (1, 2, 3, 5, 6, 9)]))
+    ledger.record(pd.Series(["20210105-000001"]))
+
+    assert ledger.pruned_runs() == {"20210101": [(1, 3), (5, 6), (9, 9)]}
+    candidates = pd.Series([f"20210101-{counter:06d}" for counter in (2, 4, 6, 7, 8, 9)])
+    assert ledger.unprocessed_mask(candidates).tolist() == [False, True, False, True, True, False]
+
+    ledger.record(pd.Series(["20210101-000004"]))
+    assert ledger.pruned_runs() == {"20210101": [(1, 6), (9, 9)]}
+
+
+def test_legacy_pruned_ranges_are_read_as_one_run(tmp_path) -> None:
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events", retention_days=2)
+    ledger.watermark_path.parent.mkdir(parents=True)
+    ledger.watermark_path.write_text('{"watermark": "20210103", "pruned": {"20210101": [1, 3]}}', encoding="utf-8")
+
+    assert ledger.pruned_runs() == {"20210101": [(1, 3)]}
+    assert ledger.unprocessed_mask(pd.Series(["20210101-000002", "20210101-000004"])).tolist() == [False, True]
+
+
+def test_late_ids_for_pruned_dates_are_recorded(tmp_path) -> None:
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events", retention_days=2)
+    ledger.record(pd.Series(["20210101-000001", "20210105-000001"]))
+    ledger.record(pd.Series(["20210101-000009"]))
+
+    assert ledger.partitions() == ["20210105"]
+    assert ledger.pruned_runs() == {"20210101": [(1, 1), (9, 9)]}
+    assert ledger.unprocessed_mask(pd.Series(["20210101-000009", "20210101-000010"])).tolist() == [False, True]
+
+
+def test_legacy_id_file_is_migrated(tmp_path) -> None:
+    legacy = tmp_path / "_processed_event_ids.parquet"
+    write_parquet(pd.DataFrame({"event_id": ["20210101-000001", "e-001"]}), legacy)
+
+    ledger = ProcessedEventLedger(tmp_path / "_processed_events")
+    ledger.migrate_legacy(legacy)
+
+    assert not legacy.exists()
+    assert ledger.unprocessed_mask(pd.Series(["20210101-000001", "e-001"])).tolist() == [False, False]
+
+
+def test_merger_leaves_legacy_migration_to_the_pipeline(settings) -> None:
+    legacy = settings.silver_root / "_processed_event_ids.parquet"
+    write_parquet(pd.DataFrame({"event_id": ["20210101-000001"]}), legacy)
+
+    SilverMerger(settings)
+    assert legacy.exists()
+
+    migrate_legacy_ledger(settings)
+    assert not legacy.exists()
+    assert not SilverMerger(settings).ledger.unprocessed_mask(pd.Series(["20210101-000001"])).item()
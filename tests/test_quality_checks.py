@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.pipeline import backfill, run_pipeline_for_date
+from cdc_ecommerce.quality.checks import run_quality_checks
+from cdc_ecommerce.quality.key_index import full_check_marker, runs_since_full_check
+from cdc_ecommerce.silver.merge import ENTITIES
+from cdc_ecommerce.silver.storage import load_silver_table
+from cdc_ecommerce.utils.io import read_parquet_or_empty, write_parquet
+
+
+def _silver(settings) -> dict:
+    return {entity: load_silver_table(settings, entity) for entity in ENTITIES}
+
+
+@pytest.mark.parametrize("overrides", [{}, {"silver_buckets": 4, "silver_delta_log": True}])
+def test_checks_over_parquet_report_row_counts(settings, overrides) -> None:
+    settings = replace(settings, **overrides)
+    backfill(date(2021, 1, 1), date(2021, 1, 4), settings)
+
+    counts = run_quality_checks(settings, 0)
+
+    assert counts == {entity: int(frame.shape[0]) for entity, frame in _silver(settings).items()}
+
+
+def test_missing_foreign_keys_report_bounded_sample(settings) -> None:
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    tables = _silver(settings)
+    orders = tables["orders"]
+    orders.loc[orders.index[:7], "user_id"] = [f"ghost-{index}" for index in range(7)]
+
+    with pytest.raises(ValueError, match=r"orders reference missing users \(7 keys, sample: ghost-0, ghost-1, ghost-2\)"):
+        run_quality_checks(replace(settings, quality_sample_size=3), 0, tables)
+
+
+def test_range_violations_report_offending_keys(settings) -> None:
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    tables = _silver(settings)
+    items = tables["order_items"]
+    items.loc[items.index[0], "qty"] = 0
+    bad_item = str(items.loc[items.index[0], "order_item_id"])
+
+    with pytest.raises(ValueError, match=rf"order_items.qty must be positive \(1 keys, sample: {bad_item}\)"):
+        run_quality_checks(settings, 0, tables)
+
+
+def test_incremental_mode_checks_batch_and_schedules_full_checks(settings) -> None:
+    settings = replace(settings, quality_mode="incremental", quality_full_check_every=3)
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    assert runs_since_full_check(settings) == 0
+
+    orders_path = settings.silver_root / "orders.parquet"
+    orders = read_parquet_or_empty(orders_path)
+    old = orders["order_ts"].astype(str) < "2021-01-02"
+    orders.loc[orders.index[old][0], "user_id"] = "ghost-history"
+    write_parquet(orders, orders_path)
+
+    run_pipeline_for_date(date(2021, 1, 4), settings)
+    assert runs_since_full_check(settings) == 1
+    run_pipeline_for_date(date(2021, 1, 5), settings)
+    assert runs_since_full_check(settings) == 2
+
+    with pytest.raises(ValueError, match="ghost-history"):
+        run_pipeline_for_date(date(2021, 1, 6), settings)
+
+
+def test_incremental_mode_flags_changed_rows_against_key_index(settings) -> None:
+    settings = replace(settings, quality_mode="incremental")
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    tables = _silver(settings)
+    orders = tables["orders"]
+    orders.loc[orders.index[0], "user_id"] = "ghost-new"
+    changed = pd.DataFrame({"entity": ["orders"], "pk": [orders.loc[orders.index[0], "order_id"]]})
+
+    with pytest.raises(ValueError, match=r"orders reference missing users \(1 keys, sample: ghost-new\)"):
+        run_quality_checks(settings, 0, tables, changed)
+
+
+def test_failed_incremental_check_forces_full_check_next_run(settings) -> None:
+    settings = replace(settings, quality_mode="incremental")
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+    tables = _silver(settings)
+    orders = tables["orders"]
+    order_id = orders.loc[orders.index[0], "order_id"]
+    orders.loc[orders.index[0], "user_id"] = "ghost-new"
+    changed = pd.DataFrame({"entity": ["orders"], "pk": [order_id]})
+    with pytest.raises(ValueError, match="ghost-new"):
+        run_quality_checks(settings, 0, tables, changed)
+    assert full_check_marker(settings).exists()
+
+    run_quality_checks(settings, 0, _silver(settings), changed)
+
+    assert not full_check_marker(settings).exists()
+    assert runs_since_full_check(settings) == 0
+
+
+def test_incremental_mode_handles_quotes_in_key_index_paths(settings) -> None:
+    settings = replace(settings, quality_mode="incremental", silver_root=settings.data_root / "o'brien" / "silver")
+    backfill(date(2021, 1, 1), date(2021, 1, 3), settings)
+
+    run_pipeline_for_date(date(2021, 1, 4), settings)
+
+    assert runs_since_full_check(settings) == 1
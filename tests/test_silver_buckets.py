@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.pipeline import run_pipeline_for_date
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK, SilverMerger
+from cdc_ecommerce.silver.storage import (
+    compact_silver,
+    entity_path,
+    load_silver_table,
+    silver_table_files,
+    stored_buckets,
+)
+
+
+def _merge_days(settings, days: int) -> None:
+    merger = SilverMerger(settings)
+    for offset in range(days):
+        merger.merge_events(generate_cdc_batch(date(2021, 1, 1) + timedelta(days=offset), seed=settings.seed))
+
+
+@pytest.mark.parametrize("engine", ["columnar", "duckdb"])
+def test_bucketed_tables_read_back_as_flat_table(settings, tmp_path, engine) -> None:
+    flat_settings = replace(settings, silver_merge_engine=engine)
+    bucket_root = tmp_path / "bucketed"
+    bucketed_settings = replace(
+        flat_settings,
+        data_root=bucket_root,
+        silver_root=bucket_root / "silver",
+        silver_buckets=8,
+    )
+
+    _merge_days(flat_settings, 6)
+    _merge_days(bucketed_settings, 6)
+
+    for entity in ENTITIES:
+        pk_col = ENTITY_PK[entity]
+        expected = load_silver_table(flat_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        actual = load_silver_table(bucketed_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual[sorted(actual.columns)], expected[sorted(expected.columns)], check_dtype=False)
+
+
+def test_merge_rewrites_only_touched_buckets(settings) -> None:
+    bucketed = replace(settings, silver_buckets=16)
+    _merge_days(bucketed, 3)
+    before = {path: path.stat().st_mtime_ns for path in silver_table_files(bucketed, "users")}
+
+    late_update = generate_cdc_batch(date(2021, 1, 4), seed=bucketed.seed)
+    late_update = late_update[(late_update["entity"] == "users") & (late_update["operation"] == "U")].head(1)
+    SilverMerger(bucketed).merge_events(late_update)
+
+    after = {path: path.stat().st_mtime_ns for path in silver_table_files(bucketed, "users")}
+    changed = [path for path in after if after[path] != before.get(path)]
+    assert len(changed) == 1
+
+
+def test_pipeline_refuses_a_mismatched_bucket_layout(settings) -> None:
+    bucketed = replace(settings, silver_buckets=8)
+    run_pipeline_for_date(date(2021, 1, 1), bucketed)
+    assert stored_buckets(bucketed, "orders") == 8
+
+    for buckets in (0, 4):
+        with pytest.raises(ValueError, match="stored with 8 buckets but silver_buckets is"):
+            run_pipeline_for_date(date(2021, 1, 2), replace(settings, silver_buckets=buckets))
+    with pytest.raises(ValueError, match="stored with 8 buckets"):
+        compact_silver(settings, force=True)
+    assert sorted(path.parent.name for path in silver_table_files(bucketed, "orders")) == [f"bucket=0{n}" for n in range(8)]
+
+    run_pipeline_for_date(date(2021, 1, 2), bucketed)
+    assert not entity_path(bucketed, "orders").exists()
+
+
+def test_legacy_flat_layout_is_detected_without_marker(settings) -> None:
+    _merge_days(settings, 1)
+
+    with pytest.raises(ValueError, match="stored with 0 buckets"):
+        run_pipeline_for_date(date(2021, 1, 2), replace(settings, silver_buckets=4))
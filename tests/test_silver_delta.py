@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from typer.testing import CliRunner
+
+from cdc_ecommerce.cli import app
+from cdc_ecommerce.config import get_settings
+from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK, SilverMerger
+from cdc_ecommerce.silver.storage import (
+    base_paths,
+    compact_silver,
+    delta_files,
+    load_silver_table,
+    silver_row_count,
+)
+
+
+def _merge_days(settings, days: int) -> None:
+    merger = SilverMerger(settings)
+    for offset in range(days):
+        merger.merge_events(generate_cdc_batch(date(2021, 1, 1) + timedelta(days=offset), seed=settings.seed))
+
+
+def _table(settings, entity: str) -> pd.DataFrame:
+    frame = load_silver_table(settings, entity).sort_values(ENTITY_PK[entity]).reset_index(drop=True)
+    return frame[sorted(frame.columns)]
+
+
+@pytest.mark.parametrize(
+    "engine,buckets",
+    [("columnar", 0), ("duckdb", 0), ("columnar", 4), ("duckdb", 4)],
+)
+def test_delta_log_reads_back_as_rewritten_table(settings, tmp_path, engine, buckets) -> None:
+    table_settings = replace(settings, silver_merge_engine=engine, silver_buckets=buckets)
+    delta_root = tmp_path / "delta"
+    delta_settings = replace(
+        table_settings,
+        data_root=delta_root,
+        silver_root=delta_root / "silver",
+        silver_delta_log=True,
+    )
+
+    _merge_days(table_settings, 5)
+    _merge_days(delta_settings, 5)
+
+    assert any(delta_files(base) for base in base_paths(delta_settings, "orders"))
+    for entity in ENTITIES:
+        pd.testing.assert_frame_equal(_table(delta_settings, entity), _table(table_settings, entity), check_dtype=False)
+        assert silver_row_count(delta_settings, entity) == silver_row_count(table_settings, entity)
+
+
+def test_compaction_folds_deltas_without_changing_table(settings) -> None:
+    delta_settings = replace(settings, silver_delta_log=True)
+    _merge_days(delta_settings, 4)
+    before = {entity: _table(delta_settings, entity) for entity in ENTITIES}
+
+    folded = compact_silver(delta_settings, force=True)
+
+    assert folded["orders"] >= 3
+    for entity in ENTITIES:
+        assert not any(delta_files(base) for base in base_paths(delta_settings, entity))
+        pd.testing.assert_frame_equal(_table(delta_settings, entity), before[entity], check_dtype=False)
+
+
+def test_compaction_respects_thresholds(settings) -> None:
+    delta_settings = replace(settings, silver_delta_log=True, silver_compaction_max_deltas=4)
+    _merge_days(delta_settings, 3)
+
+    assert compact_silver(delta_settings)["orders"] == 0
+
+    SilverMerger(delta_settings).merge_events(generate_cdc_batch(date(2021, 1, 4), seed=delta_settings.seed))
+    assert compact_silver(delta_settings)["orders"] == 4
+    assert not delta_files(base_paths(delta_settings, "orders")[0])
+
+
+def test_cli_writes_and_compacts_bucketed_deltas(tmp_path) -> None:
+    runner = CliRunner()
+    layout = ["--project-root", str(tmp_path)]
+    for day in ("2021-01-01", "2021-01-02"):
+        result = runner.invoke(app, ["run", "--date", day, "--buckets", "4", "--delta-log", *layout])
+        assert result.exit_code == 0, result.output
+
+    settings = replace(get_settings(tmp_path), silver_buckets=4)
+    assert any(delta_files(base) for base in base_paths(settings, "orders"))
+
+    result = runner.invoke(app, ["compact", "--force", "--buckets", "4", *layout])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["orders"] > 0
+    assert not any(delta_files(base) for base in base_paths(settings, "orders"))
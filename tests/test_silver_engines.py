@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from cdc_ecommerce.ingestion.generator import generate_cdc_batch
+from cdc_ecommerce.silver.merge import ENTITIES, ENTITY_PK, SilverMerger
+from cdc_ecommerce.silver.storage import load_silver_table
+from cdc_ecommerce.utils.io import connect_duckdb, copy_query_to_parquet, read_parquet_or_empty
+
+
+def _run_days(settings, days: int) -> dict[str, pd.DataFrame]:
+    merger = SilverMerger(settings)
+    for offset in range(days):
+        merger.merge_events(generate_cdc_batch(date(2021, 1, 1) + timedelta(days=offset), seed=settings.seed))
+    return {entity: read_parquet_or_empty(settings.silver_root / f"{entity}.parquet") for entity in ENTITIES}
+
+
+def _normalized(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame[sorted(frame.columns)].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("engine", ["columnar", "duckdb"])
+def test_engine_matches_python_reference(settings, tmp_path, engine) -> None:
+    python_settings = replace(settings, silver_merge_engine="python")
+    engine_root = tmp_path / engine
+    engine_settings = replace(
+        settings,
+        data_root=engine_root,
+        silver_root=engine_root / "silver",
+        metrics_root=engine_root / "metrics",
+        silver_merge_engine=engine,
+    )
+
+    expected = _run_days(python_settings, 10)
+    actual = _run_days(engine_settings, 10)
+
+    for entity in ENTITIES:
+        pd.testing.assert_frame_equal(_normalized(actual[entity]), _normalized(expected[entity]), check_dtype=False)
+
+
+@pytest.mark.parametrize("engine", ["columnar", "duckdb"])
+def test_parallel_entity_merge_is_byte_identical(settings, tmp_path, engine) -> None:
+    serial_settings = replace(settings, silver_merge_engine=engine)
+    parallel_root = tmp_path / "parallel"
+    parallel_settings = replace(
+        serial_settings,
+        data_root=parallel_root,
+        silver_root=parallel_root / "silver",
+        silver_merge_workers=3,
+    )
+
+    _run_days(serial_settings, 4)
+    _run_days(parallel_settings, 4)
+
+    for entity in ENTITIES:
+        serial_bytes = (serial_settings.silver_root / f"{entity}.parquet").read_bytes()
+        assert (parallel_settings.silver_root / f"{entity}.parquet").read_bytes() == serial_bytes
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"silver_merge_shards": 3},
+        {"silver_merge_shards": 3, "silver_merge_workers": 2},
+        {"silver_merge_shards": 4, "silver_buckets": 8},
+    ],
+)
+def test_key_sharded_merge_matches_single_process(settings, tmp_path, overrides) -> None:
+    sharded_root = tmp_path / "sharded"
+    sharded_settings = replace(settings, data_root=sharded_root, silver_root=sharded_root / "silver", **overrides)
+
+    expected = _run_days(settings, 4)
+    _run_days(sharded_settings, 4)
+
+    for entity in ENTITIES:
+        pk_col = ENTITY_PK[entity]
+        actual = load_silver_table(sharded_settings, entity).sort_values(pk_col).reset_index(drop=True)
+        pd.testing.assert_frame_equal(_normalized(actual), _normalized(expected[entity]), check_dtype=False)
+
+
+def test_duckdb_settings_and_paths_are_not_spliced_into_sql(tmp_path) -> None:
+    with pytest.raises(ValueError, match="Invalid DuckDB memory limit"):
+        connect_duckdb("1GB'; SELECT 1; --")
+
+    conn = connect_duckdb("512MB", tmp_path / "it's tmp")
+    assert conn.execute("SELECT current_setting('temp_directory')").fetchone()[0].endswith("it's tmp")
+    target = tmp_path / "o'brien" / "part.parquet"
+    assert copy_query_to_parquet(conn, "SELECT ? AS value", target, [7]) == 1
+    assert read_parquet_or_empty(target)["value"].tolist() == [7]
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import json
+from dataclasses import replace
 
 import pandas as pd
+import pytest
 
 from cdc_ecommerce.silver.merge import SilverMerger
 from cdc_ecommerce.utils.io import read_parquet_or_empty
 
 
+@pytest.fixture(params=["python", "columnar", "duckdb"])
+def settings(settings, request):
+    return replace(settings, silver_merge_engine=request.param)
+
 
 def _events(rows: list[dict]) -> pd.DataFrame:
     df = pd.DataFrame(rows)